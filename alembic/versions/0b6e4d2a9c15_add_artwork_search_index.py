@@ -0,0 +1,64 @@
+"""Add full-text search index over artworks
+
+Revision ID: 0b6e4d2a9c15
+Revises: f3a8b1d6c274
+Create Date: 2026-10-17 18:02:37.115420
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b6e4d2a9c15'
+down_revision = 'f3a8b1d6c274'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Not part of Base.metadata: the table's shape depends on the backend
+    # (see art_forge/search.py). Existing artworks are indexed here.
+    bind = op.get_bind()
+    if sa.inspect(bind).has_table('artwork_search'):
+        return
+
+    if bind.dialect.name == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE artwork_search USING fts5("
+            "title, description, tags, series, artist, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        op.execute(
+            "INSERT INTO artwork_search (rowid, title, description, tags, series, artist) "
+            "SELECT a.id, a.title, coalesce(a.description, ''), "
+            "coalesce((SELECT group_concat(t.name, ' ') FROM artwork_tags at "
+            "JOIN tags t ON t.id = at.tag_id WHERE at.artwork_id = a.id), ''), "
+            "coalesce((SELECT group_concat(s.name, ' ') FROM artwork_series aws "
+            "JOIN series s ON s.id = aws.series_id WHERE aws.artwork_id = a.id), ''), "
+            "u.username "
+            "FROM artworks a JOIN users u ON u.id = a.artist_id"
+        )
+    elif bind.dialect.name == 'postgresql':
+        op.create_table(
+            'artwork_search',
+            sa.Column('artwork_id', sa.Integer(), sa.ForeignKey('artworks.id', ondelete='CASCADE'), primary_key=True),
+            sa.Column('document', sa.dialects.postgresql.TSVECTOR(), nullable=False),
+        )
+        op.create_index('ix_artwork_search_document', 'artwork_search', ['document'], postgresql_using='gin')
+        op.execute(
+            "INSERT INTO artwork_search (artwork_id, document) "
+            "SELECT a.id, "
+            "setweight(to_tsvector('simple', coalesce(a.title, '')), 'A') || "
+            "setweight(to_tsvector('simple', coalesce((SELECT string_agg(t.name, ' ') FROM artwork_tags at "
+            "JOIN tags t ON t.id = at.tag_id WHERE at.artwork_id = a.id), '')), 'B') || "
+            "setweight(to_tsvector('simple', coalesce((SELECT string_agg(s.name, ' ') FROM artwork_series aws "
+            "JOIN series s ON s.id = aws.series_id WHERE aws.artwork_id = a.id), '')), 'B') || "
+            "setweight(to_tsvector('simple', u.username), 'C') || "
+            "setweight(to_tsvector('simple', coalesce(a.description, '')), 'D') "
+            "FROM artworks a JOIN users u ON u.id = a.artist_id"
+        )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS artwork_search")
@@ -0,0 +1,39 @@
+"""Add denormalized spark/comment counters to artworks
+
+Revision ID: 3c1f2a7d9e40
+Revises: 899af15a5fd2
+Create Date: 2026-10-17 09:12:31.104512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c1f2a7d9e40'
+down_revision = '899af15a5fd2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Tables may already carry the columns if they were created by create_all
+    existing = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('artworks')}
+    with op.batch_alter_table('artworks') as batch_op:
+        if 'spark_count' not in existing:
+            batch_op.add_column(sa.Column('spark_count', sa.Integer(), nullable=False, server_default='0'))
+        if 'comment_count' not in existing:
+            batch_op.add_column(sa.Column('comment_count', sa.Integer(), nullable=False, server_default='0'))
+
+    # Backfill from the source tables
+    op.execute(
+        "UPDATE artworks SET "
+        "spark_count = (SELECT COUNT(*) FROM sparks WHERE sparks.artwork_id = artworks.id), "
+        "comment_count = (SELECT COUNT(*) FROM comments WHERE comments.artwork_id = artworks.id)"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('artworks') as batch_op:
+        batch_op.drop_column('comment_count')
+        batch_op.drop_column('spark_count')
@@ -0,0 +1,46 @@
+"""Add trending scores and the queue of changes to apply to them
+
+Revision ID: 4e7b2c9d0a13
+Revises: 7d2f9a4c1b68
+Create Date: 2026-10-17 21:12:48.630194
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e7b2c9d0a13'
+down_revision = '7d2f9a4c1b68'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table('artwork_trends'):
+        op.create_table(
+            'artwork_trends',
+            sa.Column('artwork_id', sa.Integer(), sa.ForeignKey('artworks.id'), primary_key=True),
+            sa.Column('score', sa.Float(), nullable=False),
+            sa.Column('computed_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        )
+        op.create_index('ix_artwork_trends_score_artwork_id', 'artwork_trends', ['score', 'artwork_id'], unique=False)
+    if not inspector.has_table('trending_queue'):
+        op.create_table(
+            'trending_queue',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('artwork_id', sa.Integer(), sa.ForeignKey('artworks.id'), nullable=False),
+            sa.Column('weight', sa.Float(), nullable=True),
+            sa.Column('occurred_at', sa.DateTime(timezone=True), nullable=True),
+        )
+        op.create_index('ix_trending_queue_artwork_id', 'trending_queue', ['artwork_id'], unique=False)
+        # Existing artworks get scored from scratch on the first run
+        op.execute("INSERT INTO trending_queue (artwork_id) SELECT id FROM artworks")
+
+
+def downgrade() -> None:
+    op.drop_index('ix_trending_queue_artwork_id', table_name='trending_queue')
+    op.drop_table('trending_queue')
+    op.drop_index('ix_artwork_trends_score_artwork_id', table_name='artwork_trends')
+    op.drop_table('artwork_trends')
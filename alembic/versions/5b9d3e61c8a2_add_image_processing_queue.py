@@ -0,0 +1,56 @@
+"""Add image processing queue and image status
+
+Revision ID: 5b9d3e61c8a2
+Revises: a7e4c20b51d3
+Create Date: 2026-10-17 11:26:05.902114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b9d3e61c8a2'
+down_revision = 'a7e4c20b51d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+
+    # Columns/tables may already exist if they were created by create_all
+    existing = {c['name'] for c in inspector.get_columns('artwork_images')}
+    with op.batch_alter_table('artwork_images') as batch_op:
+        if 'format' not in existing:
+            batch_op.add_column(sa.Column('format', sa.String(), nullable=True))
+        if 'status' not in existing:
+            batch_op.add_column(sa.Column('status', sa.String(), nullable=False, server_default='ready'))
+
+    if not inspector.has_table('image_jobs'):
+        op.create_table(
+            'image_jobs',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('image_id', sa.Integer(), nullable=False),
+            sa.Column('status', sa.String(), nullable=False),
+            sa.Column('attempts', sa.Integer(), nullable=False),
+            sa.Column('error', sa.Text(), nullable=True),
+            sa.Column('claimed_at', sa.DateTime(), nullable=True),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+            sa.Column('finished_at', sa.DateTime(), nullable=True),
+            sa.ForeignKeyConstraint(['image_id'], ['artwork_images.id']),
+            sa.PrimaryKeyConstraint('id'),
+        )
+        op.create_index(op.f('ix_image_jobs_id'), 'image_jobs', ['id'], unique=False)
+        op.create_index(op.f('ix_image_jobs_image_id'), 'image_jobs', ['image_id'], unique=False)
+        op.create_index(op.f('ix_image_jobs_status'), 'image_jobs', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_image_jobs_status'), table_name='image_jobs')
+    op.drop_index(op.f('ix_image_jobs_image_id'), table_name='image_jobs')
+    op.drop_index(op.f('ix_image_jobs_id'), table_name='image_jobs')
+    op.drop_table('image_jobs')
+    with op.batch_alter_table('artwork_images') as batch_op:
+        batch_op.drop_column('status')
+        batch_op.drop_column('format')
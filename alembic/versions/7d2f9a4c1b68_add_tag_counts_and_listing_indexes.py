@@ -0,0 +1,50 @@
+"""Add tag usage counts and indexes for the tag and series pages
+
+Revision ID: 7d2f9a4c1b68
+Revises: 0b6e4d2a9c15
+Create Date: 2026-10-17 19:41:05.286517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2f9a4c1b68'
+down_revision = '0b6e4d2a9c15'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_tags_artwork_count', 'tags', ['artwork_count']),
+    ('ix_artwork_tags_tag_id_artwork_id', 'artwork_tags', ['tag_id', 'artwork_id']),
+    ('ix_artwork_series_series_id_position', 'artwork_series', ['series_id', 'position', 'artwork_id']),
+]
+
+
+def upgrade() -> None:
+    inspector = sa.inspect(op.get_bind())
+    if 'artwork_count' not in {column['name'] for column in inspector.get_columns('tags')}:
+        with op.batch_alter_table('tags') as batch_op:
+            batch_op.add_column(sa.Column('artwork_count', sa.Integer(), nullable=False, server_default='0'))
+    op.execute(
+        "UPDATE tags SET artwork_count = (SELECT count(*) FROM artwork_tags "
+        "JOIN artworks ON artworks.id = artwork_tags.artwork_id "
+        "WHERE artwork_tags.tag_id = tags.id AND artworks.is_public)"
+    )
+
+    for name, table, columns in INDEXES:
+        if name not in {index['name'] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns, unique=False)
+    # The (series_id, position, artwork_id) index covers plain series_id lookups
+    if 'ix_artwork_series_series_id' in {index['name'] for index in inspector.get_indexes('artwork_series')}:
+        op.drop_index('ix_artwork_series_series_id', table_name='artwork_series')
+
+
+def downgrade() -> None:
+    op.create_index('ix_artwork_series_series_id', 'artwork_series', ['series_id'], unique=False)
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
+    with op.batch_alter_table('tags') as batch_op:
+        batch_op.drop_column('artwork_count')
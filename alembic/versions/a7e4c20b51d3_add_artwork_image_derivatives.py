@@ -0,0 +1,44 @@
+"""Add artwork image derivatives table
+
+Revision ID: a7e4c20b51d3
+Revises: 3c1f2a7d9e40
+Create Date: 2026-10-17 10:02:47.381925
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7e4c20b51d3'
+down_revision = '3c1f2a7d9e40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The table may already exist if it was created by create_all
+    if sa.inspect(op.get_bind()).has_table('artwork_image_derivatives'):
+        return
+    op.create_table(
+        'artwork_image_derivatives',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('image_id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('filename', sa.String(), nullable=False),
+        sa.Column('width', sa.Integer(), nullable=False),
+        sa.Column('height', sa.Integer(), nullable=False),
+        sa.Column('file_size', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['image_id'], ['artwork_images.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('image_id', 'kind', name='unique_image_derivative_kind'),
+    )
+    op.create_index(op.f('ix_artwork_image_derivatives_id'), 'artwork_image_derivatives', ['id'], unique=False)
+    op.create_index(op.f('ix_artwork_image_derivatives_image_id'), 'artwork_image_derivatives', ['image_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_artwork_image_derivatives_image_id'), table_name='artwork_image_derivatives')
+    op.drop_index(op.f('ix_artwork_image_derivatives_id'), table_name='artwork_image_derivatives')
+    op.drop_table('artwork_image_derivatives')
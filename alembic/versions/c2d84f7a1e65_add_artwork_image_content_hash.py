@@ -0,0 +1,29 @@
+"""Add content hash to artwork images
+
+Revision ID: c2d84f7a1e65
+Revises: 5b9d3e61c8a2
+Create Date: 2026-10-17 12:40:18.557201
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2d84f7a1e65'
+down_revision = '5b9d3e61c8a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The column may already exist if the table was created by create_all
+    existing = {c['name'] for c in sa.inspect(op.get_bind()).get_columns('artwork_images')}
+    if 'content_hash' not in existing:
+        with op.batch_alter_table('artwork_images') as batch_op:
+            batch_op.add_column(sa.Column('content_hash', sa.String(length=64), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('artwork_images') as batch_op:
+        batch_op.drop_column('content_hash')
@@ -0,0 +1,42 @@
+"""Add content-addressed blobs table
+
+Revision ID: e81b5c0f2d97
+Revises: c2d84f7a1e65
+Create Date: 2026-10-17 14:05:52.730118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e81b5c0f2d97'
+down_revision = 'c2d84f7a1e65'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # The table may already exist if it was created by create_all.
+    # Existing flat-named uploads are moved in by `artforge migrate-storage`.
+    if sa.inspect(op.get_bind()).has_table('blobs'):
+        return
+    op.create_table(
+        'blobs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('ref_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('key'),
+    )
+    op.create_index(op.f('ix_blobs_content_hash'), 'blobs', ['content_hash'], unique=True)
+    op.create_index(op.f('ix_blobs_id'), 'blobs', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_blobs_id'), table_name='blobs')
+    op.drop_index(op.f('ix_blobs_content_hash'), table_name='blobs')
+    op.drop_table('blobs')
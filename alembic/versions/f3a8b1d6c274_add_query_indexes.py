@@ -0,0 +1,42 @@
+"""Add indexes for the browse, gallery and artwork page queries
+
+Revision ID: f3a8b1d6c274
+Revises: e81b5c0f2d97
+Create Date: 2026-10-17 16:20:11.402913
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8b1d6c274'
+down_revision = 'e81b5c0f2d97'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_artworks_artist_id_slug', 'artworks', ['artist_id', 'slug']),
+    ('ix_artworks_artist_id_created_at', 'artworks', ['artist_id', 'created_at']),
+    ('ix_artworks_is_public_created_at_id', 'artworks', ['is_public', 'created_at', 'id']),
+    ('ix_artwork_images_artwork_id_order', 'artwork_images', ['artwork_id', 'order']),
+    ('ix_artwork_images_content_hash', 'artwork_images', ['content_hash']),
+    ('ix_comments_artwork_id_created_at', 'comments', ['artwork_id', 'created_at']),
+    ('ix_sparks_image_id', 'sparks', ['image_id']),
+    ('ix_artwork_series_artwork_id', 'artwork_series', ['artwork_id']),
+    ('ix_artwork_series_series_id', 'artwork_series', ['series_id']),
+]
+
+
+def upgrade() -> None:
+    # Skip any index that already exists (e.g. a database built by create_all)
+    inspector = sa.inspect(op.get_bind())
+    for name, table, columns in INDEXES:
+        if name not in {index['name'] for index in inspector.get_indexes(table)}:
+            op.create_index(name, table, columns, unique=False)
+
+
+def downgrade() -> None:
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
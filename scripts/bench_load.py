@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""Load-test the main ArtForge routes and report latency percentiles.
+
+Run it against a database filled by scripts/seed_benchmark_data.py. It
+reads DATABASE_URL to pick targets: random public artworks and their
+artists. Unless --url points at a running server, it starts one uvicorn
+process on that database for the run. Login throttling is off in that
+process, so the upload workers can sign in.
+
+Each scenario runs on its own for --duration seconds after a --warmup.
+--concurrency async workers send requests back to back:
+    browse    GET /art/browse, newest and trending sort
+    gallery   GET /art/{artist}
+    detail    GET /art/{artist}/{slug}
+    spark     POST /art/{artist}/{slug}/spark, one anonymous visitor per worker
+    upload    POST /art/{artist}/upload with a small generated PNG, as seeded artists
+
+Read scenarios are anonymous, so they go through the page cache as real
+visitors do. Start the server with PAGE_CACHE_MAX_ENTRIES=0 to measure
+rendering instead. Sparks and uploads change the database; reseed
+between runs you want to compare.
+
+Prints throughput and p50/p95/p99 latency per scenario. --output writes
+them as JSON with the commit, settings and row counts. --compare prints
+the change against an earlier JSON file.
+
+Usage:
+    python scripts/bench_load.py [--url http://127.0.0.1:8003] [--scenarios browse,detail]
+        [--duration 10] [--warmup 2] [--concurrency 32] [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+SCENARIOS = ("browse", "gallery", "detail", "spark", "upload")
+PASSWORD = "benchmark"  # Matches scripts/seed_benchmark_data.py
+UPLOADERS = 8
+
+
+def load_targets(limit: int = 2000) -> Tuple[List[Tuple[str, str]], Dict[str, int]]:
+    """Random public (artist, slug) pairs and row counts from DATABASE_URL."""
+    from sqlalchemy import func, select
+    from art_forge.database import SessionLocal
+    from art_forge.models import Artwork, Comment, Spark, User
+
+    db = SessionLocal()
+    try:
+        targets = db.execute(
+            select(User.username, Artwork.slug)
+            .join(User, User.id == Artwork.artist_id)
+            .where(Artwork.is_public == True)
+            .order_by(func.random())
+            .limit(limit)
+        ).all()
+        rows = {
+            model.__tablename__: db.scalar(select(func.count()).select_from(model))
+            for model in (User, Artwork, Spark, Comment)
+        }
+    finally:
+        db.close()
+    return [tuple(target) for target in targets], rows
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server() -> Tuple[subprocess.Popen, str]:
+    port = free_port()
+    env = dict(os.environ, LOGIN_IP_BURST="0", LOGIN_USER_BURST="0")
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "art_forge.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit("The server exited during startup")
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return process, url
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("The server did not come up within 60s")
+
+
+def png(rng: random.Random) -> bytes:
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.new("RGB", (256, 192), tuple(rng.randrange(256) for _ in range(3))).save(buf, "PNG")
+    return buf.getvalue()
+
+
+async def login(url: str, username: str) -> httpx.AsyncClient:
+    client = httpx.AsyncClient(base_url=url, timeout=60)
+    response = await client.post("/art/login", data={"username": username, "password": PASSWORD})
+    if "access_token" not in client.cookies:
+        await client.aclose()
+        raise SystemExit(f"Could not log in as {username} ({response.status_code}); was the database seeded?")
+    return client
+
+
+def make_request(scenario: str, targets: List[Tuple[str, str]], rng: random.Random,
+                 uploader: Optional[str]) -> Callable[[httpx.AsyncClient], "asyncio.Future"]:
+    """A callable issuing one request of the scenario on the given client."""
+    counter = [0]
+
+    def request(client: httpx.AsyncClient):
+        artist, slug = rng.choice(targets)
+        if scenario == "browse":
+            return client.get("/art/browse", params={"sort": "trending"} if rng.random() < 0.3 else None)
+        if scenario == "gallery":
+            return client.get(f"/art/{artist}")
+        if scenario == "detail":
+            return client.get(f"/art/{artist}/{slug}")
+        if scenario == "spark":
+            return client.post(f"/art/{artist}/{slug}/spark", headers={"Accept": "application/json"})
+        counter[0] += 1
+        return client.post(
+            f"/art/{uploader}/upload",
+            data={"title": f"Bench upload {rng.getrandbits(32):08x} {counter[0]}", "tags": "benchmark"},
+            files=[("images", ("bench.png", png(rng), "image/png"))],
+            headers={"Accept": "application/json"},
+        )
+
+    return request
+
+
+async def run_scenario(scenario: str, url: str, targets: List[Tuple[str, str]],
+                       args: argparse.Namespace) -> dict:
+    if scenario == "upload":
+        # A few seeded artists, shared round-robin by the workers
+        artists = sorted({artist for artist, _ in targets})[:UPLOADERS]
+        clients = [await login(url, artist) for artist in artists]
+        owners = artists
+    else:
+        # Each spark worker is its own anonymous visitor with its own session cookie
+        clients = ([httpx.AsyncClient(base_url=url, timeout=60) for _ in range(args.concurrency)]
+                   if scenario == "spark" else
+                   [httpx.AsyncClient(base_url=url, timeout=60,
+                                      limits=httpx.Limits(max_connections=args.concurrency))])
+        owners = [None] * len(clients)
+
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    errors = 0
+    recording = False
+    stop = asyncio.Event()
+
+    async def worker(slot: int) -> None:
+        nonlocal errors
+        client = clients[slot % len(clients)]
+        request = make_request(scenario, targets, random.Random(f"{args.seed}-{scenario}-{slot}"),
+                               owners[slot % len(owners)])
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                response = await request(client)
+            except httpx.HTTPError:
+                if recording:
+                    errors += 1
+                continue
+            if recording:
+                latencies.append(time.perf_counter() - started)
+                statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+                errors += response.status_code >= 400
+
+    async def clock() -> float:
+        nonlocal recording
+        await asyncio.sleep(args.warmup)
+        recording = True
+        started = time.perf_counter()
+        await asyncio.sleep(args.duration)
+        stop.set()
+        return time.perf_counter() - started
+
+    workers = [asyncio.ensure_future(worker(slot)) for slot in range(args.concurrency)]
+    elapsed = await clock()
+    await asyncio.gather(*workers)
+    for client in clients:
+        await client.aclose()
+    return summarize(latencies, statuses, errors, elapsed)
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list, in milliseconds."""
+    if not ordered:
+        return float("nan")
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)] * 1000
+
+
+def summarize(latencies: List[float], statuses: Dict[str, int], errors: int, elapsed: float) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "statuses": statuses,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(ordered) / elapsed, 2),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else None,
+        "p50_ms": round(percentile(ordered, 50), 3) if ordered else None,
+        "p95_ms": round(percentile(ordered, 95), 3) if ordered else None,
+        "p99_ms": round(percentile(ordered, 99), 3) if ordered else None,
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else None,
+    }
+
+
+def git(*command: str) -> Optional[str]:
+    try:
+        return subprocess.run(["git", *command], cwd=REPO_ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def describe_run(args: argparse.Namespace, url: str, rows: Dict[str, int]) -> dict:
+    from art_forge import __version__
+    from art_forge.config import settings
+    from sqlalchemy.engine import make_url
+
+    status = git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": git("rev-parse", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+        "version": __version__,
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "url": url,
+        "database": make_url(settings.database_url).get_backend_name(),
+        "rows": rows,
+        "config": {
+            "scenarios": args.scenarios,
+            "duration": args.duration,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+        },
+    }
+
+
+def print_results(results: Dict[str, dict], baseline: Optional[Dict[str, dict]]) -> None:
+    def change(new, old) -> str:
+        if baseline is None or new is None or not old:
+            return ""
+        return f" ({(new - old) / old * 100:+.0f}%)"
+
+    print(f"{'scenario':<9} {'req/s':>16} {'p50':>18} {'p95':>18} {'p99':>18} {'errors':>7}")
+    for scenario, result in results.items():
+        old = (baseline or {}).get(scenario, {})
+        cells = [f"{result['throughput_rps']:.0f}{change(result['throughput_rps'], old.get('throughput_rps'))}"]
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            value = result[key]
+            cells.append("-" if value is None else f"{value:.1f}ms{change(value, old.get(key))}")
+        print(f"{scenario:<9} {cells[0]:>16} {cells[1]:>18} {cells[2]:>18} {cells[3]:>18} {result['errors']:>7}")
+
+
+async def run(args: argparse.Namespace, url: str, targets: List[Tuple[str, str]]) -> Dict[str, dict]:
+    results = {}
+    for scenario in args.scenarios:
+        print(f"Running {scenario} for {args.duration:g}s with {args.concurrency} workers", file=sys.stderr)
+        results[scenario] = await run_scenario(scenario, url, targets, args)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="Benchmark a running server instead of starting one")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Comma-separated subset of {','.join(SCENARIOS)}")
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before each scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="Write results as JSON here")
+    parser.add_argument("--compare", type=Path, help="JSON results of an earlier run to compare with")
+    args = parser.parse_args()
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(sorted(unknown))}")
+    baseline = json.loads(args.compare.read_text())["results"] if args.compare else None
+
+    targets, rows = load_targets()
+    if not targets:
+        print("No public artworks to request; seed the database first", file=sys.stderr)
+        return 1
+
+    server, url = (None, args.url) if args.url else start_server()
+    try:
+        run_info = describe_run(args, url, rows)
+        results = asyncio.run(run(args, url, targets))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print_results(results, baseline)
+    if args.output:
+        args.output.write_text(json.dumps({**run_info, "results": results}, indent=2) + "\n")
+        print(f"Wrote {args.output}", file=sys.stderr)
+    return 1 if any(result["errors"] for result in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
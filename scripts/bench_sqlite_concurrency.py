@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""Benchmark SQLite read throughput while sparks and comments are being written.
+
+Builds a scratch database with the ArtForge schema, then runs reader
+threads issuing the browse-page query while writer threads insert sparks
+and comments (each bumping the denormalized counter, as the app does).
+It runs once with SQLite's defaults (rollback journal) and once with the
+production profile from `database.apply_sqlite_pragmas`, and prints
+reads/s, writes/s and read latency for both.
+
+Usage:
+    python scripts/bench_sqlite_concurrency.py [--seconds 5] [--readers 8] [--writers 2]
+"""
+
+import argparse
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+from sqlalchemy import create_engine
+from art_forge.database import Base, apply_sqlite_pragmas
+import art_forge.models  # noqa: F401  (registers the tables)
+
+BROWSE_QUERY = """
+    SELECT artworks.id, artworks.title, artworks.spark_count, artworks.comment_count, users.username
+    FROM artworks JOIN users ON users.id = artworks.artist_id
+    WHERE artworks.is_public = 1
+    ORDER BY artworks.created_at DESC, artworks.id DESC
+    LIMIT 24
+"""
+
+
+def build_database(path: Path, artworks: int) -> None:
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+    conn = sqlite3.connect(path)
+    conn.execute("INSERT INTO users (id, username, is_active, is_admin) VALUES (1, 'bench', 1, 0)")
+    conn.executemany(
+        "INSERT INTO artworks (id, title, slug, artist_id, is_public, allow_comments, spark_count, comment_count,"
+        " created_at) VALUES (?, ?, ?, 1, 1, 1, 0, 0, datetime('now', ?))",
+        [(i, f"Piece {i}", f"piece-{i}", f"-{i} seconds") for i in range(1, artworks + 1)],
+    )
+    conn.commit()
+    conn.close()
+
+
+def connect(path: Path, tuned: bool, read_only: bool = False) -> sqlite3.Connection:
+    # Same driver defaults the app's engines use (5s busy wait, cross-thread use)
+    conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False)
+    if tuned:
+        apply_sqlite_pragmas(conn, read_only=read_only)
+    else:
+        conn.execute("PRAGMA journal_mode = DELETE")
+    return conn
+
+
+def run(path: Path, tuned: bool, seconds: float, readers: int, writers: int, artworks: int) -> dict:
+    stop = threading.Event()
+    read_latencies = [[] for _ in range(readers)]
+    write_counts = [0] * writers
+    errors = []
+
+    def reader(slot: int) -> None:
+        conn = connect(path, tuned, read_only=True)
+        latencies = read_latencies[slot]
+        while not stop.is_set():
+            started = time.perf_counter()
+            try:
+                conn.execute(BROWSE_QUERY).fetchall()
+            except sqlite3.OperationalError as exc:
+                errors.append(str(exc))
+                continue
+            latencies.append(time.perf_counter() - started)
+        conn.close()
+
+    def writer(slot: int) -> None:
+        conn = connect(path, tuned)
+        rng = random.Random(slot)
+        while not stop.is_set():
+            artwork_id = rng.randint(1, artworks)
+            try:
+                with conn:
+                    if rng.random() < 0.7:
+                        conn.execute(
+                            "INSERT INTO sparks (artwork_id, session_id, created_at) VALUES (?, ?, CURRENT_TIMESTAMP)",
+                            (artwork_id, f"bench-{slot}-{write_counts[slot]}"),
+                        )
+                        conn.execute("UPDATE artworks SET spark_count = spark_count + 1 WHERE id = ?", (artwork_id,))
+                    else:
+                        conn.execute(
+                            "INSERT INTO comments (artwork_id, author_name, content, created_at)"
+                            " VALUES (?, 'bench', 'Lovely work', CURRENT_TIMESTAMP)",
+                            (artwork_id,),
+                        )
+                        conn.execute("UPDATE artworks SET comment_count = comment_count + 1 WHERE id = ?", (artwork_id,))
+            except sqlite3.OperationalError as exc:
+                errors.append(str(exc))
+                continue
+            write_counts[slot] += 1
+        conn.close()
+
+    # Set the journal mode before the clock starts
+    connect(path, tuned).close()
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    latencies = sorted(value for slot in read_latencies for value in slot)
+    return {
+        "reads_per_s": len(latencies) / seconds,
+        "writes_per_s": sum(write_counts) / seconds,
+        "read_p50_ms": statistics.median(latencies) * 1000 if latencies else float("nan"),
+        "read_p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else float("nan"),
+        "errors": len(errors),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--artworks", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers, {args.writers} writers, {args.seconds:g}s per profile")
+    print(f"{'profile':<10} {'reads/s':>10} {'writes/s':>10} {'read p50':>10} {'read p99':>10} {'errors':>7}")
+    for name, tuned in (("default", False), ("tuned", True)):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "bench.db"
+            build_database(path, args.artworks)
+            result = run(path, tuned, args.seconds, args.readers, args.writers, args.artworks)
+        print(
+            f"{name:<10} {result['reads_per_s']:>10.0f} {result['writes_per_s']:>10.0f}"
+            f" {result['read_p50_ms']:>8.2f}ms {result['read_p99_ms']:>8.2f}ms {result['errors']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
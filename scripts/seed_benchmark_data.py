@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""Seed the configured database with synthetic ArtForge data for benchmarks.
+
+Fills an empty database (DATABASE_URL, migrated to head first) with
+users, artworks, images, derivatives, tags, series, sparks and comments
+at a chosen scale. Rows are written with ORM bulk inserts through the
+app's models in batches. Every image points at one of a few real sample
+files, stored and processed the way an upload is, so pages render real
+srcsets. Afterwards the same maintenance code the CLI runs fills in the
+derived data: tag counts, the search index, blob references and trending
+scores.
+
+Row counts scale with --artworks:
+    users        artworks / 10 (at least 10), each with the password "benchmark"
+    images       1-4 per artwork (about 1.6 on average), 3 derivatives each
+    sparks       --sparks per artwork on average, long-tailed, by distinct users
+    comments     --comments per artwork on average, long-tailed
+    tags         up to 3 per artwork from a pool of 500, a few used far more than the rest
+    series       1 in 20 artworks belongs to one of artworks / 200 series
+
+Uploads are spread over the last --days days in id order, and sparks and
+comments lean towards the recent past, so trending has something to rank.
+The same --seed always produces the same data.
+
+Usage:
+    python scripts/seed_benchmark_data.py --scale 10k|100k|1m
+    python scripts/seed_benchmark_data.py --artworks 25000 [--sparks 5] [--comments 2] [--seed 1]
+"""
+
+import argparse
+import hashlib
+import io
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+SCALES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+PASSWORD = "benchmark"
+BATCH = 2000
+SAMPLE_IMAGES = 12
+TAG_POOL = 500
+WORDS = (
+    "amber ash aurora bloom brass cedar cinder cloud coral dawn delta drift dune ember fern field flint fog"
+    " frost glade glass grove harbor haze heron iris ivy jade lagoon lantern linen lotus marble meadow mist"
+    " moss moth night oak ochre onyx orchid pearl pine plume quartz rain reed river rust sage salt sand shade"
+    " shore silk sky slate smoke snow sparrow stone storm sun thistle tide timber umber vale velvet willow wind"
+).split()
+
+
+def build_sample_images(count: int, rng: random.Random) -> List[dict]:
+    """Store and process `count` distinct images; returns their processing results."""
+    from PIL import Image, ImageDraw
+    from art_forge.images import process_image
+    from art_forge.storage import get_content_store
+
+    content_store = get_content_store()
+    samples = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for index in range(count):
+            width, height = rng.choice([(1600, 1200), (1200, 1600), (1400, 1400), (1920, 1080)])
+            image = Image.new("RGB", (width, height), tuple(rng.randrange(256) for _ in range(3)))
+            draw = ImageDraw.Draw(image)
+            for _ in range(40):
+                x, y = rng.randrange(width), rng.randrange(height)
+                radius = rng.randrange(20, 300)
+                draw.ellipse((x - radius, y - radius, x + radius, y + radius),
+                             fill=tuple(rng.randrange(256) for _ in range(3)))
+            buf = io.BytesIO()
+            image.save(buf, "JPEG", quality=85)
+            data = buf.getvalue()
+
+            content_hash = hashlib.sha256(data).hexdigest()
+            key = content_store.key_for(content_hash, "jpg")
+            source = Path(tmp) / f"sample-{index}.jpg"
+            source.write_bytes(data)
+            content_store.backend.put(key, source)
+            result = process_image(key)
+            result.update(key=key, content_hash=content_hash)
+            samples.append(result)
+    return samples
+
+
+def long_tail(rng: random.Random, mean: float, cap: int) -> int:
+    """A count with the given mean where a few items get far more than most."""
+    return min(int(rng.expovariate(1 / mean)) if mean > 0 else 0, cap)
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed(db, args: argparse.Namespace) -> Dict[str, int]:
+    from sqlalchemy import insert, update
+    from art_forge.auth import get_password_hash
+    from art_forge.models.artwork import Artwork, ArtworkImage, ArtworkImageDerivative
+    from art_forge.models.blob import Blob
+    from art_forge.models.comment import Comment
+    from art_forge.models.series import ArtworkSeries, Series
+    from art_forge.models.spark import Spark
+    from art_forge.models.tag import Tag, artwork_tags
+    from art_forge.models.user import User
+
+    rng = random.Random(args.seed)
+    counts = {name: 0 for name in ("users", "artworks", "images", "derivatives", "sparks", "comments", "tags", "series")}
+    now = datetime.now(timezone.utc)
+    start = now - timedelta(days=args.days)
+    span = (now - start).total_seconds()
+
+    samples = build_sample_images(SAMPLE_IMAGES, rng)
+    db.execute(insert(Blob), [
+        {"content_hash": sample["content_hash"], "key": sample["key"], "size": sample["file_size"], "ref_count": 0}
+        for sample in samples
+    ])
+
+    # One bcrypt hash shared by every account keeps seeding fast
+    hashed = get_password_hash(PASSWORD)
+    users = max(10, args.artworks // 10)
+    for first in range(1, users + 1, BATCH):
+        db.execute(insert(User), [
+            {
+                "id": user_id,
+                "username": f"artist{user_id}",
+                "email": f"artist{user_id}@example.com",
+                "hashed_password": hashed,
+                "full_name": f"Artist {user_id}",
+                "is_active": True,
+                "is_admin": False,
+                "created_at": start,
+            }
+            for user_id in range(first, min(first + BATCH, users + 1))
+        ])
+    counts["users"] = users
+
+    tag_names = []
+    while len(tag_names) < TAG_POOL:
+        name = rng.choice(WORDS) if len(tag_names) < len(WORDS) else f"{rng.choice(WORDS)}-{rng.choice(WORDS)}"
+        if name not in tag_names:
+            tag_names.append(name)
+    db.execute(insert(Tag), [
+        {"id": index + 1, "name": name, "slug": name} for index, name in enumerate(tag_names)
+    ])
+    counts["tags"] = TAG_POOL
+    # Zipf-like popularity: the first tags in the pool are used the most
+    tag_weights = [1 / (rank + 1) for rank in range(TAG_POOL)]
+
+    series_total = max(1, args.artworks // 200)
+    db.execute(insert(Series), [
+        {"id": series_id, "name": f"Series {series_id}", "slug": f"series-{series_id}",
+         "description": sentence(rng, 8)}
+        for series_id in range(1, series_total + 1)
+    ])
+    counts["series"] = series_total
+    series_positions = [0] * (series_total + 1)
+
+    image_id = derivative_id = 0
+    sample_uses = [0] * len(samples)
+    started = time.perf_counter()
+    for first in range(1, args.artworks + 1, BATCH):
+        artworks, images, derivatives, taggings, memberships, sparks, comments = [], [], [], [], [], [], []
+        for artwork_id in range(first, min(first + BATCH, args.artworks + 1)):
+            # Ids grow with upload time, as they do in the app
+            created = start + timedelta(seconds=span * artwork_id / (args.artworks + 1))
+            spark_total = long_tail(rng, args.sparks, users)
+            comment_total = long_tail(rng, args.comments, 200)
+            artworks.append({
+                "id": artwork_id,
+                "title": sentence(rng, rng.randint(1, 4)).title(),
+                "slug": f"piece-{artwork_id}",
+                "description": sentence(rng, rng.randint(5, 40)),
+                "artist_id": rng.randint(1, users),
+                "is_public": rng.random() < 0.95,
+                "allow_comments": True,
+                "spark_count": spark_total,
+                "comment_count": comment_total,
+                "created_at": created,
+            })
+
+            for order in range(rng.choices((1, 2, 3, 4), weights=(60, 25, 10, 5))[0]):
+                image_id += 1
+                index = rng.randrange(len(samples))
+                sample = samples[index]
+                sample_uses[index] += 1
+                images.append({
+                    "id": image_id,
+                    "artwork_id": artwork_id,
+                    "filename": sample["key"],
+                    "original_filename": f"piece-{artwork_id}-{order}.jpg",
+                    "order": order,
+                    "is_primary": order == 0,
+                    "width": sample["width"],
+                    "height": sample["height"],
+                    "file_size": sample["file_size"],
+                    "content_hash": sample["content_hash"],
+                    "format": sample["format"],
+                    "status": "ready",
+                    "created_at": created,
+                })
+                for spec in sample["derivatives"]:
+                    derivative_id += 1
+                    derivatives.append({"id": derivative_id, "image_id": image_id, **spec})
+
+            for tag_id in {rng.choices(range(1, TAG_POOL + 1), weights=tag_weights)[0]
+                           for _ in range(rng.randint(0, 3))}:
+                taggings.append({"artwork_id": artwork_id, "tag_id": tag_id})
+            if rng.random() < 0.05:
+                series_id = rng.randint(1, series_total)
+                series_positions[series_id] += 1
+                memberships.append({"artwork_id": artwork_id, "series_id": series_id,
+                                    "position": series_positions[series_id]})
+
+            age = (now - created).total_seconds()
+            for user_id in rng.sample(range(1, users + 1), spark_total):
+                # Squaring the fraction puts most engagement soon after upload
+                sparks.append({"artwork_id": artwork_id, "user_id": user_id,
+                               "created_at": created + timedelta(seconds=age * rng.random() ** 2)})
+            for _ in range(comment_total):
+                comments.append({"artwork_id": artwork_id, "author_id": rng.randint(1, users),
+                                 "content": sentence(rng, rng.randint(3, 30)),
+                                 "created_at": created + timedelta(seconds=age * rng.random() ** 2)})
+
+        db.execute(insert(Artwork), artworks)
+        db.execute(insert(ArtworkImage), images)
+        db.execute(insert(ArtworkImageDerivative), derivatives)
+        for table, rows in ((artwork_tags, taggings), (ArtworkSeries, memberships),
+                            (Spark, sparks), (Comment, comments)):
+            if rows:
+                db.execute(insert(table), rows)
+        db.commit()
+
+        counts["artworks"] += len(artworks)
+        counts["images"] += len(images)
+        counts["derivatives"] += len(derivatives)
+        counts["sparks"] += len(sparks)
+        counts["comments"] += len(comments)
+        rate = counts["artworks"] / (time.perf_counter() - started)
+        print(f"  {counts['artworks']:>9} / {args.artworks} artworks ({rate:.0f}/s)", file=sys.stderr)
+
+    # Bulk inserts skip the ORM hooks that keep blob references current
+    blobs = Blob.__table__
+    for sample, uses in zip(samples, sample_uses):
+        db.execute(update(blobs).where(blobs.c.content_hash == sample["content_hash"]).values(ref_count=uses))
+    db.commit()
+    return counts
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    size = parser.add_mutually_exclusive_group(required=True)
+    size.add_argument("--scale", choices=sorted(SCALES, key=SCALES.get), help="Preset artwork count")
+    size.add_argument("--artworks", type=int, help="Number of artworks")
+    parser.add_argument("--sparks", type=float, default=5.0, help="Average sparks per artwork")
+    parser.add_argument("--comments", type=float, default=2.0, help="Average comments per artwork")
+    parser.add_argument("--days", type=int, default=365, help="Spread uploads over this many days")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    if args.scale:
+        args.artworks = SCALES[args.scale]
+
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(REPO_ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(REPO_ROOT / "alembic"))
+    command.upgrade(config, "head")
+
+    from sqlalchemy import func, select
+    from art_forge.config import settings
+    from art_forge.database import SessionLocal
+    from art_forge.models.artwork import Artwork
+    from art_forge.models.counters import reconcile_tag_counts
+    from art_forge.search import reindex_all
+    from art_forge.trending import queue_all, rescore_queued
+
+    db = SessionLocal()
+    try:
+        if db.scalar(select(func.count(Artwork.id))):
+            print("The database already has artworks; seed an empty one", file=sys.stderr)
+            return 1
+
+        started = time.perf_counter()
+        print(f"Seeding {args.artworks} artworks into {settings.database_url}", file=sys.stderr)
+        counts = seed(db, args)
+        print("Counting tag usage, indexing search and scoring trending", file=sys.stderr)
+        reconcile_tag_counts(db)
+        reindex_all(db.connection())
+        db.commit()
+        queue_all(db)
+        db.commit()
+        while rescore_queued(db, settings.trending_batch_size):
+            db.commit()
+        db.commit()
+    finally:
+        db.close()
+
+    print(f"Seeded in {time.perf_counter() - started:.1f}s: "
+          + ", ".join(f"{count} {name}" for name, count in counts.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,15 +1,8 @@
 #!/usr/bin/env python3
-"""Run the ArtForge server."""
+"""Run the ArtForge server (same as the `artforge-server` command)."""
 
-import uvicorn
-from art_forge.config import settings
+import sys
+from art_forge.server import main
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "art_forge.main:app",
-        host=settings.host,
-        port=settings.port,
-        reload=False,
-        log_level="info"
-    )
-
+    sys.exit(main())
@@ -1,4 +1,4 @@
 """ArtForge - A platform for artists to showcase and share their artwork."""
 
-__version__ = "0.1.0"
+__version__ = "0.1.5"
 
@@ -0,0 +1,102 @@
+"""Loader for everything the artwork detail page renders.
+
+The page needs the artwork with its artist, images (each with its
+derivatives), tags, series, comments with their authors, and whether
+the visitor has sparked it. `load_artwork_detail` fetches all of that in
+five queries regardless of how many images, tags or comments there are:
+
+1. the artwork joined to its artist, with an EXISTS subquery for the
+   visitor's spark;
+2. the images with their derivatives (selectin + joined);
+3. the tags (selectin);
+4. the series entries with their series (selectin + joined);
+5. the first page of comments, newest first, joined to their authors
+   (later pages come from `load_comment_page` via the comments endpoint).
+
+Templates then touch only loaded attributes, so no lazy loads follow.
+"""
+
+from typing import List, NamedTuple, Optional, Tuple
+from sqlalchemy import exists, false, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
+from .config import settings
+from .models.artwork import Artwork, ArtworkImage
+from .models.comment import Comment
+from .models.series import ArtworkSeries
+from .models.spark import Spark
+from .models.user import User
+from .pagination import paginate_desc
+from .spark_buffer import spark_buffer
+
+
+class ArtworkDetail(NamedTuple):
+    """An artwork with everything its detail page shows."""
+
+    artwork: Artwork
+    spark_count: int
+    user_has_sparked: bool
+    comments: List[Comment]
+    comments_cursor: Optional[str]
+
+
+async def load_comment_page(
+    db: AsyncSession, artwork_id: int, cursor: Optional[str], limit: int
+) -> Tuple[List[Comment], Optional[str]]:
+    """One page of an artwork's comments, newest first, with authors joined in.
+
+    Returns (comments, next_cursor); next_cursor is None on the last page.
+    """
+    stmt = (
+        select(Comment)
+        .where(Comment.artwork_id == artwork_id)
+        .options(joinedload(Comment.author))
+    )
+    comments, next_cursor = await paginate_desc(db, stmt, Comment.created_at, Comment.id, cursor, limit)
+    return list(comments), next_cursor
+
+
+async def load_artwork_detail(
+    db: AsyncSession,
+    username: str,
+    slug: str,
+    user_id: Optional[int] = None,
+    session_id: Optional[str] = None,
+) -> Optional[ArtworkDetail]:
+    """Load an artwork page's data, or None if the artist/slug doesn't exist.
+
+    The visitor is `user_id` when logged in, else the anonymous `session_id`.
+    Spark count and state include toggles still in the spark buffer.
+    """
+    if user_id is not None:
+        has_sparked = exists().where(Spark.artwork_id == Artwork.id, Spark.user_id == user_id)
+    elif session_id:
+        has_sparked = exists().where(Spark.artwork_id == Artwork.id, Spark.session_id == session_id)
+    else:
+        has_sparked = false()
+
+    row = (await db.execute(
+        select(Artwork, has_sparked.label("user_has_sparked"))
+        .join(Artwork.artist)
+        .where(User.username == username, Artwork.slug == slug)
+        .options(
+            contains_eager(Artwork.artist),
+            selectinload(Artwork.images).joinedload(ArtworkImage.derivatives),
+            selectinload(Artwork.tags),
+            selectinload(Artwork.series_associations).joinedload(ArtworkSeries.series),
+        )
+    )).unique().first()
+    if row is None:
+        return None
+    artwork, stored_sparked = row
+
+    comments, comments_cursor = await load_comment_page(db, artwork.id, None, settings.comments_page_size)
+
+    buffered = spark_buffer.sparked(artwork.id, user_id, None if user_id is not None else session_id)
+    return ArtworkDetail(
+        artwork=artwork,
+        spark_count=spark_buffer.count(artwork.id, artwork.spark_count),
+        user_has_sparked=bool(stored_sparked) if buffered is None else buffered,
+        comments=comments,
+        comments_cursor=comments_cursor,
+    )
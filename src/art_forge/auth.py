@@ -1,13 +1,20 @@
 """Authentication utilities."""
 
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
+from typing import Dict, Optional, Set, Tuple
 import bcrypt
 from fastapi import Request, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
 from .config import settings
-from .database import get_db
+from .database import AsyncSessionLocal, get_async_read_db
 from .models.user import User
 
 
@@ -23,13 +30,43 @@ def get_password_hash(password: str) -> str:
     """Hash a password."""
     # Truncate password to 72 bytes for bcrypt compatibility
     password_bytes = password.encode('utf-8')[:72]
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.bcrypt_rounds)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if a hash was made with a cost factor other than `settings.bcrypt_rounds`."""
+    # bcrypt hashes look like $2b$12$<salt+hash>
+    parts = hashed_password.split('$')
+    return len(parts) < 4 or not parts[2].isdigit() or int(parts[2]) != settings.bcrypt_rounds
+
+
+# bcrypt takes ~250ms of CPU at the default cost and releases the GIL, so
+# hashing runs on a small dedicated pool instead of the event loop. Its size
+# caps how many cores password checks can take at once.
+_hash_executor = ThreadPoolExecutor(
+    max_workers=max(1, settings.password_hash_workers), thread_name_prefix="password-hash"
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """`verify_password` on the hashing pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """`get_password_hash` on the hashing pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_hash_executor, get_password_hash, password)
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create a JWT access token."""
+    # python-jose pulls in its crypto backends; only load it once a token is needed
+    from jose import jwt
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -42,6 +79,8 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 def decode_access_token(token: str) -> Optional[dict]:
     """Decode a JWT access token."""
+    from jose import JWTError, jwt
+
     try:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         return payload
@@ -49,30 +88,152 @@ def decode_access_token(token: str) -> Optional[dict]:
         return None
 
 
-def get_current_user_from_cookie(request: Request, db: Session) -> Optional[User]:
-    """Get the current user from the session cookie."""
-    token = request.cookies.get("access_token")
-    if not token:
-        return None
-    
+class TokenUserCache:
+    """Short-lived, size-bounded cache of access token -> user.
+
+    Holds detached snapshots of User rows so a request with a known token
+    needs neither a JWT decode nor a users query. Entries expire after
+    `ttl` seconds or when the token does, whichever is first, and are
+    dropped on logout and whenever the user row is updated or deleted.
+    """
+
+    def __init__(self, max_entries: int, ttl: int):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+        self._tokens_by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[User]:
+        """The cached user snapshot for `token`, if still fresh."""
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is None:
+                return None
+            if entry[0] <= time.time():
+                self._pop(token)
+                return None
+            self._entries.move_to_end(token)
+            return entry[1]
+
+    def put(self, token: str, user: User, token_expires: Optional[float] = None) -> None:
+        """Remember a detached copy of `user` for `token`."""
+        if self.max_entries <= 0:
+            return
+        expires = time.time() + self.ttl
+        if token_expires is not None:
+            expires = min(expires, token_expires)
+        # Copy the loaded columns; the original stays bound to its session
+        snapshot = User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+        make_transient_to_detached(snapshot)
+        with self._lock:
+            self._pop(token)
+            self._entries[token] = (expires, snapshot)
+            self._tokens_by_user.setdefault(snapshot.id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._pop(next(iter(self._entries)))
+
+    def discard(self, token: Optional[str]) -> None:
+        """Forget a token (on logout)."""
+        if token:
+            with self._lock:
+                self._pop(token)
+
+    def discard_user(self, user_id: int) -> None:
+        """Forget every token for a user whose row changed."""
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._pop(token)
+
+    def _pop(self, token: str) -> None:
+        entry = self._entries.pop(token, None)
+        if entry is not None:
+            tokens = self._tokens_by_user.get(entry[1].id)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._tokens_by_user[entry[1].id]
+
+
+_UNRESOLVED = object()
+
+user_cache = TokenUserCache(settings.auth_cache_max_entries, settings.auth_cache_ttl)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _evict_changed_user(mapper, connection, target):
+    user_cache.discard_user(target.id)
+
+
+async def _load_user(token: str, db: AsyncSession) -> Optional[User]:
+    cached = user_cache.get(token)
+    if cached is not None:
+        # Attach a copy to this request's session without querying
+        return await db.merge(cached, load=False)
+
     payload = decode_access_token(token)
     if not payload:
         return None
-    
+
     username = payload.get("sub")
     if not username:
         return None
-    
-    user = db.query(User).filter(User.username == username).first()
+
+    user = await db.scalar(select(User).where(User.username == username))
+    if user is not None:
+        user_cache.put(token, user, payload.get("exp"))
     return user
 
 
-def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
-    """Authenticate a user by username and password."""
-    user = db.query(User).filter(User.username == username).first()
+async def get_current_user_from_cookie(request: Request, db: AsyncSession) -> Optional[User]:
+    """Get the current user from the session cookie.
+
+    Resolved at most once per request; repeated calls return the same user.
+    """
+    user = getattr(request.state, "current_user", _UNRESOLVED)
+    if user is not _UNRESOLVED:
+        return user
+
+    token = request.cookies.get("access_token")
+    user = await _load_user(token, db) if token else None
+    request.state.current_user = user
+    return user
+
+
+async def get_current_user(request: Request, db: AsyncSession = Depends(get_async_read_db)) -> Optional[User]:
+    """FastAPI dependency for the logged-in user, or None for anonymous requests."""
+    return await get_current_user_from_cookie(request, db)
+
+
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
+    """Authenticate a user by username and password.
+
+    A correct password stored with an outdated cost factor is rehashed
+    with the current one and saved.
+    """
+    user = await db.scalar(select(User).where(User.username == username))
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
+    if password_needs_rehash(user.hashed_password):
+        await _rehash_password(user, password)
     return user
 
+
+async def _rehash_password(user: User, password: str) -> None:
+    old_hash = user.hashed_password
+    new_hash = await get_password_hash_async(password)
+    # `user` may come from the read-only session; write on a short-lived one.
+    # Matching the old hash skips the write if another login got there first.
+    async with AsyncSessionLocal() as session:
+        await session.execute(
+            update(User)
+            .where(User.id == user.id, User.hashed_password == old_hash)
+            .values(hashed_password=new_hash)
+        )
+        await session.commit()
+    # Reflect the saved value without making the read session's copy dirty
+    set_committed_value(user, "hashed_password", new_hash)
+    user_cache.discard_user(user.id)
@@ -0,0 +1,250 @@
+"""Maintenance commands for ArtForge.
+
+Usage:
+    artforge reconcile-counters
+    artforge backfill-derivatives [--force]
+    artforge migrate-storage
+    artforge clear-page-cache
+    artforge reindex-search
+    artforge update-trending [--all]
+
+Commands that change what pages show also clear the page cache. That
+reaches running app processes only through the shared Redis tier; the
+in-process tier catches up within PAGE_CACHE_TTL.
+"""
+
+import argparse
+import sys
+from typing import List, Optional
+from .config import settings
+from .database import SessionLocal
+from .page_cache import page_cache
+
+
+def reconcile_counters_command(args: argparse.Namespace) -> int:
+    """Repair drift in the denormalized spark/comment and tag counters."""
+    from .models.counters import reconcile_counters, reconcile_tag_counts
+
+    db = SessionLocal()
+    try:
+        fixed = reconcile_counters(db)
+        fixed_tags = reconcile_tag_counts(db)
+    finally:
+        db.close()
+    if fixed or fixed_tags:
+        page_cache.clear()
+    print(f"Reconciled counters on {fixed} artwork(s) and {fixed_tags} tag(s)")
+    return 0
+
+
+def backfill_derivatives_command(args: argparse.Namespace) -> int:
+    """Generate responsive derivatives for images uploaded before they existed."""
+    from sqlalchemy.orm import selectinload
+    from .images import apply_processing_result, process_image
+    from .models.artwork import ArtworkImage
+    from .storage import get_content_store
+
+    content_store = get_content_store()
+    db = SessionLocal()
+    generated = skipped = failed = 0
+    try:
+        images = db.query(ArtworkImage).options(
+            selectinload(ArtworkImage.derivatives)
+        ).order_by(ArtworkImage.id).all()
+        for image in images:
+            if image.derivatives and not args.force:
+                skipped += 1
+                continue
+            if not content_store.backend.exists(image.filename):
+                print(f"Missing file for image {image.id}: {image.filename}", file=sys.stderr)
+                failed += 1
+                continue
+            try:
+                apply_processing_result(image, process_image(image.filename))
+            except OSError as exc:
+                print(f"Could not process image {image.id}: {exc}", file=sys.stderr)
+                failed += 1
+                continue
+            # Commit per image so an interrupted run keeps its progress
+            db.commit()
+            generated += 1
+    finally:
+        db.close()
+    if generated:
+        page_cache.clear()
+
+    print(f"Generated derivatives for {generated} image(s), skipped {skipped}, failed {failed}")
+    return 1 if failed else 0
+
+
+def migrate_storage_command(args: argparse.Namespace) -> int:
+    """Move flat-named local uploads into content-addressed storage.
+
+    Works for any configured backend, so it also uploads local files to S3.
+    """
+    import hashlib
+    from pathlib import Path
+    from sqlalchemy.orm import selectinload
+    from .config import settings
+    from .images import derivative_filename
+    from .models.artwork import ArtworkImage
+    from .models.blob import acquire_blob
+    from .storage import get_content_store
+    from .uploads import IMAGE_TYPE_EXTENSIONS, sniff_image_type
+
+    upload_dir = Path(settings.upload_dir)
+    content_store = get_content_store()
+    backend = content_store.backend
+    db = SessionLocal()
+    moved = deduplicated = failed = 0
+    try:
+        images = db.query(ArtworkImage).options(
+            selectinload(ArtworkImage.derivatives)
+        ).order_by(ArtworkImage.id).all()
+        for image in images:
+            if content_store.is_content_key(image.filename):
+                continue
+            source = upload_dir / image.filename
+            if not source.exists():
+                print(f"Missing file for image {image.id}: {image.filename}", file=sys.stderr)
+                failed += 1
+                continue
+
+            digest = hashlib.sha256()
+            with open(source, "rb") as f:
+                head = f.read(16)
+                f.seek(0)
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+            content_hash = digest.hexdigest()
+            image_type = sniff_image_type(head)
+            ext = IMAGE_TYPE_EXTENSIONS[image_type] if image_type else image.filename.rsplit('.', 1)[-1].lower()
+            size = source.stat().st_size
+
+            key = content_store.key_for(content_hash, ext)
+            if backend.exists(key):
+                source.unlink()
+                deduplicated += 1
+            else:
+                backend.put(key, source)
+
+            for derivative in image.derivatives:
+                new_name = derivative_filename(key, derivative.kind)
+                old_path = upload_dir / derivative.filename
+                if backend.exists(new_name):
+                    old_path.unlink(missing_ok=True)
+                elif old_path.exists():
+                    backend.put(new_name, old_path)
+                derivative.filename = new_name
+
+            image.filename = key
+            image.content_hash = content_hash
+            acquire_blob(db.connection(), content_hash, key, size)
+            # Commit per image so an interrupted run keeps its progress
+            db.commit()
+            moved += 1
+    finally:
+        db.close()
+    if moved:
+        page_cache.clear()
+
+    print(f"Moved {moved} image(s) into content-addressed storage ({deduplicated} duplicate(s)), failed {failed}")
+    return 1 if failed else 0
+
+
+def clear_page_cache_command(args: argparse.Namespace) -> int:
+    """Invalidate every cached anonymous page."""
+    page_cache.clear()
+    print("Cleared the page cache")
+    return 0
+
+
+def reindex_search_command(args: argparse.Namespace) -> int:
+    """Rebuild the full-text search index from the artwork tables."""
+    from .search import reindex_all
+
+    db = SessionLocal()
+    try:
+        indexed = reindex_all(db.connection())
+        db.commit()
+    finally:
+        db.close()
+    page_cache.clear()
+    print(f"Indexed {indexed} artwork(s) for search")
+    return 0
+
+
+def update_trending_command(args: argparse.Namespace) -> int:
+    """Rescore queued artworks for the trending feed (all of them with --all)."""
+    from .page_cache import TRENDING_TAG
+    from .trending import drain_queue, queue_all
+
+    if args.all:
+        db = SessionLocal()
+        try:
+            queue_all(db)
+            db.commit()
+        finally:
+            db.close()
+    rescored = drain_queue(settings.trending_batch_size)
+    if rescored:
+        page_cache.invalidate(TRENDING_TAG)
+    print(f"Rescored {rescored} artwork(s) for trending")
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the top-level argument parser."""
+    parser = argparse.ArgumentParser(prog="artforge", description="ArtForge maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    reconcile = subparsers.add_parser(
+        "reconcile-counters",
+        help="Recompute Artwork.spark_count/comment_count and Tag.artwork_count from the source tables",
+    )
+    reconcile.set_defaults(func=reconcile_counters_command)
+
+    backfill = subparsers.add_parser(
+        "backfill-derivatives",
+        help="Generate thumb/detail/full renditions for existing uploads",
+    )
+    backfill.add_argument("--force", action="store_true", help="Regenerate images that already have derivatives")
+    backfill.set_defaults(func=backfill_derivatives_command)
+
+    migrate = subparsers.add_parser(
+        "migrate-storage",
+        help="Move flat-named uploads into sharded, deduplicated storage",
+    )
+    migrate.set_defaults(func=migrate_storage_command)
+
+    clear_cache = subparsers.add_parser(
+        "clear-page-cache",
+        help="Invalidate cached anonymous gallery/artwork/browse pages",
+    )
+    clear_cache.set_defaults(func=clear_page_cache_command)
+
+    reindex = subparsers.add_parser(
+        "reindex-search",
+        help="Rebuild the full-text search index over artworks, tags, series and artists",
+    )
+    reindex.set_defaults(func=reindex_search_command)
+
+    trending = subparsers.add_parser(
+        "update-trending",
+        help="Rescore artworks whose sparks or comments changed since the last run",
+    )
+    trending.add_argument("--all", action="store_true", help="Rescore every artwork, e.g. after changing weights")
+    trending.set_defaults(func=update_trending_command)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point for the `artforge` console script."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
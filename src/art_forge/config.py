@@ -1,7 +1,14 @@
 """Configuration settings for ArtForge."""
 
+import os
 from pydantic_settings import BaseSettings
 from pathlib import Path
+from typing import Optional
+
+
+def _user_cache_dir() -> Path:
+    """The per-user cache directory ($XDG_CACHE_HOME, else ~/.cache)."""
+    return Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
 
 
 class Settings(BaseSettings):
@@ -9,16 +16,48 @@ class Settings(BaseSettings):
     
     # Database
     database_url: str = "sqlite:///./art_forge.db"
+    async_database_url: Optional[str] = None  # Defaults to database_url with an async driver
+    db_pool_size: int = 5  # With SQLite this sizes the read pool; writes use one connection
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30.0  # Seconds to wait for a pooled connection
+    db_pool_recycle: int = 1800  # Seconds before a pooled connection is replaced
+    
+    # SQLite tuning (WAL, synchronous=NORMAL, ...; see database.apply_sqlite_pragmas)
+    sqlite_tuning: bool = True
+    sqlite_busy_timeout_ms: int = 5000  # How long a writer waits for another process's write lock
+    sqlite_mmap_size: int = 268435456  # 256MB of the file memory-mapped
+    sqlite_cache_size_kb: int = 65536  # Page cache per connection
     
     # Security
     secret_key: str = "your-secret-key-here-change-in-production"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    auth_cache_ttl: int = 60  # Seconds a token -> user lookup is reused
+    auth_cache_max_entries: int = 1024  # 0 disables the cache
+    bcrypt_rounds: int = 12  # Cost factor; existing hashes are upgraded on next login
+    password_hash_workers: int = 2  # Threads for bcrypt, off the event loop
+    login_ip_burst: int = 10  # Login attempts per client IP before throttling; 0 disables
+    login_ip_per_minute: float = 10.0  # Refill rate of the per-IP bucket
+    login_user_burst: int = 5  # Failed logins per username before throttling; 0 disables
+    login_user_per_minute: float = 2.0  # Refill rate of the per-username bucket
     
     # Server
     host: str = "0.0.0.0"
     port: int = 8003
     
+    # Server processes (`artforge-server`, see server.py)
+    server_workers: int = 1  # App processes sharing the port
+    server_loop: str = "auto"  # uvloop when installed, else asyncio
+    server_http: str = "auto"  # httptools when installed, else h11
+    server_backlog: int = 2048  # Connections queued while workers are busy or restarting
+    server_keepalive_timeout: int = 5  # Seconds an idle keep-alive connection stays open
+    server_graceful_timeout: float = 30.0  # Seconds in-flight requests get on shutdown or reload
+    server_max_requests: int = 0  # Recycle a worker after this many requests; 0 never
+    server_max_requests_jitter: int = 0  # Up to this many more per worker, so recycles spread out
+    server_access_log: bool = True
+    server_log_level: str = "info"
+    server_forwarded_allow_ips: str = "127.0.0.1"  # Proxies trusted for X-Forwarded-For/-Proto (also by the login limiter)
+    
     # Application
     app_name: str = "ArtForge"
     app_url: str = "https://forge-freedom.com/art"
@@ -26,7 +65,60 @@ class Settings(BaseSettings):
     # Upload Settings
     upload_dir: str = "data/uploads"
     max_file_size: int = 10485760  # 10MB
+    upload_chunk_size: int = 262144  # 256KB per streamed write
     allowed_extensions: str = "jpg,jpeg,png,gif,webp"
+    derivative_quality: int = 82  # WebP quality for thumb/detail/full renditions
+    
+    # Storage
+    storage_backend: str = "local"  # "local" or "s3"
+    storage_serve_mode: str = "direct"  # "direct" (backend URLs in pages) or "redirect" (via /art/media)
+    s3_bucket: str = "art-forge"
+    s3_endpoint_url: Optional[str] = None  # e.g. http://127.0.0.1:9000 for MinIO
+    s3_region: str = "us-east-1"
+    s3_access_key_id: Optional[str] = None
+    s3_secret_access_key: Optional[str] = None
+    s3_public_url: Optional[str] = None  # Public bucket/CDN base URL; unset = presigned URLs
+    s3_presign_expiry: int = 3600
+    uploads_accel_redirect: Optional[str] = None  # nginx internal location, e.g. /_art_uploads/
+    
+    # Image processing worker pool
+    image_workers: int = 2  # Processes per app worker; 0 disables background processing
+    image_job_poll_interval: float = 5.0  # Seconds between queue polls when idle
+    image_job_max_attempts: int = 3
+    image_job_stale_after: int = 600  # Seconds before a "running" job is assumed lost
+    
+    # Anonymous page cache
+    page_cache_max_entries: int = 512  # In-process LRU size; 0 disables it
+    page_cache_ttl: int = 300  # Seconds; a backstop, invalidation is explicit
+    page_cache_redis_url: Optional[str] = None  # e.g. redis://127.0.0.1:6379/0 to share across processes
+    
+    # Spark write-behind buffer
+    spark_flush_interval: float = 1.0  # Seconds between batched spark writes; 0 writes each toggle
+    spark_buffer_max_pending: int = 5000  # Flush early once this many visitors are waiting
+    
+    # Trending feed
+    trending_interval: float = 60.0  # Seconds between rescoring runs; 0 leaves it to `artforge update-trending`
+    trending_half_life_hours: float = 24.0  # A spark or comment counts half as much after this long
+    trending_spark_weight: float = 1.0
+    trending_comment_weight: float = 3.0
+    trending_batch_size: int = 500  # Queued changes applied per transaction
+    
+    # Templates
+    template_cache_dir: str = str(_user_cache_dir() / "art_forge" / "templates")  # Compiled template bytecode; empty compiles in memory only
+    
+    # Metrics
+    metrics_enabled: bool = True  # Serve /metrics and record request, query and template timings
+    
+    # Query audit (development and staging; see query_audit.py)
+    query_audit_enabled: bool = False  # Record every statement per request and log slow ones and N+1s
+    query_audit_slow_ms: float = 100.0  # Log statements slower than this
+    query_audit_repeat_threshold: int = 3  # Flag a statement run this often with different parameters
+    
+    # Pagination
+    browse_page_size: int = 24
+    browse_max_page_size: int = 96
+    comments_page_size: int = 20
+    comments_max_page_size: int = 100
     
     class Config:
         env_file = ".env"
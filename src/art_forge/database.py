@@ -1,22 +1,119 @@
 """Database configuration and session management."""
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, DateTime
+from sqlalchemy.dialects.sqlite import DATETIME as SQLiteDateTime
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
-# Create database engine
+# Async drivers for the sync URLs in DATABASE_URL
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: str) -> str:
+    """The async-driver form of a database URL (sqlite -> aiosqlite, postgresql -> asyncpg)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if parsed.get_driver_name() in ("aiosqlite", "asyncpg") or backend not in ASYNC_DRIVERS:
+        return url
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+IS_SQLITE = make_url(settings.database_url).get_backend_name() == "sqlite"
+
+
+def apply_sqlite_pragmas(dbapi_connection, read_only: bool = False) -> None:
+    """Apply the SQLite production profile to a new connection.
+
+    WAL lets readers run alongside a writer instead of queueing behind
+    it; synchronous=NORMAL is durable across application crashes in WAL
+    mode and only risks the last transactions on power loss.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)}")
+        if not read_only:
+            # Persistent in the database file; readers inherit it
+            cursor.execute("PRAGMA journal_mode = WAL")
+        cursor.execute("PRAGMA synchronous = NORMAL")
+        cursor.execute("PRAGMA foreign_keys = ON")
+        cursor.execute(f"PRAGMA mmap_size = {int(settings.sqlite_mmap_size)}")
+        # Negative cache_size is in KiB rather than pages
+        cursor.execute(f"PRAGMA cache_size = -{int(settings.sqlite_cache_size_kb)}")
+        cursor.execute("PRAGMA temp_store = MEMORY")
+        if read_only:
+            cursor.execute("PRAGMA query_only = ON")
+    finally:
+        cursor.close()
+
+
+def _tune_sqlite(engine_, read_only: bool = False) -> None:
+    if IS_SQLITE and settings.sqlite_tuning:
+        event.listen(engine_, "connect", lambda conn, _: apply_sqlite_pragmas(conn, read_only))
+
+
+# Create database engine (CLI, image worker, migrations)
 engine = create_engine(
     settings.database_url,
     connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
 )
+_tune_sqlite(engine)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engines for request handlers, so DB calls don't block the event loop
+ASYNC_URL = settings.async_database_url or async_database_url(settings.database_url)
+POOL_OPTIONS = {
+    "pool_timeout": settings.db_pool_timeout,
+    "pool_recycle": settings.db_pool_recycle,
+    "pool_pre_ping": True,
+}
+
+if IS_SQLITE:
+    # SQLite allows one writer at a time: queue this process's request
+    # writes on a single pooled connection and serve reads from a separate
+    # query_only pool, which WAL lets run while a write is in progress.
+    # That only orders writers within the process. Other server workers,
+    # the image worker processes and the CLI write through their own
+    # connections, and between them the only guarantee is SQLite's lock,
+    # with busy_timeout making a blocked writer wait instead of failing.
+    async_engine = create_async_engine(ASYNC_URL, pool_size=1, max_overflow=0, **POOL_OPTIONS)
+    async_read_engine = create_async_engine(
+        ASYNC_URL,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        **POOL_OPTIONS,
+    )
+    _tune_sqlite(async_engine.sync_engine)
+    _tune_sqlite(async_read_engine.sync_engine, read_only=True)
+else:
+    async_engine = create_async_engine(
+        ASYNC_URL,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        **POOL_OPTIONS,
+    )
+    async_read_engine = async_engine
+
+# Objects stay usable after commit; templates render them without lazy loads
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
 # Create base class for models
 Base = declarative_base()
 
+# SQLite stores server_default timestamps without fractional seconds. Bind
+# comparison values the same way so keyset cursors on created_at line up.
+KeysetDateTime = DateTime(timezone=True).with_variant(
+    SQLiteDateTime(truncate_microseconds=True), "sqlite"
+)
+
 
 def get_db():
     """Dependency for getting database session."""
@@ -26,3 +123,15 @@ def get_db():
     finally:
         db.close()
 
+
+async def get_async_db():
+    """Dependency for getting an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db():
+    """Dependency for an async session that only reads (served from the read pool)."""
+    async with AsyncReadSessionLocal() as db:
+        yield db
+
@@ -0,0 +1,160 @@
+"""Image processing for uploaded artwork images.
+
+`process_image` is a plain function over storage keys so it can run in a
+worker process (see worker.py); the other helpers apply its results to
+the ORM rows.
+"""
+
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+from sqlalchemy.orm import selectinload
+from .config import settings
+from .models.artwork import ArtworkImage, ArtworkImageDerivative
+
+# (kind, longest edge in px), largest first so each rendition is
+# downscaled from the previous one instead of from the full original
+DERIVATIVE_SIZES = (
+    ("full", 3200),
+    ("detail", 1600),
+    ("thumb", 480),
+)
+
+
+def derivative_filename(filename: str, kind: str) -> str:
+    """Name of the derivative file stored alongside the original."""
+    stem = filename.rsplit('.', 1)[0]
+    return f"{stem}_{kind}.webp"
+
+
+def generate_derivatives(source_path: Path, filename: str, dest_dir: Path) -> List[dict]:
+    """Write WebP derivatives of an image and describe each one.
+
+    Returns a list of dicts with kind, filename, width, height and file_size.
+    """
+    # Imported here so the web app, which only applies results, doesn't load Pillow
+    from PIL import Image, ImageOps
+
+    results = []
+    with Image.open(source_path) as original:
+        img = ImageOps.exif_transpose(original)
+        has_alpha = "A" in img.getbands() or "transparency" in img.info
+        img = img.convert("RGBA" if has_alpha else "RGB")
+
+        for kind, size in DERIVATIVE_SIZES:
+            img.thumbnail((size, size), Image.LANCZOS)
+            out_name = derivative_filename(filename, kind)
+            out_path = dest_dir / out_name
+            out_path.parent.mkdir(parents=True, exist_ok=True)
+            img.save(out_path, "WEBP", quality=settings.derivative_quality, method=4)
+            results.append({
+                "kind": kind,
+                "filename": out_name,
+                "width": img.width,
+                "height": img.height,
+                "file_size": out_path.stat().st_size,
+            })
+    return results
+
+
+def probe_image(source_path: Path) -> dict:
+    """Read dimensions and format of an image without decoding the pixels."""
+    from PIL import Image
+
+    with Image.open(source_path) as img:
+        width, height = img.size
+        # EXIF orientations 5-8 are rotated by 90 degrees when displayed
+        if img.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+            width, height = height, width
+        return {"width": width, "height": height, "format": img.format}
+
+
+def process_image(key: str) -> dict:
+    """Probe a stored image, generate its derivatives and store them.
+
+    Runs in the image worker pool; only takes and returns picklable values.
+    The result's "seconds" is how long the processing took.
+    """
+    from .storage import get_content_store
+
+    started = time.perf_counter()
+    content_store = get_content_store()
+    backend = content_store.backend
+    scratch = content_store.scratch_dir()
+    scratch.mkdir(parents=True, exist_ok=True)
+    with backend.local_copy(key, scratch) as source, tempfile.TemporaryDirectory(dir=scratch) as work_dir:
+        result = probe_image(source)
+        result["file_size"] = source.stat().st_size
+        result["derivatives"] = generate_derivatives(source, key, Path(work_dir))
+        for spec in result["derivatives"]:
+            backend.put(spec["filename"], Path(work_dir) / spec["filename"])
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+def apply_derivatives(image: ArtworkImage, specs: List[dict]) -> List[ArtworkImageDerivative]:
+    """Create or update an image's derivative rows from generated specs."""
+    # Update existing rows in place; replacing them would INSERT before the
+    # orphan DELETE and trip the (image_id, kind) unique constraint
+    existing = {d.kind: d for d in image.derivatives}
+    for spec in specs:
+        derivative = existing.get(spec["kind"])
+        if derivative is None:
+            derivative = ArtworkImageDerivative()
+            image.derivatives.append(derivative)
+        for key, value in spec.items():
+            setattr(derivative, key, value)
+    return image.derivatives
+
+
+def apply_processing_result(image: ArtworkImage, result: dict) -> None:
+    """Copy a process_image result onto its ArtworkImage and mark it ready."""
+    image.width = result["width"]
+    image.height = result["height"]
+    image.format = result["format"]
+    image.file_size = result["file_size"]
+    apply_derivatives(image, result["derivatives"])
+    image.status = "ready"
+
+
+def reuse_processed_images(db, images: List[ArtworkImage]) -> List[ArtworkImage]:
+    """Copy processing results from already-processed images with the same content.
+
+    Looks all of `images` up in one query. Returns the ones with nothing
+    to reuse, which need a job.
+    """
+    hashes = {image.content_hash for image in images if image.content_hash}
+    sources = {}
+    if hashes:
+        ready = db.query(ArtworkImage).options(selectinload(ArtworkImage.derivatives)).filter(
+            ArtworkImage.content_hash.in_(hashes),
+            ArtworkImage.status == "ready",
+        ).order_by(ArtworkImage.id)
+        for source in ready:
+            if source.derivatives:
+                sources.setdefault((source.content_hash, source.filename), source)
+
+    unprocessed = []
+    for image in images:
+        source = sources.get((image.content_hash, image.filename))
+        if source is None:
+            unprocessed.append(image)
+            continue
+        apply_processing_result(image, {
+            "width": source.width,
+            "height": source.height,
+            "format": source.format,
+            "file_size": source.file_size,
+            "derivatives": [
+                {
+                    "kind": d.kind,
+                    "filename": d.filename,
+                    "width": d.width,
+                    "height": d.height,
+                    "file_size": d.file_size,
+                }
+                for d in source.derivatives
+            ],
+        })
+    return unprocessed
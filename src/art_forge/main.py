@@ -1,44 +1,89 @@
 """Main FastAPI application."""
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Depends
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from pathlib import Path
-from sqlalchemy.orm import Session
+from typing import Optional
+from . import __version__
 from .config import settings
-from .database import engine, Base, get_db
-from .routes import auth, artworks, interactions
-from .auth import get_current_user_from_cookie
+from .database import async_engine, async_read_engine, engine
+from . import query_audit
+from .metrics import REGISTRY, Gauge, MetricsMiddleware, expose_stats, instrument_engine
+from .routes import auth, artworks, interactions, listings, media, search
+from .auth import get_current_user
+from .models.user import User
+from .page_cache import page_cache
+from .spark_buffer import spark_buffer
+from .templating import templates
+from .trending import trending_updater
+from .worker import image_worker
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background work when the server starts, not when this module is imported.
+
+    Shutdown runs in reverse dependency order: in-flight image jobs, then
+    buffered sparks and a running rescore, which all write to the database,
+    and only then the database pools.
+    """
+    # Uploads' scratch space on every backend (see storage/content.py)
+    Path(settings.upload_dir).mkdir(parents=True, exist_ok=True)
+    image_worker.start()
+    spark_buffer.start()
+    trending_updater.start()
+    try:
+        yield
+    finally:
+        image_worker.stop()
+        await spark_buffer.stop()
+        await trending_updater.stop()
+        await async_engine.dispose()
+        if async_read_engine is not async_engine:
+            await async_read_engine.dispose()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
 
 # Initialize FastAPI app
 app = FastAPI(
     title=settings.app_name,
     description="A platform for artists to showcase and share their artwork",
-    version="0.1.0"
+    version=__version__,
+    lifespan=lifespan,
 )
 
 # Setup paths
 BASE_DIR = Path(__file__).parent
 STATIC_DIR = BASE_DIR / "static"
-TEMPLATES_DIR = BASE_DIR / "templates"
-UPLOAD_DIR = Path(settings.upload_dir)
-
-# Ensure directories exist
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 # Mount static files under /art/ prefix to avoid conflicts with other apps
 app.mount("/art/static", StaticFiles(directory=str(STATIC_DIR)), name="static")
-app.mount("/art/uploads", StaticFiles(directory=str(UPLOAD_DIR)), name="uploads")
+# Uploads are served by routes/media.py with immutable caching headers
+
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+    instrument_engine(async_engine.sync_engine, "write")
+    if async_read_engine is not async_engine:
+        instrument_engine(async_read_engine.sync_engine, "read")
+    instrument_engine(engine, "sync")
+    expose_stats("page_cache", page_cache.stats)
+    expose_stats("spark_buffer", spark_buffer.stats)
+    expose_stats("trending", trending_updater.stats)
+    Gauge("artforge_build_info", "ArtForge version running.", ["version"]).labels(__version__).set(1)
 
-# Setup templates
-templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
+if settings.query_audit_enabled:
+    app.add_middleware(query_audit.QueryAuditMiddleware)
+    # Only the request engines: the sync engine serves the CLI and image jobs,
+    # which with IMAGE_WORKERS=0 run inline but are still background work
+    for audited in {async_engine.sync_engine, async_read_engine.sync_engine}:
+        query_audit.instrument_engine(audited)
 
 # Include routers
 app.include_router(auth.router, tags=["auth"])
+app.include_router(media.router, tags=["media"])
+app.include_router(search.router, tags=["search"])
+app.include_router(listings.router, tags=["listings"])
 app.include_router(artworks.router, tags=["artworks"])
 app.include_router(interactions.router, tags=["interactions"])
 
@@ -51,9 +96,8 @@ async def redirect_to_art():
 
 
 @app.get("/art/", response_class=HTMLResponse)
-async def home(request: Request, db: Session = Depends(get_db)):
+async def home(request: Request, current_user: Optional[User] = Depends(get_current_user)):
     """Home page - landing page for ArtForge."""
-    current_user = get_current_user_from_cookie(request, db)
     return templates.TemplateResponse(
         "index.html",
         {
@@ -67,5 +111,18 @@ async def home(request: Request, db: Session = Depends(get_db)):
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "healthy", "version": "0.1.0"}
+    return {
+        "status": "healthy",
+        "version": __version__,
+        "page_cache": page_cache.stats(),
+        "spark_buffer": spark_buffer.stats(),
+        "trending": trending_updater.stats(),
+    }
+
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for this process."""
+    if not settings.metrics_enabled:
+        return PlainTextResponse("Metrics are disabled\n", status_code=404)
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
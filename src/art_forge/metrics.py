@@ -0,0 +1,321 @@
+"""In-process Prometheus metrics, served at /metrics.
+
+A minimal registry of counters, gauges and histograms rendered in the
+Prometheus text format, with no extra dependency. Recording is a lock,
+a dict lookup and a bisect, cheap enough to leave on in production.
+
+What is recorded:
+
+- every HTTP request, by method and route template (`/art/{username}`,
+  not the raw path, so label cardinality stays bounded): count by status,
+  latency, requests in flight, and the number and total time of the
+  database queries it ran (attributed through a ContextVar, which
+  SQLAlchemy's async greenlets inherit);
+- every database query, by engine, via cursor-execute events;
+- template render time, by template;
+- upload sizes, and image processing time and outcomes;
+- the counters the page cache, spark buffer and trending updater
+  already keep for /health.
+
+Values are per app process: scrape each worker, or run one per host.
+"""
+
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+import jinja2
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .config import settings
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else f"{int(value)}"
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    escaped = (
+        str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        for value in values
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+class Registry:
+    """Holds metrics and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: List["_Metric"] = []
+        self._collectors: List[Callable[[], List[str]]] = []
+
+    def register(self, metric: "_Metric") -> None:
+        self._metrics.append(metric)
+
+    def add_collector(self, collector: Callable[[], List[str]]) -> None:
+        """Add a callable returning extra exposition lines, run at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        registry.register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        """The series for these label values, created on first use."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} takes labels {self.labelnames}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Counter(_Metric):
+    """A value that only goes up."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for values, child in list(self._children.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}")
+        return lines
+
+
+class Gauge(Counter):
+    """A value that goes up and down."""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.labels().dec(amount)
+
+    def set(self, value: float) -> None:
+        self.labels().set(value)
+
+
+class _Buckets:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative `le` buckets, plus their sum."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS, registry: Registry = REGISTRY):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self) -> _Buckets:
+        return _Buckets(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        names = self.labelnames + ("le",)
+        for values, child in list(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(names, values + (_format_value(bound),))} {cumulative}"
+                )
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+HTTP_REQUESTS = Counter("artforge_http_requests_total", "HTTP requests handled.", ["method", "route", "status"])
+HTTP_REQUEST_SECONDS = Histogram(
+    "artforge_http_request_duration_seconds", "Time to handle an HTTP request.", ["method", "route"]
+)
+HTTP_IN_FLIGHT = Gauge("artforge_http_requests_in_flight", "HTTP requests being handled right now.")
+REQUEST_DB_QUERIES = Histogram(
+    "artforge_http_request_db_queries", "Database queries run per HTTP request.", ["method", "route"],
+    buckets=COUNT_BUCKETS,
+)
+REQUEST_DB_SECONDS = Histogram(
+    "artforge_http_request_db_seconds", "Time spent in database queries per HTTP request.", ["method", "route"]
+)
+DB_QUERY_SECONDS = Histogram(
+    "artforge_db_query_duration_seconds", "Time to run one database query.", ["engine"], buckets=QUERY_BUCKETS
+)
+TEMPLATE_RENDER_SECONDS = Histogram(
+    "artforge_template_render_seconds", "Time to render a page template.", ["template"], buckets=QUERY_BUCKETS
+)
+UPLOAD_BYTES = Histogram(
+    "artforge_upload_size_bytes", "Size of accepted image uploads.",
+    buckets=(64 * 1024, 256 * 1024, 1024 ** 2, 4 * 1024 ** 2, 16 * 1024 ** 2, 64 * 1024 ** 2),
+)
+IMAGE_PROCESSING_SECONDS = Histogram(
+    "artforge_image_processing_seconds", "Time to probe an image and generate its derivatives.",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+IMAGE_JOBS = Counter("artforge_image_jobs_total", "Finished image jobs by outcome.", ["outcome"])
+
+# [queries, seconds] for the request being handled in this context
+_request_db: ContextVar[Optional[List[float]]] = ContextVar("artforge_request_db", default=None)
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Time every query on `engine` and charge it to the current request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _query_started(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _query_finished(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._metrics_started
+        DB_QUERY_SECONDS.labels(name).observe(elapsed)
+        current = _request_db.get()
+        if current is not None:
+            current[0] += 1
+            current[1] += elapsed
+
+
+class TimedTemplate(jinja2.Template):
+    """Jinja2 template that records how long each render takes."""
+
+    def render(self, *args, **kwargs) -> str:
+        started = time.perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            TEMPLATE_RENDER_SECONDS.labels(self.name or "<string>").observe(time.perf_counter() - started)
+
+
+def instrument_templates(environment: jinja2.Environment) -> None:
+    """Time renders of templates loaded from `environment` from now on."""
+    if settings.metrics_enabled:
+        environment.template_class = TimedTemplate
+
+
+def expose_stats(prefix: str, stats: Callable[[], dict]) -> None:
+    """Export a component's numeric stats() as gauges named artforge_<prefix>_<key>."""
+
+    def collect() -> List[str]:
+        lines = []
+        for key, value in stats().items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                name = f"artforge_{prefix}_{key}"
+                lines += [f"# TYPE {name} gauge", f"{name} {_format_value(value)}"]
+        return lines
+
+    REGISTRY.add_collector(collect)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route request metrics."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        db = [0, 0.0]
+        token = _request_db.set(db)
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            HTTP_IN_FLIGHT.dec()
+            _request_db.reset(token)
+            # Routing stores the matched route in the scope; label by its template
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            HTTP_REQUESTS.labels(method, route, str(status[0])).inc()
+            HTTP_REQUEST_SECONDS.labels(method, route).observe(elapsed)
+            REQUEST_DB_QUERIES.labels(method, route).observe(db[0])
+            REQUEST_DB_SECONDS.labels(method, route).observe(db[1])
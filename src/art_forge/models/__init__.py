@@ -1,21 +1,30 @@
 """Database models for ArtForge."""
 
 from .user import User
-from .artwork import Artwork, ArtworkImage
+from .artwork import Artwork, ArtworkImage, ArtworkImageDerivative
 from .tag import Tag, artwork_tags
 from .series import Series, ArtworkSeries
 from .comment import Comment
 from .spark import Spark
+from .image_job import ImageJob
+from .blob import Blob
+from .trending import ArtworkTrend, trending_queue
+from . import counters  # noqa: F401  (registers counter event listeners)
 
 __all__ = [
     "User",
     "Artwork",
     "ArtworkImage",
+    "ArtworkImageDerivative",
     "Tag",
     "artwork_tags",
     "Series",
     "ArtworkSeries",
     "Comment",
     "Spark",
+    "ImageJob",
+    "Blob",
+    "ArtworkTrend",
+    "trending_queue",
 ]
 
@@ -1,9 +1,9 @@
-"""Artwork and ArtworkImage models."""
+"""Artwork, ArtworkImage and ArtworkImageDerivative models."""
 
-from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from ..database import Base
+from ..database import Base, KeysetDateTime
 
 
 class Artwork(Base):
@@ -18,17 +18,33 @@ class Artwork(Base):
     artist_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     is_public = Column(Boolean, default=True)
     allow_comments = Column(Boolean, default=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    spark_count = Column(Integer, nullable=False, default=0, server_default="0")  # Denormalized, see models/counters.py
+    comment_count = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(KeysetDateTime, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
     artist = relationship("User", back_populates="artworks")
     images = relationship("ArtworkImage", back_populates="artwork", cascade="all, delete-orphan", order_by="ArtworkImage.order")
+    primary_image = relationship(
+        "ArtworkImage",
+        primaryjoin="and_(ArtworkImage.artwork_id == Artwork.id, ArtworkImage.is_primary == True)",
+        uselist=False,
+        viewonly=True,
+    )
     comments = relationship("Comment", back_populates="artwork", cascade="all, delete-orphan")
     tags = relationship("Tag", secondary="artwork_tags", back_populates="artworks")
     series_associations = relationship("ArtworkSeries", back_populates="artwork", cascade="all, delete-orphan")
     sparks = relationship("Spark", back_populates="artwork", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Artwork pages look up (artist, slug); galleries list an artist's newest first
+        Index("ix_artworks_artist_id_slug", "artist_id", "slug"),
+        Index("ix_artworks_artist_id_created_at", "artist_id", "created_at"),
+        # Browse feed: public artworks in (created_at, id) keyset order
+        Index("ix_artworks_is_public_created_at_id", "is_public", "created_at", "id"),
+    )
+
     def __repr__(self):
         return f"<Artwork(title='{self.title}', artist_id={self.artist_id})>"
 
@@ -48,12 +64,54 @@ class ArtworkImage(Base):
     width = Column(Integer, nullable=True)
     height = Column(Integer, nullable=True)
     file_size = Column(Integer, nullable=True)
+    content_hash = Column(String(64), nullable=True, index=True)  # Hex SHA-256, computed while streaming the upload
+    format = Column(String, nullable=True)  # Pillow format name, e.g. "JPEG"
+    status = Column(String, nullable=False, default="ready", server_default="ready")  # processing, ready, failed
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     artwork = relationship("Artwork", back_populates="images")
     sparks = relationship("Spark", back_populates="image", cascade="all, delete-orphan")
+    derivatives = relationship("ArtworkImageDerivative", back_populates="image", cascade="all, delete-orphan", order_by="ArtworkImageDerivative.width")
+    jobs = relationship("ImageJob", back_populates="image", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Image lists and the primary-image lookup both go by artwork
+        Index("ix_artwork_images_artwork_id_order", "artwork_id", "order"),
+    )
+    
+    def derivative(self, kind: str):
+        """Return the derivative of the given kind, or None if not generated."""
+        for derivative in self.derivatives:
+            if derivative.kind == kind:
+                return derivative
+        return None
     
     def __repr__(self):
         return f"<ArtworkImage(artwork_id={self.artwork_id}, filename='{self.filename}')>"
 
+
+class ArtworkImageDerivative(Base):
+    """ArtworkImageDerivative model - a resized rendition of an ArtworkImage."""
+    
+    __tablename__ = "artwork_image_derivatives"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    image_id = Column(Integer, ForeignKey("artwork_images.id"), nullable=False, index=True)
+    kind = Column(String, nullable=False)  # "thumb", "detail" or "full"
+    filename = Column(String, nullable=False)
+    width = Column(Integer, nullable=False)
+    height = Column(Integer, nullable=False)
+    file_size = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    image = relationship("ArtworkImage", back_populates="derivatives")
+    
+    __table_args__ = (
+        UniqueConstraint('image_id', 'kind', name='unique_image_derivative_kind'),
+    )
+    
+    def __repr__(self):
+        return f"<ArtworkImageDerivative(image_id={self.image_id}, kind='{self.kind}', width={self.width})>"
+
@@ -0,0 +1,65 @@
+"""Blob model - a content-addressed upload shared by ArtworkImages.
+
+`Blob.ref_count` tracks how many ArtworkImage rows point at the stored
+file. It is adjusted from ArtworkImage insert/delete hooks on the flushing
+connection, so it commits or rolls back with the image row; the file is
+only removed once the count reaches zero (see storage.collect_blobs).
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, event, insert, update
+from sqlalchemy.sql import func
+from ..database import Base
+from .artwork import ArtworkImage
+
+
+class Blob(Base):
+    """Blob model - one stored file, keyed by the SHA-256 of its contents."""
+    
+    __tablename__ = "blobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), unique=True, index=True, nullable=False)
+    key = Column(String, unique=True, nullable=False)  # Path relative to the upload dir
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<Blob(content_hash='{self.content_hash}', ref_count={self.ref_count})>"
+
+
+def acquire_blob(connection, content_hash: str, key: str, size: int) -> None:
+    """Add a reference to a blob, creating its row on first use."""
+    blobs = Blob.__table__
+    result = connection.execute(
+        update(blobs)
+        .where(blobs.c.content_hash == content_hash)
+        .values(ref_count=blobs.c.ref_count + 1)
+    )
+    if result.rowcount == 0:
+        connection.execute(
+            insert(blobs).values(content_hash=content_hash, key=key, size=size, ref_count=1)
+        )
+
+
+def release_blob(connection, content_hash: str) -> None:
+    """Drop a reference to a blob; the file is collected once unreferenced."""
+    blobs = Blob.__table__
+    connection.execute(
+        update(blobs)
+        .where(blobs.c.content_hash == content_hash)
+        .values(ref_count=blobs.c.ref_count - 1)
+    )
+
+
+@event.listens_for(ArtworkImage, "after_insert")
+def _image_inserted(mapper, connection, target):
+    # Images uploaded before content addressing have no hash and own their file
+    if target.content_hash:
+        acquire_blob(connection, target.content_hash, target.filename, target.file_size or 0)
+
+
+@event.listens_for(ArtworkImage, "after_delete")
+def _image_deleted(mapper, connection, target):
+    if target.content_hash:
+        release_blob(connection, target.content_hash)
@@ -1,9 +1,9 @@
 """Comment model."""
 
-from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from ..database import Base
+from ..database import Base, KeysetDateTime
 
 
 class Comment(Base):
@@ -16,13 +16,18 @@ class Comment(Base):
     author_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # Null for anonymous
     author_name = Column(String, nullable=True)  # For anonymous comments
     content = Column(Text, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(KeysetDateTime, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
     artwork = relationship("Artwork", back_populates="comments")
     author = relationship("User", back_populates="comments")
     
+    __table_args__ = (
+        # Artwork pages and the comments endpoint list comments newest first, by (created_at, id)
+        Index("ix_comments_artwork_id_created_at", "artwork_id", "created_at"),
+    )
+    
     def __repr__(self):
         return f"<Comment(artwork_id={self.artwork_id}, author_name='{self.author_name}')>"
 
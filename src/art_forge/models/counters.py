@@ -0,0 +1,154 @@
+"""Denormalized counters: sparks/comments on Artwork, usage on Tag.
+
+Spark and Comment inserts/deletes adjust `Artwork.spark_count` and
+`Artwork.comment_count` with an atomic UPDATE on the same connection, so
+the counters commit or roll back together with the row that changed them.
+This also covers ORM cascades (e.g. sparks removed with an ArtworkImage).
+
+`Tag.artwork_count` is the number of public artworks carrying a tag.
+Tag links live in the `artwork_tags` table, which has no mapper events,
+so a Session `after_flush` hook recounts the tags whose links or
+artworks changed in that flush (an indexed count per touched tag).
+
+Bulk statements bypass these hooks; `reconcile_counters` and
+`reconcile_tag_counts` repair any drift.
+"""
+
+from typing import Set
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.orm import Session
+from .artwork import Artwork
+from .comment import Comment
+from .spark import Spark
+from .tag import Tag, artwork_tags
+
+
+def _adjust(connection, artwork_id: int, column, delta: int) -> None:
+    """Atomically add `delta` to a counter column on one artwork."""
+    connection.execute(
+        update(Artwork.__table__)
+        .where(Artwork.__table__.c.id == artwork_id)
+        .values({column.name: column + delta})
+    )
+
+
+@event.listens_for(Spark, "after_insert")
+def _spark_inserted(mapper, connection, target):
+    _adjust(connection, target.artwork_id, Artwork.__table__.c.spark_count, 1)
+
+
+@event.listens_for(Spark, "after_delete")
+def _spark_deleted(mapper, connection, target):
+    _adjust(connection, target.artwork_id, Artwork.__table__.c.spark_count, -1)
+
+
+@event.listens_for(Comment, "after_insert")
+def _comment_inserted(mapper, connection, target):
+    _adjust(connection, target.artwork_id, Artwork.__table__.c.comment_count, 1)
+
+
+@event.listens_for(Comment, "after_delete")
+def _comment_deleted(mapper, connection, target):
+    _adjust(connection, target.artwork_id, Artwork.__table__.c.comment_count, -1)
+
+
+def _tag_totals():
+    return (
+        select(func.count())
+        .select_from(artwork_tags)
+        .join(Artwork.__table__, Artwork.__table__.c.id == artwork_tags.c.artwork_id)
+        .where(artwork_tags.c.tag_id == Tag.__table__.c.id, Artwork.__table__.c.is_public == True)
+        .correlate(Tag.__table__)
+        .scalar_subquery()
+    )
+
+
+def _touched_tags(session: Session) -> Set[int]:
+    """Ids of tags whose public artwork count the flush just done may have changed."""
+    tag_ids: Set[int] = set()
+    republished: Set[int] = set()
+    for obj in session.new:
+        if isinstance(obj, Artwork):
+            tag_ids.update(tag.id for tag in inspect(obj).attrs.tags.history.added)
+    for obj in session.dirty:
+        if isinstance(obj, Artwork):
+            state = inspect(obj)
+            history = state.attrs.tags.history
+            tag_ids.update(tag.id for tag in history.added + history.deleted)
+            if state.attrs.is_public.history.has_changes():
+                republished.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Artwork):
+            # The flush loaded the links in order to delete them
+            tag_ids.update(tag.id for tag in inspect(obj).attrs.tags.history.sum())
+
+    if republished:
+        tag_ids.update(session.connection().scalars(
+            select(artwork_tags.c.tag_id).where(artwork_tags.c.artwork_id.in_(republished))
+        ))
+    return tag_ids
+
+
+@event.listens_for(Session, "after_flush")
+def _recount_tags(session, flush_context):
+    tag_ids = _touched_tags(session)
+    if tag_ids:
+        session.connection().execute(
+            update(Tag.__table__)
+            .where(Tag.__table__.c.id.in_(tag_ids))
+            .values(artwork_count=_tag_totals())
+        )
+
+
+def reconcile_counters(db: Session) -> int:
+    """Recompute every artwork's counters from the source tables.
+
+    Returns the number of artworks whose stored counts had drifted.
+    """
+    spark_totals = (
+        select(func.count(Spark.id))
+        .where(Spark.artwork_id == Artwork.id)
+        .correlate(Artwork)
+        .scalar_subquery()
+    )
+    comment_totals = (
+        select(func.count(Comment.id))
+        .where(Comment.artwork_id == Artwork.id)
+        .correlate(Artwork)
+        .scalar_subquery()
+    )
+
+    drifted = db.query(Artwork.id).filter(
+        (Artwork.spark_count != spark_totals) | (Artwork.comment_count != comment_totals)
+    ).all()
+    drifted_ids = [row.id for row in drifted]
+
+    if drifted_ids:
+        db.execute(
+            update(Artwork)
+            .where(Artwork.id.in_(drifted_ids))
+            .values(spark_count=spark_totals, comment_count=comment_totals)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+    return len(drifted_ids)
+
+
+def reconcile_tag_counts(db: Session) -> int:
+    """Recompute every tag's public artwork count.
+
+    Returns the number of tags whose stored count had drifted.
+    """
+    totals = _tag_totals()
+    drifted_ids = [row.id for row in db.query(Tag.id).filter(Tag.artwork_count != totals).all()]
+
+    if drifted_ids:
+        db.execute(
+            update(Tag.__table__)
+            .where(Tag.__table__.c.id.in_(drifted_ids))
+            .values(artwork_count=totals)
+        )
+        db.commit()
+
+    return len(drifted_ids)
@@ -0,0 +1,27 @@
+"""ImageJob model - persisted queue of image-processing work."""
+
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, DateTime
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class ImageJob(Base):
+    """ImageJob model - one pending/running/finished processing run for an image."""
+    
+    __tablename__ = "image_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    image_id = Column(Integer, ForeignKey("artwork_images.id"), nullable=False, index=True)
+    status = Column(String, nullable=False, default="pending", index=True)  # pending, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    claimed_at = Column(DateTime, nullable=True)  # When a worker last picked it up
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    finished_at = Column(DateTime, nullable=True)
+    
+    # Relationships
+    image = relationship("ArtworkImage", back_populates="jobs")
+    
+    def __repr__(self):
+        return f"<ImageJob(image_id={self.image_id}, status='{self.status}', attempts={self.attempts})>"
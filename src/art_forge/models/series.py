@@ -1,6 +1,6 @@
 """Series model and association table."""
 
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from ..database import Base
 
@@ -28,13 +28,18 @@ class ArtworkSeries(Base):
     __tablename__ = "artwork_series"
     
     id = Column(Integer, primary_key=True, index=True)
-    artwork_id = Column(Integer, ForeignKey("artworks.id"), nullable=False)
+    artwork_id = Column(Integer, ForeignKey("artworks.id"), nullable=False, index=True)
     series_id = Column(Integer, ForeignKey("series.id"), nullable=False)
     position = Column(Integer, nullable=False)  # Position in the series
     
     # Relationships
     artwork = relationship("Artwork", back_populates="series_associations")
     series = relationship("Series", back_populates="artwork_associations")
+
+    __table_args__ = (
+        # Series pages walk entries in (position, artwork_id) order from the index alone
+        Index("ix_artwork_series_series_id_position", "series_id", "position", "artwork_id"),
+    )
     
     def __repr__(self):
         return f"<ArtworkSeries(artwork_id={self.artwork_id}, series_id={self.series_id}, position={self.position})>"
@@ -13,7 +13,7 @@ class Spark(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     artwork_id = Column(Integer, ForeignKey("artworks.id"), nullable=False)
-    image_id = Column(Integer, ForeignKey("artwork_images.id"), nullable=True)  # Optional: spark on specific image
+    image_id = Column(Integer, ForeignKey("artwork_images.id"), nullable=True, index=True)  # Optional: spark on specific image
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # Null for anonymous
     session_id = Column(String, nullable=True)  # For anonymous sparks (track by session)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
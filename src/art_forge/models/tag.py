@@ -1,6 +1,6 @@
 """Tag model and association table."""
 
-from sqlalchemy import Column, Integer, String, Table, ForeignKey
+from sqlalchemy import Column, Integer, String, Table, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from ..database import Base
 
@@ -9,7 +9,9 @@ artwork_tags = Table(
     'artwork_tags',
     Base.metadata,
     Column('artwork_id', Integer, ForeignKey('artworks.id'), primary_key=True),
-    Column('tag_id', Integer, ForeignKey('tags.id'), primary_key=True)
+    Column('tag_id', Integer, ForeignKey('tags.id'), primary_key=True),
+    # Tag pages walk a tag's artworks newest (highest id) first from the index alone
+    Index('ix_artwork_tags_tag_id_artwork_id', 'tag_id', 'artwork_id'),
 )
 
 
@@ -21,6 +23,8 @@ class Tag(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, unique=True, index=True, nullable=False)
     slug = Column(String, unique=True, index=True, nullable=False)
+    # Public artworks carrying this tag; denormalized, see models/counters.py
+    artwork_count = Column(Integer, nullable=False, default=0, server_default="0", index=True)
     
     # Relationships
     artworks = relationship("Artwork", secondary=artwork_tags, back_populates="tags")
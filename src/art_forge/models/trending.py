@@ -0,0 +1,103 @@
+"""Materialized trending scores and the queue of changes not yet applied.
+
+`ArtworkTrend` holds one score per artwork for the trending feed (see
+art_forge/trending.py for how it is computed). `trending_queue` lists
+the sparks, comments and uploads added or removed since: one row per
+event with its weight (negative for a removal) and time. The mapper
+events below add to it on the same connection as the change, so every
+change is queued exactly once, and the periodic job folds queued events
+into the stored scores without reading anything else. A row without a
+weight asks for the artwork to be rescored from its sparks and comments.
+"""
+
+from datetime import datetime, timezone
+from typing import Iterable, Optional, Tuple
+from sqlalchemy import Column, Float, Integer, DateTime, ForeignKey, Index, Table, delete, event, insert
+from sqlalchemy.sql import func
+from ..config import settings
+from ..database import Base
+from .artwork import Artwork
+from .comment import Comment
+from .spark import Spark
+
+trending_queue = Table(
+    'trending_queue',
+    Base.metadata,
+    Column('id', Integer, primary_key=True),
+    Column('artwork_id', Integer, ForeignKey('artworks.id'), nullable=False, index=True),
+    Column('weight', Float, nullable=True),  # None: rescore from scratch
+    Column('occurred_at', DateTime(timezone=True), nullable=True),
+)
+
+# (artwork_id, weight, occurred_at) for one spark, comment or upload change
+TrendEvent = Tuple[int, Optional[float], Optional[datetime]]
+
+
+class ArtworkTrend(Base):
+    """An artwork's time-decayed engagement score."""
+
+    __tablename__ = "artwork_trends"
+
+    artwork_id = Column(Integer, ForeignKey("artworks.id"), primary_key=True)
+    score = Column(Float, nullable=False)
+    computed_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # Trending feed: highest score first, in (score, artwork_id) keyset order
+        Index("ix_artwork_trends_score_artwork_id", "score", "artwork_id"),
+    )
+
+    def __repr__(self):
+        return f"<ArtworkTrend(artwork_id={self.artwork_id}, score={self.score})>"
+
+
+def queue_trend_events(connection, events: Iterable[TrendEvent]) -> None:
+    """Queue spark/comment changes to be folded into their artworks' scores."""
+    rows = [
+        {"artwork_id": artwork_id, "weight": weight, "occurred_at": occurred_at}
+        for artwork_id, weight, occurred_at in events
+    ]
+    if rows:
+        connection.execute(insert(trending_queue), rows)
+
+
+def queue_for_trending(connection, artwork_ids: Iterable[int]) -> None:
+    """Queue artworks to be rescored from scratch."""
+    queue_trend_events(connection, [(artwork_id, None, None) for artwork_id in set(artwork_ids)])
+
+
+def _engagement_weight(target) -> float:
+    if isinstance(target, Comment):
+        return settings.trending_comment_weight
+    return settings.trending_spark_weight
+
+
+@event.listens_for(Artwork, "after_insert")
+def _artwork_inserted(mapper, connection, target):
+    # The upload counts as one spark at upload time
+    queue_trend_events(connection, [(target.id, settings.trending_spark_weight, datetime.now(timezone.utc))])
+
+
+@event.listens_for(Artwork, "before_delete")
+def _artwork_deleting(mapper, connection, target):
+    # After its sparks/comments (which queue it again) and before its own row goes
+    connection.execute(delete(trending_queue).where(trending_queue.c.artwork_id == target.id))
+    connection.execute(delete(ArtworkTrend.__table__).where(ArtworkTrend.__table__.c.artwork_id == target.id))
+
+
+@event.listens_for(Spark, "after_insert")
+@event.listens_for(Comment, "after_insert")
+def _engagement_added(mapper, connection, target):
+    # created_at is a server default and not loaded yet; now is within a second of it
+    queue_trend_events(connection, [(target.artwork_id, _engagement_weight(target), datetime.now(timezone.utc))])
+
+
+@event.listens_for(Spark, "after_delete")
+@event.listens_for(Comment, "after_delete")
+def _engagement_removed(mapper, connection, target):
+    # Read from __dict__: an expired attribute can't be loaded for a deleted row
+    created_at = target.__dict__.get("created_at")
+    if created_at is None:
+        queue_for_trending(connection, [target.artwork_id])
+    else:
+        queue_trend_events(connection, [(target.artwork_id, -_engagement_weight(target), created_at)])
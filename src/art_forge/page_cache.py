@@ -0,0 +1,213 @@
+"""Rendered-page cache for anonymous visitors.
+
+Gallery, artwork and browse pages look the same to every visitor without
+an `access_token` cookie, so their rendered HTML is kept in an
+in-process LRU and, when `settings.page_cache_redis_url` is set, in a
+Redis-compatible store shared by all app processes.
+
+Invalidation is by tag: each cached page is stored under a key that
+includes the current generation of its tags (the artist, the artwork,
+the browse feed), and handlers that change those bump the generation.
+Old entries are never looked up again and fall out of the LRU or expire
+in Redis. With Redis the generations live there too, so an invalidation
+in one process is seen by all of them.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+from fastapi import Request
+from fastapi.responses import HTMLResponse, Response
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+BROWSE_TAG = "browse"
+TRENDING_TAG = "trending"  # Bumped when trending scores are recomputed
+GLOBAL_TAG = "all"
+
+
+def artist_tag(username: str) -> str:
+    """Tag for pages that list an artist's artworks."""
+    return f"artist:{username}"
+
+
+def artwork_tag(username: str, slug: str) -> str:
+    """Tag for an artwork's detail page."""
+    return f"artwork:{username}/{slug}"
+
+
+def artwork_tags(username: str, slug: str) -> Tuple[str, ...]:
+    """Every tag whose pages show an artwork: its page, its artist's gallery, browse."""
+    return artwork_tag(username, slug), artist_tag(username), BROWSE_TAG
+
+
+class PageCache:
+    """Two-tier cache of rendered HTML keyed by URL and tag generations."""
+
+    def __init__(self, max_entries: int, ttl: int, redis_url: Optional[str] = None, prefix: str = "artforge:"):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._redis = None
+        self._counters = {
+            "hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "invalidations": 0,
+            "errors": 0,
+        }
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 or self.redis_url is not None
+
+    def _client(self):
+        if self._redis is None:
+            try:
+                import redis
+            except ImportError as exc:
+                raise RuntimeError(
+                    "PAGE_CACHE_REDIS_URL needs the redis package: pip install 'art_forge[redis]'"
+                ) from exc
+            # Short timeouts: a slow cache must not be slower than rendering
+            self._redis = redis.Redis.from_url(
+                self.redis_url, socket_timeout=0.25, socket_connect_timeout=0.25
+            )
+        return self._redis
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def _generation_key(self, tag: str) -> str:
+        return f"{self.prefix}gen:{tag}"
+
+    def _current_generations(self, tags: List[str]) -> Optional[List[int]]:
+        if self.redis_url is None:
+            with self._lock:
+                return [self._generations.get(tag, 0) for tag in tags]
+        try:
+            values = self._client().mget([self._generation_key(tag) for tag in tags])
+        except Exception:
+            # Without the shared generations we can't tell what is stale
+            logger.warning("Page cache: Redis unavailable, bypassing", exc_info=True)
+            self._count("errors")
+            return None
+        return [int(value or 0) for value in values]
+
+    def key_for(self, request: Request, tags: Iterable[str], vary_cookies: Iterable[str] = ()) -> Optional[str]:
+        """Cache key for an anonymous request, or None if it must not be cached.
+
+        Requests with an `access_token` cookie, or with any of
+        `vary_cookies` (cookies the page renders differently for), are
+        never cached.
+        """
+        if not self.enabled:
+            return None
+        if "access_token" in request.cookies or any(name in request.cookies for name in vary_cookies):
+            return None
+        tags = [GLOBAL_TAG, *tags]
+        generations = self._current_generations(tags)
+        if generations is None:
+            return None
+        stamp = ",".join(f"{tag}={gen}" for tag, gen in zip(tags, generations))
+        return f"{self.prefix}page:{request.url.path}?{request.url.query}|{stamp}"
+
+    def get(self, key: Optional[str]) -> Optional[Response]:
+        """The cached page for `key` as a response, or None on a miss."""
+        if key is None:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return HTMLResponse(entry[1], headers={"X-Cache": "HIT"})
+            if entry is not None:
+                del self._entries[key]
+
+        body = None
+        if self.redis_url is not None:
+            try:
+                body = self._client().get(key)
+            except Exception:
+                logger.warning("Page cache: Redis read failed", exc_info=True)
+                self._count("errors")
+        if body is None:
+            self._count("misses")
+            return None
+        self._count("redis_hits")
+        self._remember(key, body)
+        return HTMLResponse(body, headers={"X-Cache": "HIT"})
+
+    def store(self, key: Optional[str], response: Response) -> Response:
+        """Cache a freshly rendered page (200s only) and return it."""
+        if key is None or response.status_code != 200:
+            return response
+        body = bytes(response.body)
+        self._remember(key, body)
+        if self.redis_url is not None:
+            try:
+                self._client().setex(key, self.ttl, body)
+            except Exception:
+                logger.warning("Page cache: Redis write failed", exc_info=True)
+                self._count("errors")
+        self._count("stores")
+        response.headers["X-Cache"] = "MISS"
+        return response
+
+    def _remember(self, key: str, body: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *tags: str) -> None:
+        """Make every cached page carrying any of `tags` stale."""
+        if not self.enabled or not tags:
+            return
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+            self._counters["invalidations"] += len(tags)
+        if self.redis_url is not None:
+            try:
+                pipe = self._client().pipeline(transaction=False)
+                for tag in tags:
+                    pipe.incr(self._generation_key(tag))
+                pipe.execute()
+            except Exception:
+                logger.warning("Page cache: Redis invalidation failed", exc_info=True)
+                self._count("errors")
+
+    def clear(self) -> None:
+        """Invalidate every cached page."""
+        self.invalidate(GLOBAL_TAG)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size of the in-process tier."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["redis_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["hits"] + stats["redis_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+page_cache = PageCache(
+    max_entries=settings.page_cache_max_entries,
+    ttl=settings.page_cache_ttl,
+    redis_url=settings.page_cache_redis_url,
+)
@@ -0,0 +1,126 @@
+"""Keyset (cursor) pagination helpers."""
+
+import base64
+import binascii
+import math
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+from fastapi import HTTPException
+from sqlalchemy import Select, and_, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Encode a (created_at, id) sort key as an opaque URL-safe cursor."""
+    raw = f"{created_at.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode a cursor produced by encode_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        created_at, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, binascii.Error, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def encode_key_cursor(*values: float) -> str:
+    """Encode a numeric sort key, e.g. (position, artwork_id), as an opaque cursor."""
+    raw = "|".join(str(value) for value in values).encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def _number(text: str) -> float:
+    try:
+        return int(text)
+    except ValueError:
+        value = float(text)
+        if not math.isfinite(value):
+            raise ValueError(text)
+        return value
+
+
+def decode_key_cursor(cursor: str, size: int) -> Tuple[float, ...]:
+    """Decode a cursor produced by encode_key_cursor with `size` values."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("ascii")
+        values = tuple(_number(value) for value in raw.split("|"))
+    except (ValueError, binascii.Error, UnicodeError):
+        values = ()
+    if len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def clamp_limit(limit: Optional[int], default: int, maximum: int) -> int:
+    """Clamp a requested page size to [1, maximum]."""
+    if not limit or limit < 1:
+        return default
+    return min(limit, maximum)
+
+
+def keyset_before(created_col, id_col, cursor: Optional[str]):
+    """Filter clause for rows after the cursor in (created_at DESC, id DESC) order.
+
+    `created_col` should be a database.KeysetDateTime column, so the cursor
+    is bound in the same form SQLite stores the timestamps in. Returns None
+    when there is no cursor, i.e. the first page.
+    """
+    if not cursor:
+        return None
+    created_at, row_id = decode_cursor(cursor)
+    return or_(
+        created_col < created_at,
+        and_(created_col == created_at, id_col < row_id),
+    )
+
+
+async def paginate_desc(db: AsyncSession, stmt: Select, created_col, id_col, cursor: Optional[str], limit: int):
+    """Fetch one page of a select ordered by (created_at DESC, id DESC).
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    clause = keyset_before(created_col, id_col, cursor)
+    if clause is not None:
+        stmt = stmt.where(clause)
+
+    # Fetch one extra row to know whether another page exists
+    result = await db.scalars(stmt.order_by(created_col.desc(), id_col.desc()).limit(limit + 1))
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return rows, next_cursor
+
+
+async def paginate_by_keys(
+    db: AsyncSession, stmt: Select, key_cols: Sequence, cursor: Optional[str], limit: int, descending: bool = False
+):
+    """Fetch one page of a single-entity select ordered by numeric key columns.
+
+    For listings whose order lives in an index other than (created_at, id),
+    e.g. a tag's artwork ids, a series' (position, artwork_id) or trending
+    (score, artwork_id). Returns (rows, next_cursor).
+    """
+    if cursor:
+        values = decode_key_cursor(cursor, len(key_cols))
+        # A row-value comparison lets the index seek straight to the cursor
+        keys, after = tuple_(*key_cols), tuple_(*values)
+        stmt = stmt.where(keys < after if descending else keys > after)
+
+    order = [col.desc() if descending else col for col in key_cols]
+    result = await db.execute(stmt.add_columns(*key_cols).order_by(*order).limit(limit + 1))
+    rows = result.all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_key_cursor(*rows[-1][1:])
+    return [row[0] for row in rows], next_cursor
@@ -0,0 +1,117 @@
+"""pytest plugin failing tests whose requests exceed a query budget.
+
+Installed as a `pytest11` entry point, so it loads whenever pytest runs
+with art_forge installed. It turns the query audit on (see
+query_audit.py) before the app is imported, then checks every request a
+test makes through the app, e.g. with fastapi's TestClient.
+
+Budgets are per route template and set in pytest's ini file:
+
+    [tool.pytest.ini_options]
+    query_budgets = [
+        "GET /art/{username}/{slug} 5",
+        "GET /art/browse 3",
+    ]
+    query_budget_default = 10   # optional; routes not listed are unchecked otherwise
+
+A test can override them with a marker, for all its requests or for one
+route:
+
+    @pytest.mark.query_budget(2)
+    @pytest.mark.query_budget(4, route="GET /art/{username}")
+
+A request over budget, or one repeating a SELECT with different
+parameters QUERY_AUDIT_REPEAT_THRESHOLD or more times, fails the test
+with the route, templates and statements involved. Image jobs that run
+inline (IMAGE_WORKERS=0) use the sync engine and are not counted.
+"""
+
+import os
+import sys
+from typing import Dict, List, Optional
+import pytest
+
+
+def pytest_addoption(parser):
+    parser.addini(
+        "query_budgets", "Per-route query budgets, one '<METHOD> <route template> <queries>' per line",
+        type="linelist", default=[],
+    )
+    parser.addini("query_budget_default", "Query budget for routes without one (unset: unchecked)", default="")
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_load_initial_conftests(early_config, parser, args):
+    # Settings are read when art_forge.config is first imported, which a conftest may do
+    os.environ.setdefault("QUERY_AUDIT_ENABLED", "true")
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "query_budget(queries, route=None): maximum queries per request in this test",
+    )
+    os.environ.setdefault("QUERY_AUDIT_ENABLED", "true")
+    if "art_forge.config" in sys.modules and not sys.modules["art_forge.config"].settings.query_audit_enabled:
+        raise pytest.UsageError("art_forge was imported with QUERY_AUDIT_ENABLED=false; query budgets need it on")
+    config._query_budgets = _parse_budgets(config.getini("query_budgets"))
+    default = config.getini("query_budget_default")
+    config._query_budget_default = int(default) if default else None
+
+
+def _parse_budgets(lines: List[str]) -> Dict[str, int]:
+    budgets = {}
+    for line in lines:
+        endpoint, _, budget = line.rpartition(" ")
+        if not endpoint or not budget.isdigit():
+            raise pytest.UsageError(f"query_budgets: expected '<METHOD> <route> <queries>', got {line!r}")
+        budgets[endpoint.strip()] = int(budget)
+    return budgets
+
+
+@pytest.fixture(autouse=True)
+def query_budget(request):
+    """The requests this test has made so far, as query_audit.RequestQueries."""
+    from .query_audit import add_listener, remove_listener
+
+    reports = request.node._query_reports = []
+    add_listener(reports.append)
+    yield reports
+    remove_listener(reports.append)
+
+
+def _budgets(item):
+    config = item.config
+    budgets: Dict[str, int] = dict(config._query_budgets)
+    default: Optional[int] = config._query_budget_default
+    # Closest marker last, so it wins
+    for marker in reversed(list(item.iter_markers("query_budget"))):
+        route = marker.kwargs.get("route")
+        if route:
+            budgets[route] = marker.args[0]
+        else:
+            budgets, default = {}, marker.args[0]
+    return budgets, default
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    outcome = yield
+    reports = getattr(item, "_query_reports", None)
+    if not reports or outcome.excinfo is not None:
+        return
+
+    from .config import settings
+
+    budgets, default = _budgets(item)
+    problems = []
+    for report in reports:
+        budget = budgets.get(report.endpoint, default)
+        if budget is not None and report.count > budget:
+            problems.append(f"{report.describe()} ran {report.count} queries (budget {budget})")
+        for statement, count in report.repeated(settings.query_audit_repeat_threshold):
+            problems.append(f"{report.describe()} ran this {count} times (possible N+1): {statement}")
+    if problems:
+        # Fail the test itself rather than erroring in fixture teardown
+        outcome.force_exception(pytest.fail.Exception(
+            "Query budget exceeded:\n  " + "\n  ".join(problems), pytrace=False
+        ))
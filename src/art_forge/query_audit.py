@@ -0,0 +1,189 @@
+"""Per-request SQL auditing for development and staging.
+
+With QUERY_AUDIT_ENABLED=true, every statement sent to the database is
+recorded against the HTTP request that issued it, with its parameters
+and timing. When the request finishes, a warning is logged, naming the
+route template and the page templates rendered, if:
+
+- a statement took longer than QUERY_AUDIT_SLOW_MS, or
+- the same SELECT ran QUERY_AUDIT_REPEAT_THRESHOLD or more times with
+  different parameters: the signature of an N+1, one query per row of
+  a list that should have been loaded in a single IN (...). Repeated
+  writes only count towards the request's total.
+
+Each finished request is also handed to the listeners registered with
+`add_listener`, which is how the pytest plugin (art_forge/pytest_plugin.py)
+enforces per-route query budgets.
+
+This keeps every statement and a repr of its parameters for the life of
+the request, so it is off by default and not meant for production; use
+/metrics there.
+"""
+
+import logging
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# How much of a statement goes into a log line
+_SQL_PREVIEW = 200
+# Statements the N+1 check looks at
+_READS = ("SELECT", "WITH")
+
+
+class AuditedQuery:
+    """One statement execution: normalized SQL, parameters and duration."""
+
+    __slots__ = ("statement", "parameters", "seconds")
+
+    def __init__(self, statement: str, parameters: str, seconds: float):
+        self.statement = statement
+        self.parameters = parameters
+        self.seconds = seconds
+
+
+class RequestQueries:
+    """Statements run and templates rendered while handling one request."""
+
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.route: Optional[str] = None
+        self.status: Optional[int] = None
+        self.templates: List[str] = []
+        self.queries: List[AuditedQuery] = []
+
+    @property
+    def endpoint(self) -> str:
+        """Method and route template, e.g. "GET /art/{username}/{slug}"."""
+        return f"{self.method} {self.route or self.path}"
+
+    @property
+    def count(self) -> int:
+        return len(self.queries)
+
+    @property
+    def seconds(self) -> float:
+        return sum(query.seconds for query in self.queries)
+
+    def slow(self, threshold_ms: float) -> List[AuditedQuery]:
+        """Statements that took longer than `threshold_ms`."""
+        return [query for query in self.queries if query.seconds * 1000 > threshold_ms]
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """(statement, executions) for SELECTs run at least `threshold` times
+        with more than one set of parameters, most executions first."""
+        executions: Dict[str, int] = {}
+        parameters: Dict[str, set] = {}
+        for query in self.queries:
+            if not query.statement[:6].upper().startswith(_READS):
+                continue
+            executions[query.statement] = executions.get(query.statement, 0) + 1
+            parameters.setdefault(query.statement, set()).add(query.parameters)
+        return sorted(
+            (
+                (statement, count) for statement, count in executions.items()
+                if count >= threshold and len(parameters[statement]) > 1
+            ),
+            key=lambda item: -item[1],
+        )
+
+    def describe(self) -> str:
+        """Where these queries came from, for log and failure messages."""
+        templates = ", ".join(self.templates) or "none"
+        return f"{self.endpoint} ({self.path}, templates: {templates})"
+
+
+_current: ContextVar[Optional[RequestQueries]] = ContextVar("artforge_query_audit", default=None)
+_listeners: List[Callable[[RequestQueries], None]] = []
+
+
+def add_listener(listener: Callable[[RequestQueries], None]) -> None:
+    """Call `listener` with each request's RequestQueries once it finishes."""
+    _listeners.append(listener)
+
+
+def remove_listener(listener: Callable[[RequestQueries], None]) -> None:
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Record every statement run on `engine` against the current request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _query_started(conn, cursor, statement, parameters, context, executemany):
+        context._audit_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _query_finished(conn, cursor, statement, parameters, context, executemany):
+        current = _current.get()
+        if current is not None:
+            current.queries.append(AuditedQuery(
+                " ".join(statement.split()),
+                repr(parameters),
+                time.perf_counter() - context._audit_started,
+            ))
+
+
+def _preview(statement: str) -> str:
+    return statement if len(statement) <= _SQL_PREVIEW else statement[:_SQL_PREVIEW] + "..."
+
+
+def log_findings(report: RequestQueries) -> None:
+    """Log slow statements and likely N+1s for one request."""
+    findings = []
+    for query in report.slow(settings.query_audit_slow_ms):
+        findings.append(f"slow query ({query.seconds * 1000:.1f} ms): {_preview(query.statement)}")
+    for statement, count in report.repeated(settings.query_audit_repeat_threshold):
+        findings.append(f"possible N+1, {count} executions: {_preview(statement)}")
+    if findings:
+        logger.warning(
+            "%s ran %d queries in %.1f ms:\n  %s",
+            report.describe(), report.count, report.seconds * 1000, "\n  ".join(findings),
+        )
+    else:
+        logger.debug("%s ran %d queries in %.1f ms", report.describe(), report.count, report.seconds * 1000)
+
+
+class QueryAuditMiddleware:
+    """ASGI middleware collecting each request's statements and templates."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        report = RequestQueries(scope["method"], scope["path"])
+        # Template responses announce their template through this extension
+        extensions = scope.get("extensions") or {}
+        forward_debug = "http.response.debug" in extensions
+        scope = dict(scope, extensions={**extensions, "http.response.debug": {}})
+
+        async def send_and_record(message):
+            if message["type"] == "http.response.debug":
+                template = message["info"]["template"]
+                report.templates.append(getattr(template, "name", None) or str(template))
+                if not forward_debug:
+                    return
+            elif message["type"] == "http.response.start":
+                report.status = message["status"]
+            await send(message)
+
+        token = _current.set(report)
+        try:
+            await self.app(scope, receive, send_and_record)
+        finally:
+            _current.reset(token)
+            report.route = getattr(scope.get("route"), "path", None)
+            log_findings(report)
+            for listener in list(_listeners):
+                listener(report)
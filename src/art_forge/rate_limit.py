@@ -0,0 +1,64 @@
+"""In-process token-bucket rate limiting.
+
+Each key (a client IP, a username) gets a bucket holding up to `burst`
+tokens that refills at `per_minute` tokens a minute. An attempt spends a
+token; an empty bucket means the caller should wait `retry_after`
+seconds. Buckets live in a bounded LRU, so a flood of distinct keys
+costs memory proportional to `max_keys` only. Limits are per app
+process.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets with a shared burst size and refill rate."""
+
+    def __init__(self, burst: int, per_minute: float, max_keys: int = 10000):
+        self.burst = burst
+        self.rate = per_minute / 60.0
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.burst > 0 and self.rate > 0
+
+    def _level(self, key: str, now: float) -> float:
+        tokens, updated = self._buckets.get(key, (float(self.burst), now))
+        return min(float(self.burst), tokens + (now - updated) * self.rate)
+
+    def _wait(self, tokens: float) -> float:
+        return (1.0 - tokens) / self.rate
+
+    def retry_after(self, key: str) -> float:
+        """Seconds until `key` may try again (0 if a token is available), without spending one."""
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            tokens = self._level(key, time.monotonic())
+        return 0.0 if tokens >= 1.0 else self._wait(tokens)
+
+    def consume(self, key: str) -> float:
+        """Spend a token for `key`; returns 0 on success or the seconds to wait."""
+        if not self.enabled:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._level(key, now)
+            if tokens < 1.0:
+                return self._wait(tokens)
+            self._buckets[key] = (tokens - 1.0, now)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return 0.0
+
+    def reset(self, key: str) -> None:
+        """Refill `key`'s bucket (e.g. after a successful login)."""
+        with self._lock:
+            self._buckets.pop(key, None)
@@ -1,30 +1,32 @@
 """Artwork routes for viewing and managing artworks."""
 
-import os
-import uuid
-from pathlib import Path
-from typing import List
+from typing import List, Optional
 from fastapi import APIRouter, Depends, Request, Form, UploadFile, File, HTTPException
-from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from PIL import Image
-from ..database import get_db
+from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from ..database import get_async_db, get_async_read_db
 from ..models.user import User
 from ..models.artwork import Artwork, ArtworkImage
-from ..auth import get_current_user_from_cookie
+from ..artwork_detail import load_artwork_detail
+from ..auth import get_current_user
 from ..config import settings
+from ..images import reuse_processed_images
+from ..pagination import clamp_limit, paginate_by_keys, paginate_desc
+from ..models.tag import Tag
+from ..models.trending import ArtworkTrend
+from ..page_cache import BROWSE_TAG, TRENDING_TAG, artist_tag, artwork_tag, artwork_tags, page_cache
+from ..spark_buffer import spark_buffer
+from ..storage import collect_blobs, get_content_store
+from ..templating import templates
+from ..uploads import ingest_upload
+from ..worker import enqueue_image, image_worker
 
 router = APIRouter()
 
-# Setup templates
-BASE_DIR = Path(__file__).parent.parent
-TEMPLATES_DIR = BASE_DIR / "templates"
-templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
-
-# Ensure upload directory exists
-UPLOAD_DIR = Path(settings.upload_dir)
-UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+BROWSE_SORTS = ("newest", "trending")
 
 
 def slugify(text: str) -> str:
@@ -36,62 +38,101 @@ def slugify(text: str) -> str:
     return text.strip('-')
 
 
-def save_uploaded_image(file: UploadFile) -> tuple:
-    """Save an uploaded image and return (filename, width, height, file_size)."""
-    # Generate unique filename
-    ext = file.filename.split('.')[-1].lower()
-    filename = f"{uuid.uuid4()}.{ext}"
-    filepath = UPLOAD_DIR / filename
-    
-    # Save file
-    with open(filepath, "wb") as buffer:
-        content = file.file.read()
-        buffer.write(content)
-    
-    # Get image dimensions
-    try:
-        with Image.open(filepath) as img:
-            width, height = img.size
-    except:
-        width, height = None, None
-    
-    file_size = os.path.getsize(filepath)
-    
-    return filename, width, height, file_size
+async def get_or_create_tags(db: AsyncSession, raw: Optional[str]) -> List[Tag]:
+    """Tags for a comma-separated list of names, creating any that are new."""
+    names = {}
+    for name in (raw or "").split(","):
+        name = " ".join(name.split())[:50]
+        slug = slugify(name)
+        if slug and slug not in names:
+            names[slug] = name
+    if not names:
+        return []
+
+    existing = {tag.slug: tag for tag in (await db.scalars(select(Tag).where(Tag.slug.in_(names)))).all()}
+    tags = []
+    for slug, name in names.items():
+        tag = existing.get(slug)
+        if tag is None:
+            tag = Tag(name=name, slug=slug)
+            db.add(tag)
+        tags.append(tag)
+    return tags
 
 
 @router.get("/art/browse")
-async def browse_artworks(request: Request, db: Session = Depends(get_db)):
-    """Browse all public artworks."""
-    current_user = get_current_user_from_cookie(request, db)
-
-    # Get all public artworks, ordered by most recent
-    artworks = db.query(Artwork).filter(
-        Artwork.is_public == True
-    ).order_by(Artwork.created_at.desc()).all()
+async def browse_artworks(
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    sort: str = "newest",
+    current_user: Optional[User] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Browse public artworks, newest or trending first, one keyset page at a time."""
+    if sort not in BROWSE_SORTS:
+        raise HTTPException(status_code=400, detail="Unknown sort")
+    cache_key = page_cache.key_for(request, [BROWSE_TAG, TRENDING_TAG] if sort == "trending" else [BROWSE_TAG])
+    cached = page_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    limit = clamp_limit(limit, settings.browse_page_size, settings.browse_max_page_size)
+
+    # One query for the page, plus batched loads for artists and primary images
+    stmt = select(Artwork).options(
+        joinedload(Artwork.artist),
+        selectinload(Artwork.primary_image).selectinload(ArtworkImage.derivatives),
+    )
+    if sort == "trending":
+        # Scores are precomputed by trending.py; artworks not yet scored are left out.
+        # `!= False` rather than `== True` keeps SQLite walking the score index
+        # instead of collecting every public artwork and sorting them.
+        stmt = stmt.join(ArtworkTrend, ArtworkTrend.artwork_id == Artwork.id).where(Artwork.is_public != False)
+        artworks, next_cursor = await paginate_by_keys(
+            db, stmt, [ArtworkTrend.score, ArtworkTrend.artwork_id], cursor, limit, descending=True
+        )
+    else:
+        stmt = stmt.where(Artwork.is_public == True)
+        artworks, next_cursor = await paginate_desc(db, stmt, Artwork.created_at, Artwork.id, cursor, limit)
 
-    return templates.TemplateResponse(
+    return page_cache.store(cache_key, templates.TemplateResponse(
         "browse.html",
         {
             "request": request,
             "title": "Browse Art - ArtForge",
             "current_user": current_user,
             "artworks": artworks,
+            "next_cursor": next_cursor,
+            "limit": limit,
+            "is_first_page": cursor is None,
+            "sort": sort,
         }
-    )
+    ))
 
 
 @router.get("/art/{username}")
-async def user_gallery(username: str, request: Request, db: Session = Depends(get_db)):
+async def user_gallery(
+    username: str,
+    request: Request,
+    current_user: Optional[User] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
     """Display user's artwork gallery."""
-    current_user = get_current_user_from_cookie(request, db)
-    user = db.query(User).filter(User.username == username).first()
+    cache_key = page_cache.key_for(request, [artist_tag(username)])
+    cached = page_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    user = await db.scalar(select(User).where(User.username == username))
     
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
     # Get user's artworks
-    artworks = db.query(Artwork).filter(Artwork.artist_id == user.id).order_by(Artwork.created_at.desc()).all()
+    artworks = (await db.scalars(select(Artwork).where(Artwork.artist_id == user.id).options(
+        selectinload(Artwork.primary_image).selectinload(ArtworkImage.derivatives),
+    ).order_by(Artwork.created_at.desc()))).all()
     
     # Filter to public artworks if not the owner
     if not current_user or current_user.id != user.id:
@@ -99,7 +140,7 @@ async def user_gallery(username: str, request: Request, db: Session = Depends(ge
     
     is_owner = current_user and current_user.id == user.id
     
-    return templates.TemplateResponse(
+    return page_cache.store(cache_key, templates.TemplateResponse(
         "gallery.html",
         {
             "request": request,
@@ -109,14 +150,16 @@ async def user_gallery(username: str, request: Request, db: Session = Depends(ge
             "artworks": artworks,
             "is_owner": is_owner,
         }
-    )
+    ))
 
 
 @router.get("/art/{username}/upload")
-async def upload_artwork_page(username: str, request: Request, db: Session = Depends(get_db)):
+async def upload_artwork_page(
+    username: str,
+    request: Request,
+    current_user: Optional[User] = Depends(get_current_user)
+):
     """Display artwork upload page."""
-    current_user = get_current_user_from_cookie(request, db)
-    
     if not current_user or current_user.username != username:
         return RedirectResponse(url="/login", status_code=302)
     
@@ -135,110 +178,159 @@ async def upload_artwork(
     username: str,
     title: str = Form(...),
     description: str = Form(None),
+    tags: str = Form(None),
     is_public: bool = Form(True),
     images: List[UploadFile] = File(...),
     request: Request = None,
-    db: Session = Depends(get_db)
+    current_user: Optional[User] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Process artwork upload."""
-    current_user = get_current_user_from_cookie(request, db)
-    
     if not current_user or current_user.username != username:
         raise HTTPException(status_code=403, detail="Not authorized")
     
     if not images:
         raise HTTPException(status_code=400, detail="At least one image is required")
     
-    # Create artwork
-    slug = slugify(title)
-    # Ensure unique slug
-    base_slug = slug
-    counter = 1
-    while db.query(Artwork).filter(Artwork.slug == slug, Artwork.artist_id == current_user.id).first():
-        slug = f"{base_slug}-{counter}"
-        counter += 1
-    
-    artwork = Artwork(
-        title=title,
-        slug=slug,
-        description=description,
-        artist_id=current_user.id,
-        is_public=is_public
-    )
-    db.add(artwork)
-    db.commit()
-    db.refresh(artwork)
-    
-    # Save images
-    for idx, image_file in enumerate(images):
-        filename, width, height, file_size = save_uploaded_image(image_file)
+    # Stream every file to disk first so a rejected file leaves no artwork behind
+    content_store = get_content_store()
+    ingested = []
+    try:
+        for image_file in images:
+            ingested.append(await ingest_upload(image_file, content_store, db))
         
-        artwork_image = ArtworkImage(
-            artwork_id=artwork.id,
-            filename=filename,
-            original_filename=image_file.filename,
-            order=idx,
-            is_primary=(idx == 0),  # First image is primary
-            width=width,
-            height=height,
-            file_size=file_size
+        # Create artwork
+        slug = slugify(title)
+        # Ensure unique slug
+        base_slug = slug
+        counter = 1
+        while await db.scalar(select(Artwork.id).where(Artwork.slug == slug, Artwork.artist_id == current_user.id)):
+            slug = f"{base_slug}-{counter}"
+            counter += 1
+        
+        artwork = Artwork(
+            title=title,
+            slug=slug,
+            description=description,
+            artist_id=current_user.id,
+            is_public=is_public,
+            tags=await get_or_create_tags(db, tags),
         )
-        db.add(artwork_image)
+        db.add(artwork)
+        await db.commit()
+        await db.refresh(artwork)
+        
+        # Probing and derivatives happen in the image worker
+        artwork_images = []
+        for idx, (image_file, upload) in enumerate(zip(images, ingested)):
+            artwork_image = ArtworkImage(
+                artwork_id=artwork.id,
+                filename=upload.filename,
+                original_filename=image_file.filename,
+                order=idx,
+                is_primary=(idx == 0),  # First image is primary
+                file_size=upload.file_size,
+                content_hash=upload.content_hash
+            )
+            db.add(artwork_image)
+            artwork_images.append(artwork_image)
+        # Re-uploads of known content reuse the existing derivatives
+        unprocessed = await db.run_sync(reuse_processed_images, artwork_images)
+        jobs = [enqueue_image(db, artwork_image) for artwork_image in unprocessed]
+        
+        await db.commit()
+    except BaseException:
+        # Drop this request's references; files nobody else references go with them
+        await db.rollback()
+        await content_store.release(db, [upload.content_hash for upload in ingested], collect=True)
+        raise
+    # The image rows now hold their own references
+    await content_store.release(db, [upload.content_hash for upload in ingested])
+    page_cache.invalidate(*artwork_tags(username, slug))
     
-    db.commit()
+    if image_worker.running:
+        image_worker.notify()
+    else:
+        await run_in_threadpool(image_worker.run_inline, [job.id for job in jobs])
     
+    if request.headers.get("accept") == "application/json":
+        return JSONResponse({
+            "artwork_url": f"/art/{username}/{slug}",
+            "status_url": f"/art/{username}/{slug}/status",
+        })
     return RedirectResponse(url=f"/art/{username}/{slug}", status_code=302)
 
 
-@router.get("/art/{username}/{slug}")
-async def view_artwork(username: str, slug: str, request: Request, db: Session = Depends(get_db)):
-    """Display artwork detail page."""
-    current_user = get_current_user_from_cookie(request, db)
-    user = db.query(User).filter(User.username == username).first()
+@router.get("/art/{username}/{slug}/status")
+async def artwork_processing_status(
+    username: str,
+    slug: str,
+    request: Request,
+    current_user: Optional[User] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Report image-processing status for an artwork (polled by the upload page)."""
+    user = await db.scalar(select(User).where(User.username == username))
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    artwork = db.query(Artwork).filter(
+    artwork = await db.scalar(select(Artwork).options(selectinload(Artwork.images)).where(
         Artwork.slug == slug,
         Artwork.artist_id == user.id
-    ).first()
+    ))
 
     if not artwork:
         raise HTTPException(status_code=404, detail="Artwork not found")
 
-    # Check permissions
     is_owner = current_user and current_user.id == artwork.artist_id
     if not artwork.is_public and not is_owner:
         raise HTTPException(status_code=403, detail="This artwork is private")
 
-    # Get spark count and check if user has sparked
-    spark_count = len(artwork.sparks)
-    user_has_sparked = False
-
-    if current_user:
-        from ..models.spark import Spark
-        user_has_sparked = db.query(Spark).filter(
-            Spark.artwork_id == artwork.id,
-            Spark.user_id == current_user.id
-        ).first() is not None
+    statuses = [{"id": image.id, "status": image.status} for image in artwork.images]
+    if any(s["status"] == "processing" for s in statuses):
+        overall = "processing"
+    elif any(s["status"] == "failed" for s in statuses):
+        overall = "failed"
     else:
-        # Check by session ID for anonymous users
-        session_id = request.cookies.get("session_id")
-        if session_id:
-            from ..models.spark import Spark
-            user_has_sparked = db.query(Spark).filter(
-                Spark.artwork_id == artwork.id,
-                Spark.session_id == session_id
-            ).first() is not None
-
-    # Get comments
-    from ..models.comment import Comment
-    comments = db.query(Comment).filter(
-        Comment.artwork_id == artwork.id
-    ).order_by(Comment.created_at.desc()).all()
+        overall = "ready"
 
-    return templates.TemplateResponse(
+    return {"status": overall, "images": statuses}
+
+
+@router.get("/art/{username}/{slug}")
+async def view_artwork(
+    username: str,
+    slug: str,
+    request: Request,
+    current_user: Optional[User] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Display artwork detail page."""
+    # Anonymous sparkers see their own spark state, so skip the cache for them
+    cache_key = page_cache.key_for(request, [artwork_tag(username, slug)], vary_cookies=["session_id"])
+    cached = page_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    detail = await load_artwork_detail(
+        db,
+        username,
+        slug,
+        user_id=current_user.id if current_user else None,
+        session_id=request.cookies.get("session_id"),
+    )
+
+    if not detail:
+        raise HTTPException(status_code=404, detail="Artwork not found")
+    artwork = detail.artwork
+
+    # Check permissions
+    is_owner = current_user and current_user.id == artwork.artist_id
+    if not artwork.is_public and not is_owner:
+        raise HTTPException(status_code=403, detail="This artwork is private")
+
+    return page_cache.store(cache_key, templates.TemplateResponse(
         "artwork.html",
         {
             "request": request,
@@ -246,42 +338,53 @@ async def view_artwork(username: str, slug: str, request: Request, db: Session =
             "current_user": current_user,
             "artwork": artwork,
             "is_owner": is_owner,
-            "spark_count": spark_count,
-            "user_has_sparked": user_has_sparked,
-            "comments": comments,
+            "spark_count": detail.spark_count,
+            "user_has_sparked": detail.user_has_sparked,
+            "comments": detail.comments,
+            "comments_cursor": detail.comments_cursor,
         }
-    )
+    ))
 
 
 @router.post("/art/{username}/{slug}/delete")
-async def delete_artwork(username: str, slug: str, request: Request, db: Session = Depends(get_db)):
+async def delete_artwork(
+    username: str,
+    slug: str,
+    request: Request,
+    current_user: Optional[User] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Delete an artwork and its images."""
-    current_user = get_current_user_from_cookie(request, db)
-
     if not current_user or current_user.username != username:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    user = db.query(User).filter(User.username == username).first()
+    user = await db.scalar(select(User).where(User.username == username))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    artwork = db.query(Artwork).filter(
+    artwork = await db.scalar(select(Artwork).options(selectinload(Artwork.images)).where(
         Artwork.slug == slug,
         Artwork.artist_id == user.id
-    ).first()
+    ))
 
     if not artwork:
         raise HTTPException(status_code=404, detail="Artwork not found")
 
-    # Delete image files from disk
+    # Legacy flat-named files are owned by one image; delete them directly
+    content_store = get_content_store()
+    content_hashes = [image.content_hash for image in artwork.images]
     for image in artwork.images:
-        image_path = UPLOAD_DIR / image.filename
-        if image_path.exists():
-            image_path.unlink()
+        if not content_store.is_content_key(image.filename):
+            content_store.delete(image.filename)
 
-    # Delete from database (cascade will handle images)
-    db.delete(artwork)
-    db.commit()
+    # Delete from database (cascade will handle images and release their blobs)
+    spark_buffer.discard_artwork(artwork.id)
+    await db.delete(artwork)
+    await db.commit()
+    page_cache.invalidate(*artwork_tags(username, slug))
+
+    # Remove stored files no other artwork references
+    await db.run_sync(collect_blobs, content_store, content_hashes)
 
     return RedirectResponse(url=f"/art/{username}", status_code=302)
 
@@ -292,22 +395,21 @@ async def delete_artwork_image(
     slug: str,
     image_id: int,
     request: Request,
-    db: Session = Depends(get_db)
+    current_user: Optional[User] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a single image from an artwork."""
-    current_user = get_current_user_from_cookie(request, db)
-
     if not current_user or current_user.username != username:
         raise HTTPException(status_code=403, detail="Not authorized")
 
-    user = db.query(User).filter(User.username == username).first()
+    user = await db.scalar(select(User).where(User.username == username))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    artwork = db.query(Artwork).filter(
+    artwork = await db.scalar(select(Artwork).options(selectinload(Artwork.images)).where(
         Artwork.slug == slug,
         Artwork.artist_id == user.id
-    ).first()
+    ))
 
     if not artwork:
         raise HTTPException(status_code=404, detail="Artwork not found")
@@ -317,35 +419,41 @@ async def delete_artwork_image(
         raise HTTPException(status_code=400, detail="Cannot delete the last image. Delete the artwork instead.")
 
     # Find the image
-    image = db.query(ArtworkImage).filter(
+    image = await db.scalar(select(ArtworkImage).where(
         ArtworkImage.id == image_id,
         ArtworkImage.artwork_id == artwork.id
-    ).first()
+    ))
 
     if not image:
         raise HTTPException(status_code=404, detail="Image not found")
 
-    # Delete file from disk
-    image_path = UPLOAD_DIR / image.filename
-    if image_path.exists():
-        image_path.unlink()
+    # Legacy flat-named files are owned by this image; delete them directly
+    content_store = get_content_store()
+    if not content_store.is_content_key(image.filename):
+        content_store.delete(image.filename)
 
     # If this was the primary image, make the first remaining image primary
     was_primary = image.is_primary
+    content_hash = image.content_hash
 
-    # Delete from database
-    db.delete(image)
-    db.commit()
+    # Delete from database (releases the image's blob reference)
+    await db.delete(image)
+    await db.commit()
+
+    # Remove the stored file if no other image references it
+    await db.run_sync(collect_blobs, content_store, [content_hash])
 
     # Update primary image if needed
     if was_primary:
-        remaining_images = db.query(ArtworkImage).filter(
+        remaining_images = (await db.scalars(select(ArtworkImage).where(
             ArtworkImage.artwork_id == artwork.id
-        ).order_by(ArtworkImage.order).all()
+        ).order_by(ArtworkImage.order))).all()
 
         if remaining_images:
             remaining_images[0].is_primary = True
-            db.commit()
+            await db.commit()
+
+    page_cache.invalidate(*artwork_tags(username, slug))
 
     return RedirectResponse(url=f"/art/{username}/{slug}", status_code=302)
 
@@ -2,30 +2,59 @@
 
 from fastapi import APIRouter, Depends, Request, Form, Response
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
-from sqlalchemy.orm import Session
-from pathlib import Path
-from ..database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from ..database import get_async_db, get_async_read_db
 from ..models.user import User
 from ..auth import (
     authenticate_user,
     create_access_token,
-    get_password_hash,
-    get_current_user_from_cookie,
+    get_password_hash_async,
+    get_current_user,
+    user_cache,
 )
+from ..config import settings
+from ..rate_limit import TokenBucketLimiter
+from ..templating import templates
 
 router = APIRouter()
 
-# Setup templates
-BASE_DIR = Path(__file__).parent.parent
-TEMPLATES_DIR = BASE_DIR / "templates"
-templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
+# /art/<name> pages that a gallery at /art/<username> would collide with
+RESERVED_USERNAMES = {"browse", "login", "logout", "media", "register", "search", "series", "static", "tags", "uploads"}
+
+# Every login attempt spends from its client IP's bucket. Only failed ones spend
+# from the username's, which slows guessing at one account from many IPs; a
+# successful login refills it.
+login_ip_limiter = TokenBucketLimiter(settings.login_ip_burst, settings.login_ip_per_minute)
+login_user_limiter = TokenBucketLimiter(settings.login_user_burst, settings.login_user_per_minute)
+
+
+def _client_ip(request: Request) -> str:
+    """The address the per-IP login bucket is keyed on.
+
+    `request.client` is the TCP peer unless uvicorn already resolved
+    X-Forwarded-For (artforge-server always does). Under plain `uvicorn`
+    behind nginx the peer is the proxy, and every login would share its
+    bucket, so a peer listed in SERVER_FORWARDED_ALLOW_IPS is looked
+    through here too: the client is the last forwarded hop that isn't a
+    trusted proxy.
+    """
+    peer = request.client.host if request.client else "unknown"
+    trusted = {address.strip() for address in settings.server_forwarded_allow_ips.split(",")}
+    forwarded = request.headers.get("x-forwarded-for")
+    if not forwarded or ("*" not in trusted and peer not in trusted):
+        return peer
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if "*" not in trusted and hop not in trusted:
+            return hop
+    return hops[0] if hops else peer
 
 
 @router.get("/art/login", response_class=HTMLResponse)
-async def login_page(request: Request, db: Session = Depends(get_db)):
+async def login_page(request: Request, current_user: Optional[User] = Depends(get_current_user)):
     """Display login page."""
-    current_user = get_current_user_from_cookie(request, db)
     if current_user:
         return RedirectResponse(url=f"/art/{current_user.username}", status_code=302)
 
@@ -35,16 +64,40 @@ async def login_page(request: Request, db: Session = Depends(get_db)):
     )
 
 
+def _login_throttled(request: Request, retry_after: float) -> HTMLResponse:
+    seconds = max(1, int(retry_after + 0.999))
+    return templates.TemplateResponse(
+        "login.html",
+        {
+            "request": request,
+            "title": "Login - ArtForge",
+            "error": f"Too many login attempts. Please try again in {seconds} seconds.",
+        },
+        status_code=429,
+        headers={"Retry-After": str(seconds)},
+    )
+
+
 @router.post("/art/login")
 async def login(
+    request: Request,
     username: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """Process login form."""
-    user = authenticate_user(db, username, password)
+    # Throttle before any bcrypt work is queued
+    client_ip = _client_ip(request)
+    user_key = username.strip().lower()
+    retry_after = login_user_limiter.retry_after(user_key) or login_ip_limiter.consume(client_ip)
+    if retry_after:
+        return _login_throttled(request, retry_after)
+
+    user = await authenticate_user(db, username, password)
     if not user:
+        login_user_limiter.consume(user_key)
         return RedirectResponse(url="/art/login?error=invalid", status_code=302)
+    login_user_limiter.reset(user_key)
     
     access_token = create_access_token(data={"sub": user.username})
     response = RedirectResponse(url=f"/art/{user.username}", status_code=302)
@@ -59,9 +112,8 @@ async def login(
 
 
 @router.get("/art/register", response_class=HTMLResponse)
-async def register_page(request: Request, db: Session = Depends(get_db)):
+async def register_page(request: Request, current_user: Optional[User] = Depends(get_current_user)):
     """Display registration page."""
-    current_user = get_current_user_from_cookie(request, db)
     if current_user:
         return RedirectResponse(url=f"/art/{current_user.username}", status_code=302)
 
@@ -77,22 +129,22 @@ async def register(
     email: str = Form(None),
     password: str = Form(...),
     full_name: str = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Process registration form."""
     # Check if username already exists
-    existing_user = db.query(User).filter(User.username == username).first()
-    if existing_user:
+    existing_user = await db.scalar(select(User).where(User.username == username))
+    if existing_user or username.lower() in RESERVED_USERNAMES:
         return RedirectResponse(url="/art/register?error=username_exists", status_code=302)
     
     # Check if email already exists
     if email:
-        existing_email = db.query(User).filter(User.email == email).first()
+        existing_email = await db.scalar(select(User).where(User.email == email))
         if existing_email:
             return RedirectResponse(url="/art/register?error=email_exists", status_code=302)
     
     # Create new user
-    hashed_password = get_password_hash(password)
+    hashed_password = await get_password_hash_async(password)
     new_user = User(
         username=username,
         email=email,
@@ -100,8 +152,8 @@ async def register(
         full_name=full_name
     )
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     
     # Log them in
     access_token = create_access_token(data={"sub": new_user.username})
@@ -117,8 +169,9 @@ async def register(
 
 
 @router.get("/art/logout")
-async def logout():
+async def logout(request: Request):
     """Logout user."""
+    user_cache.discard(request.cookies.get("access_token"))
     response = RedirectResponse(url="/art/", status_code=302)
     response.delete_cookie("access_token")
     return response
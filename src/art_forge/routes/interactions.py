@@ -1,14 +1,20 @@
 """Routes for sparks (likes) and comments."""
 
+from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import RedirectResponse, JSONResponse
-from sqlalchemy.orm import Session
-from ..database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..database import get_async_db, get_async_read_db
 from ..models.user import User
 from ..models.artwork import Artwork
-from ..models.spark import Spark
 from ..models.comment import Comment
-from ..auth import get_current_user_from_cookie
+from ..artwork_detail import load_comment_page
+from ..auth import get_current_user
+from ..config import settings
+from ..pagination import clamp_limit
+from ..page_cache import BROWSE_TAG, artwork_tag, artwork_tags, page_cache
+from ..spark_buffer import spark_buffer
 import uuid
 
 router = APIRouter()
@@ -19,59 +25,43 @@ async def toggle_spark(
     username: str,
     slug: str,
     request: Request,
-    db: Session = Depends(get_db)
+    current_user: Optional[User] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
-    """Toggle a spark (like) on an artwork."""
-    current_user = get_current_user_from_cookie(request, db)
-    
+    """Toggle a spark (like) on an artwork.
+
+    The change is buffered and written in a batch (see spark_buffer), so
+    this only reads; the returned count includes buffered toggles.
+    """
     # Get the artwork
-    user = db.query(User).filter(User.username == username).first()
+    user = await db.scalar(select(User).where(User.username == username))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    artwork = db.query(Artwork).filter(
+    artwork = await db.scalar(select(Artwork).where(
         Artwork.slug == slug,
         Artwork.artist_id == user.id
-    ).first()
+    ))
     
     if not artwork:
         raise HTTPException(status_code=404, detail="Artwork not found")
     
-    # Check if user already sparked
-    if current_user:
-        existing_spark = db.query(Spark).filter(
-            Spark.artwork_id == artwork.id,
-            Spark.user_id == current_user.id
-        ).first()
-    else:
+    session_id = None
+    if not current_user:
         # For anonymous users, use session ID
         session_id = request.cookies.get("session_id")
         if not session_id:
             session_id = str(uuid.uuid4())
-        
-        existing_spark = db.query(Spark).filter(
-            Spark.artwork_id == artwork.id,
-            Spark.session_id == session_id
-        ).first()
-    
-    if existing_spark:
-        # Remove spark (unlike)
-        db.delete(existing_spark)
-        db.commit()
-        sparked = False
-    else:
-        # Add spark (like)
-        new_spark = Spark(
-            artwork_id=artwork.id,
-            user_id=current_user.id if current_user else None,
-            session_id=session_id if not current_user else None
-        )
-        db.add(new_spark)
-        db.commit()
-        sparked = True
-    
-    # Get updated count
-    spark_count = db.query(Spark).filter(Spark.artwork_id == artwork.id).count()
+    
+    # Spark counts show on the artwork page, the gallery and browse; their
+    # cached copies are invalidated when the toggle is written
+    sparked, spark_count = await spark_buffer.toggle(
+        db,
+        artwork,
+        user_id=current_user.id if current_user else None,
+        session_id=session_id,
+        tags=artwork_tags(username, slug),
+    )
     
     # Return JSON for AJAX or redirect for form submission
     if request.headers.get("accept") == "application/json":
@@ -89,25 +79,72 @@ async def toggle_spark(
         return response
 
 
+@router.get("/art/{username}/{slug}/comments")
+async def list_comments(
+    username: str,
+    slug: str,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    current_user: Optional[User] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """One page of an artwork's comments as JSON, newest first.
+
+    Pass the returned `next_cursor` back as `cursor` for the next page.
+    """
+    artwork = await db.scalar(select(Artwork).join(Artwork.artist).where(
+        User.username == username,
+        Artwork.slug == slug
+    ))
+    
+    if not artwork:
+        raise HTTPException(status_code=404, detail="Artwork not found")
+    
+    is_owner = current_user is not None and current_user.id == artwork.artist_id
+    if not artwork.is_public and not is_owner:
+        raise HTTPException(status_code=403, detail="This artwork is private")
+    
+    limit = clamp_limit(limit, settings.comments_page_size, settings.comments_max_page_size)
+    comments, next_cursor = await load_comment_page(db, artwork.id, cursor, limit)
+    
+    return {
+        "comments": [
+            {
+                "id": comment.id,
+                "author": comment.author.username if comment.author else comment.author_name,
+                "content": comment.content,
+                "created_at": comment.created_at.isoformat() if comment.created_at else None,
+                "created_display": (
+                    comment.created_at.strftime('%B %d, %Y at %I:%M %p') if comment.created_at else 'Recently'
+                ),
+                "can_delete": current_user is not None and (
+                    current_user.id == comment.author_id or is_owner
+                ),
+            }
+            for comment in comments
+        ],
+        "next_cursor": next_cursor,
+    }
+
+
 @router.post("/art/{username}/{slug}/comment")
 async def add_comment(
     username: str,
     slug: str,
     request: Request,
-    db: Session = Depends(get_db)
+    current_user: Optional[User] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Add a comment to an artwork."""
-    current_user = get_current_user_from_cookie(request, db)
-    
     # Get the artwork
-    user = db.query(User).filter(User.username == username).first()
+    user = await db.scalar(select(User).where(User.username == username))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    artwork = db.query(Artwork).filter(
+    artwork = await db.scalar(select(Artwork).where(
         Artwork.slug == slug,
         Artwork.artist_id == user.id
-    ).first()
+    ))
     
     if not artwork:
         raise HTTPException(status_code=404, detail="Artwork not found")
@@ -134,7 +171,8 @@ async def add_comment(
         content=content
     )
     db.add(new_comment)
-    db.commit()
+    await db.commit()
+    page_cache.invalidate(artwork_tag(username, slug), BROWSE_TAG)
     
     return RedirectResponse(url=f"/art/{username}/{slug}#comments", status_code=302)
 
@@ -145,32 +183,31 @@ async def delete_comment(
     slug: str,
     comment_id: int,
     request: Request,
-    db: Session = Depends(get_db)
+    current_user: Optional[User] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Delete a comment (owner or comment author only)."""
-    current_user = get_current_user_from_cookie(request, db)
-    
     if not current_user:
         raise HTTPException(status_code=403, detail="Must be logged in to delete comments")
     
     # Get the artwork
-    user = db.query(User).filter(User.username == username).first()
+    user = await db.scalar(select(User).where(User.username == username))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    artwork = db.query(Artwork).filter(
+    artwork = await db.scalar(select(Artwork).where(
         Artwork.slug == slug,
         Artwork.artist_id == user.id
-    ).first()
+    ))
     
     if not artwork:
         raise HTTPException(status_code=404, detail="Artwork not found")
     
     # Get the comment
-    comment = db.query(Comment).filter(
+    comment = await db.scalar(select(Comment).where(
         Comment.id == comment_id,
         Comment.artwork_id == artwork.id
-    ).first()
+    ))
     
     if not comment:
         raise HTTPException(status_code=404, detail="Comment not found")
@@ -179,8 +216,9 @@ async def delete_comment(
     if current_user.id != comment.author_id and current_user.id != artwork.artist_id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this comment")
     
-    db.delete(comment)
-    db.commit()
+    await db.delete(comment)
+    await db.commit()
+    page_cache.invalidate(artwork_tag(username, slug), BROWSE_TAG)
     
     return RedirectResponse(url=f"/art/{username}/{slug}#comments", status_code=302)
 
@@ -0,0 +1,190 @@
+"""Tag and series listing routes."""
+
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from ..auth import get_current_user
+from ..config import settings
+from ..database import get_async_read_db
+from ..models.artwork import Artwork, ArtworkImage
+from ..models.series import ArtworkSeries, Series
+from ..models.tag import Tag, artwork_tags
+from ..models.user import User
+from ..page_cache import BROWSE_TAG, page_cache
+from ..pagination import clamp_limit, paginate_by_keys
+from ..templating import templates
+
+router = APIRouter()
+
+# Tags shown on the popular tags page
+POPULAR_TAGS = 100
+
+
+def _public_artworks():
+    """Public artworks with what an artwork card renders."""
+    return select(Artwork).where(Artwork.is_public == True).options(
+        joinedload(Artwork.artist),
+        selectinload(Artwork.primary_image).selectinload(ArtworkImage.derivatives),
+    )
+
+
+def _artworks_json(artworks: List[Artwork], next_cursor: Optional[str]) -> dict:
+    return {
+        "artworks": [
+            {
+                "title": artwork.title,
+                "artist": artwork.artist.username,
+                "url": f"/art/{artwork.artist.username}/{artwork.slug}",
+            }
+            for artwork in artworks
+        ],
+        "next_cursor": next_cursor,
+    }
+
+
+@router.get("/art/tags")
+async def popular_tags(
+    request: Request,
+    current_user: Optional[User] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """The most used tags, read in count order from the stored usage counts."""
+    wants_json = request.headers.get("accept") == "application/json"
+    # Counts change with uploads and deletes, which invalidate browse
+    cache_key = None if wants_json else page_cache.key_for(request, [BROWSE_TAG])
+    cached = page_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Walks ix_tags_artwork_count backwards; ties come out newest tag first
+    tags = (await db.scalars(
+        select(Tag)
+        .where(Tag.artwork_count > 0)
+        .order_by(Tag.artwork_count.desc(), Tag.id.desc())
+        .limit(POPULAR_TAGS)
+    )).all()
+
+    if wants_json:
+        return JSONResponse({
+            "tags": [
+                {"name": tag.name, "slug": tag.slug, "artwork_count": tag.artwork_count}
+                for tag in tags
+            ],
+        })
+
+    return page_cache.store(cache_key, templates.TemplateResponse(
+        "tags.html",
+        {
+            "request": request,
+            "title": "Popular Tags - ArtForge",
+            "current_user": current_user,
+            "tags": tags,
+            "max_count": tags[0].artwork_count if tags else 0,
+        }
+    ))
+
+
+@router.get("/art/tags/{slug}")
+async def tag_artworks(
+    slug: str,
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    current_user: Optional[User] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Public artworks with a tag, newest first, one keyset page at a time."""
+    wants_json = request.headers.get("accept") == "application/json"
+    cache_key = None if wants_json else page_cache.key_for(request, [BROWSE_TAG])
+    cached = page_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    tag = await db.scalar(select(Tag).where(Tag.slug == slug))
+    if not tag:
+        raise HTTPException(status_code=404, detail="Tag not found")
+    limit = clamp_limit(limit, settings.browse_page_size, settings.browse_max_page_size)
+
+    # Artwork ids grow with upload time, so (tag_id, artwork_id) DESC is newest first
+    stmt = _public_artworks().join(artwork_tags, artwork_tags.c.artwork_id == Artwork.id).where(
+        artwork_tags.c.tag_id == tag.id
+    )
+    artworks, next_cursor = await paginate_by_keys(
+        db, stmt, [artwork_tags.c.artwork_id], cursor, limit, descending=True
+    )
+
+    if wants_json:
+        return JSONResponse({
+            "tag": {"name": tag.name, "slug": tag.slug, "artwork_count": tag.artwork_count},
+            **_artworks_json(artworks, next_cursor),
+        })
+
+    return page_cache.store(cache_key, templates.TemplateResponse(
+        "listing.html",
+        {
+            "request": request,
+            "title": f"#{tag.name} - ArtForge",
+            "current_user": current_user,
+            "heading": f"#{tag.name}",
+            "subtitle": f"{tag.artwork_count} artwork{'s' if tag.artwork_count != 1 else ''}",
+            "base_url": f"/art/tags/{tag.slug}",
+            "artworks": artworks,
+            "next_cursor": next_cursor,
+            "limit": limit,
+            "is_first_page": cursor is None,
+        }
+    ))
+
+
+@router.get("/art/series/{slug}")
+async def series_artworks(
+    slug: str,
+    request: Request,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    current_user: Optional[User] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Public artworks in a series, in series order, one keyset page at a time."""
+    wants_json = request.headers.get("accept") == "application/json"
+    cache_key = None if wants_json else page_cache.key_for(request, [BROWSE_TAG])
+    cached = page_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    series = await db.scalar(select(Series).where(Series.slug == slug))
+    if not series:
+        raise HTTPException(status_code=404, detail="Series not found")
+    limit = clamp_limit(limit, settings.browse_page_size, settings.browse_max_page_size)
+
+    stmt = _public_artworks().join(ArtworkSeries, ArtworkSeries.artwork_id == Artwork.id).where(
+        ArtworkSeries.series_id == series.id
+    )
+    artworks, next_cursor = await paginate_by_keys(
+        db, stmt, [ArtworkSeries.position, ArtworkSeries.artwork_id], cursor, limit
+    )
+
+    if wants_json:
+        return JSONResponse({
+            "series": {"name": series.name, "slug": series.slug, "description": series.description},
+            **_artworks_json(artworks, next_cursor),
+        })
+
+    return page_cache.store(cache_key, templates.TemplateResponse(
+        "listing.html",
+        {
+            "request": request,
+            "title": f"{series.name} - ArtForge",
+            "current_user": current_user,
+            "heading": series.name,
+            "subtitle": series.description or "A series",
+            "base_url": f"/art/series/{series.slug}",
+            "artworks": artworks,
+            "next_cursor": next_cursor,
+            "limit": limit,
+            "is_first_page": cursor is None,
+        }
+    ))
@@ -0,0 +1,118 @@
+"""Routes for serving stored files.
+
+Stored files never change under a given key (originals are named by
+their SHA-256, derivatives by the original's), so they are served with a
+year-long immutable Cache-Control and a strong ETag. With
+`settings.uploads_accel_redirect` set, the app only checks the request
+and leaves sending the bytes to nginx via X-Accel-Redirect.
+"""
+
+import hashlib
+import mimetypes
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, RedirectResponse, Response
+from starlette.concurrency import run_in_threadpool
+from ..config import settings
+from ..storage import ContentStore, LocalStorage, get_storage
+
+router = APIRouter()
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def _check_key(key: str) -> None:
+    # No traversal, and nothing from hidden directories such as .incoming
+    if not key or any(part in ("", "..") or part.startswith(".") for part in key.split("/")):
+        raise HTTPException(status_code=404, detail="Not found")
+
+
+@lru_cache(maxsize=4096)
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    # mtime and size are part of the cache key so a rewritten file is re-hashed
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def strong_etag(key: str, path: Path, stat_result: os.stat_result) -> str:
+    """Strong ETag for a stored file: its SHA-256.
+
+    Content-addressed originals carry the hash in their name; other files
+    (derivatives, legacy flat names) are hashed once per version.
+    """
+    if ContentStore.is_content_key(key):
+        content_hash = key.rsplit("/", 1)[-1].split(".", 1)[0]
+    else:
+        content_hash = _file_digest(str(path), stat_result.st_mtime_ns, stat_result.st_size)
+    return f'"{content_hash}"'
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if header is None:
+        return False
+    candidates = [tag.strip() for tag in header.split(",")]
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    return "*" in candidates or any((tag[2:] if tag.startswith("W/") else tag) == etag for tag in candidates)
+
+
+def _media_type(key: str) -> str:
+    return mimetypes.guess_type(key)[0] or "application/octet-stream"
+
+
+class ImmutableFileResponse(FileResponse):
+    """FileResponse that honours If-Range against our strong ETag."""
+
+    def _should_use_range(self, http_if_range: str, stat_result: os.stat_result) -> bool:
+        return http_if_range == self.headers.get("etag")
+
+
+@router.api_route("/art/uploads/{key:path}", methods=["GET", "HEAD"])
+async def serve_upload(key: str, request: Request):
+    """Serve a file from local storage with long-lived caching.
+
+    Answers If-None-Match with 304; Range and If-Range requests are
+    handled by the file response (or by nginx with X-Accel-Redirect).
+    """
+    _check_key(key)
+    storage = get_storage()
+    if not isinstance(storage, LocalStorage):
+        # Remote backends are linked directly or through /art/media
+        raise HTTPException(status_code=404, detail="Not found")
+
+    path = storage.path(key)
+    try:
+        stat_result = await run_in_threadpool(path.stat)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Not found")
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Not found")
+
+    etag = await run_in_threadpool(strong_etag, key, path, stat_result)
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "ETag": etag}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if settings.uploads_accel_redirect:
+        # nginx serves the bytes (including ranges) from its internal location
+        headers["X-Accel-Redirect"] = settings.uploads_accel_redirect.rstrip("/") + "/" + key
+        return Response(headers=headers, media_type=_media_type(key))
+
+    return ImmutableFileResponse(path, headers=headers, media_type=_media_type(key), stat_result=stat_result)
+
+
+@router.get("/art/media/{key:path}")
+async def media_redirect(key: str):
+    """Redirect to a (presigned) URL the client can fetch a stored file from."""
+    _check_key(key)
+
+    response = RedirectResponse(url=get_storage().presign(key, settings.s3_presign_expiry), status_code=302)
+    # Let browsers reuse the redirect while the signature is still valid
+    response.headers["Cache-Control"] = f"private, max-age={settings.s3_presign_expiry // 2}"
+    return response
@@ -0,0 +1,84 @@
+"""Full-text search route."""
+
+from typing import Optional
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from ..auth import get_current_user
+from ..config import settings
+from ..database import get_async_read_db
+from ..models.artwork import Artwork, ArtworkImage
+from ..models.user import User
+from ..page_cache import BROWSE_TAG, page_cache
+from ..pagination import clamp_limit
+from ..search import search_artworks
+from ..templating import templates
+
+router = APIRouter()
+
+# Ranked results page by offset; keep deep pages from scanning the whole index
+MAX_SEARCH_PAGE = 50
+
+
+@router.get("/art/search")
+async def search(
+    request: Request,
+    q: str = "",
+    page: int = 1,
+    limit: Optional[int] = None,
+    current_user: Optional[User] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """Search public artworks by title, description, tags, series and artist.
+
+    Every word must match, as a prefix. Results are ranked by relevance.
+    """
+    wants_json = request.headers.get("accept") == "application/json"
+    # Results change whenever browse does (uploads, deletes, engagement)
+    cache_key = None if wants_json else page_cache.key_for(request, [BROWSE_TAG])
+    cached = page_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    query = q.strip()[:200]
+    page = min(max(page, 1), MAX_SEARCH_PAGE)
+    limit = clamp_limit(limit, settings.browse_page_size, settings.browse_max_page_size)
+
+    result = await search_artworks(db, query, (page - 1) * limit, limit)
+    artworks = []
+    if result.artwork_ids:
+        loaded = (await db.scalars(select(Artwork).where(Artwork.id.in_(result.artwork_ids)).options(
+            joinedload(Artwork.artist),
+            selectinload(Artwork.primary_image).selectinload(ArtworkImage.derivatives),
+        ))).all()
+        by_id = {artwork.id: artwork for artwork in loaded}
+        artworks = [by_id[artwork_id] for artwork_id in result.artwork_ids if artwork_id in by_id]
+    next_page = page + 1 if result.has_more and page < MAX_SEARCH_PAGE else None
+
+    if wants_json:
+        return JSONResponse({
+            "results": [
+                {
+                    "title": artwork.title,
+                    "artist": artwork.artist.username,
+                    "url": f"/art/{artwork.artist.username}/{artwork.slug}",
+                }
+                for artwork in artworks
+            ],
+            "next_page": next_page,
+        })
+
+    return page_cache.store(cache_key, templates.TemplateResponse(
+        "search.html",
+        {
+            "request": request,
+            "title": f"Search: {query} - ArtForge" if query else "Search - ArtForge",
+            "current_user": current_user,
+            "query": query,
+            "artworks": artworks,
+            "next_page": next_page,
+            "limit": limit,
+        }
+    ))
@@ -0,0 +1,253 @@
+"""Full-text search over artworks.
+
+Each artwork has one search document holding its title, description,
+tag names, series names and artist username. On SQLite the documents
+live in an FTS5 table (`artwork_search`, rowid = artwork id) and are
+ranked with bm25. On PostgreSQL they are a weighted tsvector in an
+`artwork_search` table with a GIN index, ranked with ts_rank_cd. Both
+use plain word splitting without stemming, and every query term
+matches as a prefix, so "sun" finds "sunset".
+
+Documents are kept current by a Session `after_flush` hook. Any flush
+that adds, edits or deletes an artwork rebuilds that artwork's document
+in the same transaction. The same goes for changes to its tags, its
+series, or a tag, series or artist name it shows. `artforge
+reindex-search` rebuilds everything.
+"""
+
+import re
+from typing import Dict, Iterable, List, NamedTuple, Set, Tuple
+from sqlalchemy import bindparam, event, inspect, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .models.artwork import Artwork
+from .models.series import ArtworkSeries, Series
+from .models.tag import Tag, artwork_tags
+from .models.user import User
+
+SEARCH_TABLE = "artwork_search"
+
+# Relative weight of each field: a title hit outranks a description hit
+FIELD_WEIGHTS = {"title": 10.0, "description": 2.0, "tags": 5.0, "series": 5.0, "artist": 3.0}
+_PG_FIELD_CLASSES = {"title": "A", "tags": "B", "series": "B", "artist": "C", "description": "D"}
+
+_BATCH = 500
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+class SearchPage(NamedTuple):
+    """One page of ranked search results."""
+
+    artwork_ids: List[int]
+    has_more: bool
+
+
+def query_terms(query: str, max_terms: int = 8) -> List[str]:
+    """Split a user query into lowercase words (punctuation and operators dropped)."""
+    return _WORD.findall(query.lower())[:max_terms]
+
+
+def _chunks(ids: List[int]) -> Iterable[List[int]]:
+    for start in range(0, len(ids), _BATCH):
+        yield ids[start:start + _BATCH]
+
+
+def _documents(connection: Connection, artwork_ids: List[int]) -> List[Dict[str, object]]:
+    """Build search documents for the given artworks from the source tables."""
+    rows = connection.execute(
+        select(Artwork.id, Artwork.title, Artwork.description, User.username)
+        .join(User, User.id == Artwork.artist_id)
+        .where(Artwork.id.in_(artwork_ids))
+    ).all()
+    tags: Dict[int, List[str]] = {}
+    for artwork_id, name in connection.execute(
+        select(artwork_tags.c.artwork_id, Tag.name)
+        .join(Tag, Tag.id == artwork_tags.c.tag_id)
+        .where(artwork_tags.c.artwork_id.in_(artwork_ids))
+    ):
+        tags.setdefault(artwork_id, []).append(name)
+    series: Dict[int, List[str]] = {}
+    for artwork_id, name in connection.execute(
+        select(ArtworkSeries.artwork_id, Series.name)
+        .join(Series, Series.id == ArtworkSeries.series_id)
+        .where(ArtworkSeries.artwork_id.in_(artwork_ids))
+    ):
+        series.setdefault(artwork_id, []).append(name)
+
+    return [
+        {
+            "id": artwork_id,
+            "title": title or "",
+            "description": description or "",
+            "tags": " ".join(tags.get(artwork_id, [])),
+            "series": " ".join(series.get(artwork_id, [])),
+            "artist": username or "",
+        }
+        for artwork_id, title, description, username in rows
+    ]
+
+
+def remove_artworks(connection: Connection, artwork_ids: Iterable[int]) -> None:
+    """Drop the search documents of deleted artworks."""
+    ids = list(artwork_ids)
+    dialect = connection.dialect.name
+    if not ids or dialect not in ("sqlite", "postgresql"):
+        return
+    key = "rowid" if dialect == "sqlite" else "artwork_id"
+    stmt = text(f"DELETE FROM {SEARCH_TABLE} WHERE {key} IN :ids").bindparams(bindparam("ids", expanding=True))
+    for chunk in _chunks(ids):
+        connection.execute(stmt, {"ids": chunk})
+
+
+def index_artworks(connection: Connection, artwork_ids: Iterable[int]) -> None:
+    """(Re)build the search documents of the given artworks."""
+    ids = list(artwork_ids)
+    dialect = connection.dialect.name
+    if not ids or dialect not in ("sqlite", "postgresql"):
+        return
+    for chunk in _chunks(ids):
+        documents = _documents(connection, chunk)
+        if dialect == "sqlite":
+            remove_artworks(connection, chunk)
+            if documents:
+                connection.execute(
+                    text(
+                        f"INSERT INTO {SEARCH_TABLE} (rowid, title, description, tags, series, artist)"
+                        " VALUES (:id, :title, :description, :tags, :series, :artist)"
+                    ),
+                    documents,
+                )
+        elif documents:
+            vector = " || ".join(
+                f"setweight(to_tsvector('simple', :{field}), '{weight}')"
+                for field, weight in _PG_FIELD_CLASSES.items()
+            )
+            connection.execute(
+                text(
+                    f"INSERT INTO {SEARCH_TABLE} (artwork_id, document) VALUES (:id, {vector})"
+                    " ON CONFLICT (artwork_id) DO UPDATE SET document = EXCLUDED.document"
+                ),
+                documents,
+            )
+
+
+def reindex_all(connection: Connection) -> int:
+    """Rebuild every search document; returns the number of artworks indexed."""
+    if connection.dialect.name not in ("sqlite", "postgresql"):
+        return 0
+    connection.execute(text(f"DELETE FROM {SEARCH_TABLE}"))
+    ids = list(connection.scalars(select(Artwork.id).order_by(Artwork.id)))
+    index_artworks(connection, ids)
+    return len(ids)
+
+
+def _search_sql(dialect: str) -> str:
+    if dialect == "sqlite":
+        weights = ", ".join(str(weight) for weight in FIELD_WEIGHTS.values())
+        return (
+            f"SELECT artworks.id FROM {SEARCH_TABLE}"
+            f" JOIN artworks ON artworks.id = {SEARCH_TABLE}.rowid"
+            f" WHERE {SEARCH_TABLE} MATCH :query AND artworks.is_public = 1"
+            f" ORDER BY bm25({SEARCH_TABLE}, {weights}), artworks.id DESC"
+            " LIMIT :limit OFFSET :offset"
+        )
+    return (
+        f"SELECT artworks.id FROM {SEARCH_TABLE} AS s"
+        " JOIN artworks ON artworks.id = s.artwork_id, to_tsquery('simple', :query) AS q"
+        " WHERE s.document @@ q AND artworks.is_public"
+        " ORDER BY ts_rank_cd(s.document, q) DESC, artworks.id DESC"
+        " LIMIT :limit OFFSET :offset"
+    )
+
+
+def _match_expression(dialect: str, terms: List[str]) -> str:
+    if dialect == "sqlite":
+        # Quoted so words like AND/NEAR are plain terms; * makes each a prefix
+        return " ".join(f'"{term}"*' for term in terms)
+    return " & ".join(f"{term}:*" for term in terms)
+
+
+async def search_artworks(db: AsyncSession, query: str, offset: int, limit: int) -> SearchPage:
+    """Ids of public artworks matching every term of `query`, best match first."""
+    terms = query_terms(query)
+    if not terms:
+        return SearchPage([], False)
+
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        rows = await db.scalars(
+            text(_search_sql(dialect)),
+            {"query": _match_expression(dialect, terms), "limit": limit + 1, "offset": offset},
+        )
+    else:
+        # No full-text index on other backends; match titles only
+        stmt = select(Artwork.id).where(Artwork.is_public == True)
+        for term in terms:
+            stmt = stmt.where(Artwork.title.ilike(f"%{term}%"))
+        rows = await db.scalars(stmt.order_by(Artwork.id.desc()).limit(limit + 1).offset(offset))
+
+    ids = list(rows)
+    return SearchPage(ids[:limit], len(ids) > limit)
+
+
+def _changed(obj, *attributes: str) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in attributes)
+
+
+def _affected_artworks(session: Session) -> Tuple[Set[int], Set[int]]:
+    """(artwork ids to reindex, artwork ids to drop) for the flush just done."""
+    reindex: Set[int] = set()
+    removed: Set[int] = set()
+    renamed_tags: Set[int] = set()
+    renamed_series: Set[int] = set()
+    renamed_users: Set[int] = set()
+
+    for obj in session.new:
+        if isinstance(obj, Artwork):
+            reindex.add(obj.id)
+        elif isinstance(obj, ArtworkSeries):
+            reindex.add(obj.artwork_id)
+    for obj in session.dirty:
+        if isinstance(obj, Artwork) and _changed(obj, "title", "description", "artist_id", "tags"):
+            reindex.add(obj.id)
+        elif isinstance(obj, ArtworkSeries) and _changed(obj, "artwork_id", "series_id"):
+            reindex.add(obj.artwork_id)
+            reindex.update(value for value in inspect(obj).attrs.artwork_id.history.deleted if value)
+        elif isinstance(obj, Tag) and _changed(obj, "name"):
+            renamed_tags.add(obj.id)
+        elif isinstance(obj, Series) and _changed(obj, "name"):
+            renamed_series.add(obj.id)
+        elif isinstance(obj, User) and _changed(obj, "username"):
+            renamed_users.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Artwork):
+            removed.add(obj.id)
+        elif isinstance(obj, ArtworkSeries):
+            reindex.add(obj.artwork_id)
+
+    if renamed_tags or renamed_series or renamed_users:
+        connection = session.connection()
+        if renamed_tags:
+            reindex.update(connection.scalars(
+                select(artwork_tags.c.artwork_id).where(artwork_tags.c.tag_id.in_(renamed_tags))
+            ))
+        if renamed_series:
+            reindex.update(connection.scalars(
+                select(ArtworkSeries.artwork_id).where(ArtworkSeries.series_id.in_(renamed_series))
+            ))
+        if renamed_users:
+            reindex.update(connection.scalars(
+                select(Artwork.id).where(Artwork.artist_id.in_(renamed_users))
+            ))
+    return reindex - removed, removed
+
+
+@event.listens_for(Session, "after_flush")
+def _update_search_index(session, flush_context):
+    reindex, removed = _affected_artworks(session)
+    if reindex or removed:
+        connection = session.connection()
+        remove_artworks(connection, removed)
+        index_artworks(connection, reindex)
@@ -0,0 +1,265 @@
+"""Multi-worker server launcher (the `artforge-server` command).
+
+The parent process binds the listening socket once and supervises
+`SERVER_WORKERS` uvicorn worker processes that share it:
+
+- SIGHUP reloads with no downtime. Workers are replaced one at a time:
+  each replacement imports the code and settings fresh, and the old
+  worker is only asked to finish up once its replacement is serving. If
+  a replacement fails to start, the reload stops and the remaining old
+  workers keep serving.
+- SIGTERM or SIGINT shuts down gracefully. Workers stop accepting, get
+  `SERVER_GRACEFUL_TIMEOUT` seconds to finish in-flight requests and run
+  their shutdown hooks (spark buffer flush, image pool drain), then are
+  killed.
+- With `SERVER_MAX_REQUESTS` set, a worker exits after that many
+  requests, plus up to `SERVER_MAX_REQUESTS_JITTER` more so workers
+  don't all recycle at once, and is replaced. This caps slow memory
+  growth.
+- A worker that dies is replaced. If a worker cannot start at all, the
+  launcher exits rather than respawning it in a loop.
+
+While a worker restarts, new connections wait in the listen backlog
+(`SERVER_BACKLOG`) instead of being refused.
+
+Everything per process stays per worker: the page cache's in-process
+tier, the spark buffer, rate limits, the image pool (`IMAGE_WORKERS`
+processes each) and /metrics.
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import random
+import signal
+import sys
+import time
+from typing import List, Optional
+import uvicorn
+from .config import settings
+
+logger = logging.getLogger("uvicorn.error")
+
+APP = "art_forge.main:app"
+# Seconds a new worker gets to import the app and start serving
+READY_TIMEOUT = 60.0
+# Seconds on top of the graceful timeout for a stopping worker's shutdown hooks
+HOOKS_TIMEOUT = 10.0
+# Seconds a stopping worker waits, no longer accepting, before closing idle connections
+ACCEPT_DRAIN = 0.5
+
+_SIGNALS = {signal.SIGINT: "INT", signal.SIGTERM: "TERM", signal.SIGHUP: "HUP"}
+
+
+class _WorkerServer(uvicorn.Server):
+    """uvicorn Server that tells the launcher once it is accepting requests."""
+
+    def __init__(self, config: uvicorn.Config, ready):
+        super().__init__(config)
+        self._ready = ready
+
+    async def startup(self, sockets=None) -> None:
+        await super().startup(sockets)
+        if self.started:
+            self._ready.set()
+
+    async def shutdown(self, sockets=None) -> None:
+        # uvicorn closes connections with no request in flight. A connection
+        # accepted just before would be reset, so stop accepting first and let
+        # its request arrive; the other workers take new connections meanwhile.
+        for server in self.servers:
+            server.close()
+        await asyncio.sleep(ACCEPT_DRAIN)
+        await super().shutdown(sockets)
+
+
+def _serve(options: dict, sockets, ready) -> None:
+    """Worker process body: run one uvicorn server on the shared socket."""
+    # Reloads are the launcher's business; a terminal hangup must not kill workers
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    _WorkerServer(uvicorn.Config(APP, **options), ready).run(sockets=sockets)
+
+
+class _Worker:
+    def __init__(self, context, options: dict, sockets):
+        self.ready = context.Event()
+        self.process = context.Process(target=_serve, args=(options, sockets, self.ready))
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid
+
+    def start(self) -> None:
+        self.process.start()
+
+    def wait_ready(self, timeout: float) -> bool:
+        """Wait until the worker serves; False if it died or ran out of time."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.ready.wait(0.1):
+                return True
+            if not self.process.is_alive():
+                return False
+        return False
+
+    def stop(self, timeout: float) -> None:
+        """Ask the worker to shut down gracefully, killing it after `timeout`."""
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join(timeout)
+        if self.process.is_alive():
+            logger.warning("Worker [%s] did not stop within %gs; killing it", self.pid, timeout)
+            self.process.kill()
+            self.process.join()
+
+
+class Supervisor:
+    """Runs and replaces worker processes on a shared listening socket."""
+
+    def __init__(self, config: uvicorn.Config, options: dict, workers: int,
+                 max_requests: int, max_requests_jitter: int, graceful_timeout: float):
+        self.config = config
+        self.options = options
+        self.worker_count = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.stop_timeout = graceful_timeout + HOOKS_TIMEOUT
+        self.context = multiprocessing.get_context("spawn")
+        self.workers: List[_Worker] = []
+        self.sockets = []
+        self._signals: List[int] = []
+
+    def _new_worker(self) -> _Worker:
+        options = dict(self.options)
+        if self.max_requests > 0:
+            options["limit_max_requests"] = self.max_requests + random.randint(0, self.max_requests_jitter)
+        worker = _Worker(self.context, options, self.sockets)
+        worker.start()
+        return worker
+
+    def _start_worker(self) -> Optional[_Worker]:
+        worker = self._new_worker()
+        if worker.wait_ready(READY_TIMEOUT):
+            logger.info("Worker [%s] is serving", worker.pid)
+            return worker
+        worker.stop(0)
+        logger.error("Worker [%s] failed to start", worker.pid)
+        return None
+
+    def reload(self) -> None:
+        """Replace every worker, one at a time, each only once its successor serves."""
+        logger.info("Reloading %d worker(s)", len(self.workers))
+        for index, old in enumerate(list(self.workers)):
+            if any(number != signal.SIGHUP for number in self._signals):
+                logger.info("Reload interrupted by a shutdown signal")
+                return
+            new = self._start_worker()
+            if new is None:
+                logger.error("Reload aborted; the remaining workers keep running the old code")
+                return
+            self.workers[index] = new
+            old.stop(self.stop_timeout)
+        logger.info("Reload complete")
+
+    def _replace_exited(self) -> bool:
+        """Replace workers that exited (recycled or crashed); False if one cannot start."""
+        for index, worker in enumerate(self.workers):
+            if worker.process.is_alive():
+                continue
+            worker.process.join()
+            logger.info("Worker [%s] exited with code %s; starting a replacement", worker.pid, worker.process.exitcode)
+            replacement = self._start_worker()
+            if replacement is None:
+                return False
+            self.workers[index] = replacement
+        return True
+
+    def run(self) -> int:
+        self.sockets = [self.config.bind_socket()]
+        for sig in _SIGNALS:
+            signal.signal(sig, lambda number, frame: self._signals.append(number))
+        logger.info("Started launcher [%s] for %d worker(s)", os.getpid(), self.worker_count)
+
+        status = 0
+        for _ in range(self.worker_count):
+            worker = self._start_worker()
+            if worker is None:
+                status = 1
+                break
+            self.workers.append(worker)
+
+        while status == 0:
+            time.sleep(0.5)
+            if self._signals:
+                name = _SIGNALS[self._signals.pop(0)]
+                if name == "HUP":
+                    # One reload covers any further SIGHUPs already received
+                    self._signals = [number for number in self._signals if number != signal.SIGHUP]
+                    self.reload()
+                    continue
+                logger.info("Received SIG%s; shutting down", name)
+                break
+            if not self._replace_exited():
+                status = 1
+
+        for worker in self.workers:
+            if worker.process.is_alive():
+                worker.process.terminate()
+        for worker in self.workers:
+            worker.stop(self.stop_timeout)
+        for sock in self.sockets:
+            sock.close()
+        logger.info("Stopped launcher [%s]", os.getpid())
+        return status
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="artforge-server",
+        description="Run ArtForge under a multi-worker launcher (SIGHUP reloads, SIGTERM stops)",
+    )
+    parser.add_argument("--host", default=settings.host)
+    parser.add_argument("--port", type=int, default=settings.port)
+    parser.add_argument("--workers", type=int, default=settings.server_workers)
+    parser.add_argument("--max-requests", type=int, default=settings.server_max_requests,
+                        help="Recycle a worker after this many requests (0 never)")
+    parser.add_argument("--log-level", default=settings.server_log_level)
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point for the `artforge-server` console script."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    options = {
+        "host": args.host,
+        "port": args.port,
+        "loop": settings.server_loop,
+        "http": settings.server_http,
+        "backlog": settings.server_backlog,
+        "timeout_keep_alive": settings.server_keepalive_timeout,
+        "timeout_graceful_shutdown": settings.server_graceful_timeout,
+        "log_level": args.log_level,
+        "access_log": settings.server_access_log,
+        "proxy_headers": True,
+        "forwarded_allow_ips": settings.server_forwarded_allow_ips,
+    }
+    # Configures logging and binds the socket in the launcher; workers build their own
+    config = uvicorn.Config(APP, **options)
+    return Supervisor(
+        config,
+        options,
+        workers=args.workers,
+        max_requests=args.max_requests,
+        max_requests_jitter=settings.server_max_requests_jitter,
+        graceful_timeout=settings.server_graceful_timeout,
+    ).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+"""Write-behind buffer for spark toggles.
+
+A popular artwork can take many spark clicks a second, and writing each
+one (insert or delete, commit, counter update) serializes on SQLite's
+single writer. Instead, toggles are recorded in memory as the desired
+state per (artwork, user or session). Repeated toggles by the same
+visitor coalesce, and a toggle back to the stored state cancels out.
+Every `interval` seconds, or sooner once `max_pending` visitors are
+waiting, the changes are written in one transaction. That transaction
+does the inserts and deletes and a single recount per touched artwork.
+
+Until then, counts and "has sparked" state come from the stored values
+plus the buffered changes. The buffer is flushed on graceful shutdown;
+a crash loses at most one interval of toggles. Buffers are per process,
+so with several workers a visitor whose clicks land on different
+processes may briefly see their own spark state disagree between them.
+All methods run on the event loop.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import bindparam, delete, func, insert, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .config import settings
+from .database import AsyncSessionLocal
+from .models.artwork import Artwork
+from .models.spark import Spark
+from .models.trending import TrendEvent, queue_for_trending, queue_trend_events
+from .page_cache import page_cache
+
+logger = logging.getLogger(__name__)
+
+# (artwork_id, user_id, session_id); exactly one of the last two is set
+SparkKey = Tuple[int, Optional[int], Optional[str]]
+
+
+def _insert_ignoring_duplicates(dialect_name: str):
+    """INSERT into sparks that skips rows another writer already added."""
+    if dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return insert(Spark.__table__)
+    return dialect_insert(Spark.__table__).on_conflict_do_nothing()
+
+
+def apply_spark_changes(db: Session, changes: Dict[SparkKey, bool]) -> None:
+    """Write desired spark states and recount the touched artworks (caller commits)."""
+    table = Spark.__table__
+    weight = settings.trending_spark_weight
+    trend_events: List[TrendEvent] = []
+    # Skip artworks deleted since the toggle
+    live = set(db.scalars(select(Artwork.id).where(Artwork.id.in_({key[0] for key in changes}))))
+    added = [
+        {"artwork_id": artwork_id, "user_id": user_id, "session_id": session_id}
+        for (artwork_id, user_id, session_id), sparked in changes.items()
+        if sparked and artwork_id in live
+    ]
+    if added:
+        inserted = db.execute(_insert_ignoring_duplicates(db.get_bind().dialect.name), added).rowcount
+        if inserted == len(added):
+            now = datetime.now(timezone.utc)
+            trend_events += [(row["artwork_id"], weight, now) for row in added]
+        else:
+            # Another writer added some first; rescore rather than guess which
+            queue_for_trending(db.connection(), {row["artwork_id"] for row in added})
+
+    for column, actor in ((table.c.user_id, 1), (table.c.session_id, 2)):
+        removed = [
+            {"b_artwork_id": key[0], "b_actor": key[actor]}
+            for key, sparked in changes.items()
+            if not sparked and key[0] in live and key[actor] is not None
+        ]
+        if removed:
+            trend_events += [
+                (artwork_id, -weight, created_at)
+                for artwork_id, created_at in db.execute(
+                    select(table.c.artwork_id, table.c.created_at).where(
+                        tuple_(table.c.artwork_id, column).in_([(row["b_artwork_id"], row["b_actor"]) for row in removed])
+                    )
+                )
+            ]
+            db.execute(
+                delete(table).where(
+                    table.c.artwork_id == bindparam("b_artwork_id"), column == bindparam("b_actor")
+                ),
+                removed,
+            )
+
+    # Bulk statements bypass the per-row hooks; recount and queue for trending here
+    queue_trend_events(db.connection(), trend_events)
+    if live:
+        spark_totals = (
+            select(func.count(Spark.id))
+            .where(Spark.artwork_id == Artwork.id)
+            .correlate(Artwork)
+            .scalar_subquery()
+        )
+        db.execute(
+            update(Artwork)
+            .where(Artwork.id.in_(live))
+            .values(spark_count=spark_totals)
+            .execution_options(synchronize_session=False)
+        )
+
+
+class SparkBuffer:
+    """Coalesces spark toggles in memory and flushes them in batches."""
+
+    def __init__(self, interval: float, max_pending: int):
+        self.interval = interval
+        self.max_pending = max_pending
+        # key -> (stored state, desired state); entries where they match are dropped
+        self._pending: Dict[SparkKey, Tuple[bool, bool]] = {}
+        self._deltas: Dict[int, int] = {}
+        # The batch being written, still counted until it commits
+        self._inflight: Dict[SparkKey, Tuple[bool, bool]] = {}
+        self._inflight_deltas: Dict[int, int] = {}
+        self._tags: Dict[int, Tuple[str, ...]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._stopping = False
+        self._counters = {"toggles": 0, "flushes": 0, "written": 0, "errors": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def _state(self, key: SparkKey) -> Optional[Tuple[bool, bool]]:
+        if key in self._pending:
+            return self._pending[key]
+        if key in self._inflight:
+            desired = self._inflight[key][1]
+            return desired, desired
+        return None
+
+    def _set(self, key: SparkKey, stored: bool, desired: bool) -> None:
+        previous = self._pending.pop(key, None)
+        change = 0 if previous is None else int(previous[0]) - int(previous[1])
+        if stored != desired:
+            self._pending[key] = (stored, desired)
+            change += int(desired) - int(stored)
+        if change:
+            delta = self._deltas.get(key[0], 0) + change
+            if delta:
+                self._deltas[key[0]] = delta
+            else:
+                self._deltas.pop(key[0], None)
+
+    def count(self, artwork_id: int, stored_count: int) -> int:
+        """Spark count for an artwork including buffered toggles."""
+        return stored_count + self._deltas.get(artwork_id, 0) + self._inflight_deltas.get(artwork_id, 0)
+
+    def sparked(self, artwork_id: int, user_id: Optional[int], session_id: Optional[str]) -> Optional[bool]:
+        """Buffered spark state for a visitor, or None if the stored row is current."""
+        state = self._state((artwork_id, user_id, session_id))
+        return None if state is None else state[1]
+
+    async def toggle(
+        self,
+        db: AsyncSession,
+        artwork: Artwork,
+        user_id: Optional[int],
+        session_id: Optional[str],
+        tags: Iterable[str] = (),
+    ) -> Tuple[bool, int]:
+        """Flip a visitor's spark on `artwork`; returns (sparked, spark count).
+
+        `tags` are the page-cache tags to invalidate once the change is written.
+        """
+        key = (artwork.id, user_id, session_id)
+        if self._state(key) is None:
+            actor = Spark.user_id == user_id if user_id is not None else Spark.session_id == session_id
+            stored = await db.scalar(select(Spark.id).where(Spark.artwork_id == artwork.id, actor)) is not None
+        # Another toggle may have been buffered while we were reading
+        stored, desired = self._state(key) or (stored, stored)
+        self._set(key, stored, not desired)
+        self._tags[artwork.id] = tuple(tags)
+        self._counters["toggles"] += 1
+        result = (not desired, self.count(artwork.id, artwork.spark_count))
+
+        if not self.running:
+            # No flusher (buffering disabled or app not started): write through
+            await self.flush()
+        elif len(self._pending) >= self.max_pending:
+            self._wakeup.set()
+        return result
+
+    def discard_artwork(self, artwork_id: int) -> None:
+        """Drop buffered toggles for a deleted artwork."""
+        for key in [key for key in self._pending if key[0] == artwork_id]:
+            del self._pending[key]
+        self._deltas.pop(artwork_id, None)
+        self._tags.pop(artwork_id, None)
+
+    async def flush(self) -> int:
+        """Write every buffered toggle now; returns how many rows changed state."""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            self._inflight, self._inflight_deltas, self._deltas = batch, self._deltas, {}
+            tags, self._tags = self._tags, {}
+            try:
+                async with AsyncSessionLocal() as session:
+                    await session.run_sync(apply_spark_changes, {key: desired for key, (_, desired) in batch.items()})
+                    await session.commit()
+            except Exception:
+                logger.exception("Spark flush failed; keeping %d toggles for the next attempt", len(batch))
+                self._counters["errors"] += 1
+                self._requeue(batch, tags)
+                return 0
+            finally:
+                self._inflight, self._inflight_deltas = {}, {}
+
+        self._counters["flushes"] += 1
+        self._counters["written"] += len(batch)
+        for artwork_tags in tags.values():
+            page_cache.invalidate(*artwork_tags)
+        return len(batch)
+
+    def _requeue(self, batch: Dict[SparkKey, Tuple[bool, bool]], tags: Dict[int, Tuple[str, ...]]) -> None:
+        for key, (stored, desired) in batch.items():
+            if key in self._pending:
+                # Toggled again since; keep the newest desired state
+                desired = self._pending[key][1]
+            self._set(key, stored, desired)
+        for artwork_id, artwork_tags in tags.items():
+            self._tags.setdefault(artwork_id, artwork_tags)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        """Start the periodic flusher (no-op when `interval` is 0)."""
+        if self.interval <= 0 or self.running:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flusher and write everything still buffered."""
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        """Toggle/flush counters and the number of visitors waiting to be written."""
+        stats = dict(self._counters)
+        stats["pending"] = len(self._pending)
+        return stats
+
+
+spark_buffer = SparkBuffer(
+    interval=settings.spark_flush_interval,
+    max_pending=settings.spark_buffer_max_pending,
+)
@@ -0,0 +1,59 @@
+"""Pluggable storage for uploaded files.
+
+`settings.storage_backend` selects "local" (files under
+`settings.upload_dir`, served by StaticFiles or nginx) or "s3" (any
+S3-compatible service). Templates build image URLs with `media_url`, so
+in "redirect" serve mode or with a public bucket URL, image bytes never
+pass through the Python workers.
+"""
+
+from functools import lru_cache
+from pathlib import Path
+from ..config import settings
+from .base import StorageBackend
+from .content import ContentStore, collect_blobs
+from .local import LocalStorage
+
+
+@lru_cache(maxsize=None)
+def get_storage() -> StorageBackend:
+    """The configured storage backend (one instance per process)."""
+    if settings.storage_backend == "local":
+        return LocalStorage(Path(settings.upload_dir))
+    if settings.storage_backend == "s3":
+        from .s3 import S3Storage
+
+        return S3Storage(
+            bucket=settings.s3_bucket,
+            endpoint_url=settings.s3_endpoint_url,
+            region=settings.s3_region,
+            access_key_id=settings.s3_access_key_id,
+            secret_access_key=settings.s3_secret_access_key,
+            public_url=settings.s3_public_url,
+            presign_expiry=settings.s3_presign_expiry,
+        )
+    raise ValueError(f"Unknown storage backend: {settings.storage_backend!r}")
+
+
+def media_url(key: str) -> str:
+    """URL templates should use for a stored file."""
+    if settings.storage_serve_mode == "redirect":
+        return f"/art/media/{key}"
+    return get_storage().url(key)
+
+
+@lru_cache(maxsize=None)
+def get_content_store() -> ContentStore:
+    """The content store over the configured backend (one per process, built on first use)."""
+    return ContentStore(get_storage(), Path(settings.upload_dir))
+
+
+__all__ = [
+    "StorageBackend",
+    "LocalStorage",
+    "ContentStore",
+    "collect_blobs",
+    "get_content_store",
+    "get_storage",
+    "media_url",
+]
@@ -0,0 +1,62 @@
+"""Storage backend interface."""
+
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+
+class StorageBackend(ABC):
+    """Where uploaded files and their derivatives live.
+
+    Keys are slash-separated paths relative to the storage root, e.g.
+    "ab/cd/<sha256>.png". Implementations must be safe to use from
+    several threads and processes at once.
+    """
+
+    @abstractmethod
+    def put(self, key: str, source: Path) -> None:
+        """Store the local file at `source` under `key`, taking ownership of it.
+
+        The source file is moved or removed; callers must not reuse it.
+        """
+
+    @abstractmethod
+    def get(self, key: str) -> bytes:
+        """Return the full contents stored under `key`."""
+
+    @abstractmethod
+    def stream(self, key: str, chunk_size: int = 65536) -> Iterator[bytes]:
+        """Yield the contents stored under `key` in chunks."""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove `key`; missing keys are ignored."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Whether anything is stored under `key`."""
+
+    @abstractmethod
+    def presign(self, key: str, expires_in: int = 3600) -> str:
+        """A URL clients can fetch `key` from directly, valid for `expires_in` seconds."""
+
+    def url(self, key: str) -> str:
+        """Long-lived public URL for `key` (defaults to a presigned one)."""
+        return self.presign(key)
+
+    @contextmanager
+    def local_copy(self, key: str, scratch_dir: Path) -> Iterator[Path]:
+        """Yield a local filesystem path holding the contents of `key`.
+
+        The default downloads into `scratch_dir` and cleans up afterwards.
+        """
+        scratch_dir.mkdir(parents=True, exist_ok=True)
+        path = scratch_dir / key.replace("/", "_")
+        try:
+            with open(path, "wb") as out:
+                for chunk in self.stream(key):
+                    out.write(chunk)
+            yield path
+        finally:
+            path.unlink(missing_ok=True)
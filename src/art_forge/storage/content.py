@@ -0,0 +1,135 @@
+"""Content-addressed storage for uploaded images.
+
+Files are stored under `ab/cd/<sha256>.<ext>`, sharded on the first two
+byte pairs of the hash so no directory or prefix grows unbounded.
+Identical uploads share one object; the `blobs` table counts references
+to it and `collect_blobs` removes an object (and its derivatives) once
+nothing points at it any more.
+
+Both sides go through the blob row. An upload takes its reference before
+looking at the stored object, and the collector deletes the row and the
+object in one transaction, so an upload of the same content either keeps
+the object alive or waits for the row lock and stores it again.
+"""
+
+import re
+import uuid
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+import aiofiles.os
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from ..images import DERIVATIVE_SIZES, derivative_filename
+from ..models.blob import Blob, acquire_blob, release_blob
+from .base import StorageBackend
+
+CONTENT_KEY_PATTERN = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.\w+$")
+
+
+class ContentStore:
+    """Content-addressed keys on top of a StorageBackend.
+
+    `scratch_root` is a local directory for uploads that are still
+    streaming in and for temporary copies during processing.
+    """
+
+    def __init__(self, backend: StorageBackend, scratch_root: Path):
+        self.backend = backend
+        self.scratch_root = scratch_root
+
+    @staticmethod
+    def key_for(content_hash: str, ext: str) -> str:
+        """Storage key for a hash and extension."""
+        return f"{content_hash[:2]}/{content_hash[2:4]}/{content_hash}.{ext}"
+
+    @staticmethod
+    def is_content_key(filename: str) -> bool:
+        """Whether a stored filename is a content-addressed key (vs. a legacy flat name)."""
+        return bool(CONTENT_KEY_PATTERN.match(filename))
+
+    def incoming_path(self) -> Path:
+        """A fresh local path for an upload that is still streaming in."""
+        incoming = self.scratch_root / ".incoming"
+        incoming.mkdir(parents=True, exist_ok=True)
+        return incoming / f"{uuid.uuid4()}.part"
+
+    def scratch_dir(self) -> Path:
+        """Local working directory for processing (same filesystem as incoming)."""
+        return self.scratch_root / ".incoming"
+
+    async def adopt(self, db: AsyncSession, partial: Path, content_hash: str, ext: str) -> Tuple[str, bool]:
+        """Hand a fully written temporary file to the backend at its content address.
+
+        Commits a reference to the blob first, so the object cannot be
+        collected between the existence check and the image row that will
+        point at it; the caller drops it with `release` once that row is
+        committed (or the upload fails). Returns (key, created); when the
+        content is already stored the temporary file is discarded and
+        created is False.
+        """
+        key = self.key_for(content_hash, ext)
+        size = partial.stat().st_size
+        await db.run_sync(lambda session: acquire_blob(session.connection(), content_hash, key, size))
+        await db.commit()
+        try:
+            # Also false for a row revived after its object was collected
+            if await run_in_threadpool(self.backend.exists, key):
+                await aiofiles.os.remove(partial)
+                return key, False
+            await run_in_threadpool(self.backend.put, key, partial)
+            return key, True
+        except BaseException:
+            await self.release(db, [content_hash], collect=True)
+            raise
+
+    async def release(self, db: AsyncSession, content_hashes: List[str], collect: bool = False) -> None:
+        """Drop the references `adopt` took; with `collect`, remove blobs left unreferenced."""
+        if not content_hashes:
+            return
+        await db.run_sync(_release_all, content_hashes)
+        await db.commit()
+        if collect:
+            await db.run_sync(collect_blobs, self, content_hashes)
+
+    def delete(self, key: str) -> None:
+        """Remove a stored file and its derivatives."""
+        self.backend.delete(key)
+        for kind, _ in DERIVATIVE_SIZES:
+            self.backend.delete(derivative_filename(key, kind))
+
+
+def _release_all(db: Session, content_hashes: List[str]) -> None:
+    for content_hash in content_hashes:
+        release_blob(db.connection(), content_hash)
+
+
+def collect_blobs(db: Session, store: ContentStore, content_hashes: Optional[Iterable[str]] = None) -> int:
+    """Delete unreferenced blobs and their files; returns how many were removed.
+
+    Call after the transaction that released the references has committed.
+    Limit the sweep to `content_hashes` when given.
+    """
+    query = db.query(Blob.id, Blob.key).filter(Blob.ref_count <= 0)
+    if content_hashes is not None:
+        hashes = [h for h in content_hashes if h]
+        if not hashes:
+            return 0
+        query = query.filter(Blob.content_hash.in_(hashes))
+
+    removed = 0
+    for blob_id, key in query.all():
+        # Re-check the count in the DELETE: a concurrent upload may have revived it.
+        # The row stays locked until the object is gone, so an upload of the same
+        # content waits and then finds it missing.
+        result = db.execute(delete(Blob).where(Blob.id == blob_id, Blob.ref_count <= 0))
+        try:
+            if result.rowcount == 1:
+                store.delete(key)
+                removed += 1
+        except BaseException:
+            db.rollback()
+            raise
+        db.commit()
+    return removed
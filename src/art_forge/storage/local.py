@@ -0,0 +1,49 @@
+"""Local filesystem storage backend."""
+
+import shutil
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+from .base import StorageBackend
+
+
+class LocalStorage(StorageBackend):
+    """Stores files under a directory served at `base_url` (StaticFiles or nginx)."""
+
+    def __init__(self, root: Path, base_url: str = "/art/uploads"):
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+
+    def path(self, key: str) -> Path:
+        return self.root / key
+
+    def put(self, key: str, source: Path) -> None:
+        dest = self.path(key)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        # A rename when source is on the same filesystem (the usual case)
+        shutil.move(str(source), str(dest))
+
+    def get(self, key: str) -> bytes:
+        return self.path(key).read_bytes()
+
+    def stream(self, key: str, chunk_size: int = 65536) -> Iterator[bytes]:
+        with open(self.path(key), "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                yield chunk
+
+    def delete(self, key: str) -> None:
+        self.path(key).unlink(missing_ok=True)
+
+    def exists(self, key: str) -> bool:
+        return self.path(key).exists()
+
+    def presign(self, key: str, expires_in: int = 3600) -> str:
+        # Files are public under base_url; there is nothing to sign
+        return f"{self.base_url}/{key}"
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    @contextmanager
+    def local_copy(self, key: str, scratch_dir: Path) -> Iterator[Path]:
+        yield self.path(key)
@@ -0,0 +1,45 @@
+"""The Jinja2 template environment shared by every page route.
+
+One environment means each template is parsed and compiled once per
+process, however many routers render it. With TEMPLATE_CACHE_DIR set,
+compiled templates are also kept on disk, so a freshly started or
+reloaded worker loads bytecode instead of recompiling on its first
+requests. Jinja keys the cache on each template's source, so an edited
+template is recompiled rather than served stale.
+"""
+
+import logging
+import os
+from pathlib import Path
+from fastapi.templating import Jinja2Templates
+from jinja2 import FileSystemBytecodeCache
+from .config import settings
+from .metrics import instrument_templates
+from .storage import media_url
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES_DIR = Path(__file__).parent / "templates"
+
+
+class TemplateBytecodeCache(FileSystemBytecodeCache):
+    """On-disk bytecode cache that never fails a render.
+
+    The directory is created on the first write rather than at import, and
+    a write that fails (read-only or full disk) only means the template is
+    compiled again by the next process.
+    """
+
+    def dump_bytecode(self, bucket) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            super().dump_bytecode(bucket)
+        except OSError as exc:
+            logger.warning("Could not cache compiled template %s: %s", bucket.key, exc)
+
+
+templates = Jinja2Templates(directory=str(TEMPLATES_DIR))
+if settings.template_cache_dir:
+    templates.env.bytecode_cache = TemplateBytecodeCache(settings.template_cache_dir)
+templates.env.globals["media_url"] = media_url
+instrument_templates(templates.env)
@@ -0,0 +1,252 @@
+"""Trending scores: time-decayed sparks and comments.
+
+An artwork's heat at time `now` is the sum over its sparks, comments
+and its upload of `weight * 2 ** -((now - event_time) / half_life)`.
+Every artwork decays by the same factor as time passes, so ordering by
+heat never changes on its own. The stored score drops that common
+factor: it is `log2(sum(weight * 2 ** ((event_time - EPOCH) / half_life)))`,
+which only changes when an artwork's own sparks or comments do.
+
+A new spark or comment therefore only adds its own term to the stored
+score, and a removed one subtracts it. The hooks in models/trending.py
+and the spark buffer queue each change in `trending_queue`, and the
+periodic job folds queued changes into the scores without re-reading
+any artwork's other sparks or comments. Artworks queued for a rescore
+from scratch (after a migration or `--all`, or when removals cancel out
+nearly the whole score) are recomputed from their events of the last
+`HORIZON` half-lives; older events are worth under 1/65536 of a fresh
+spark. After changing the half-life or weights, rescore everything with
+`artforge update-trending --all`.
+
+The job runs on the sync engine in a worker thread, never on the event
+loop. Each app process runs one, and claims are atomic, so no event is
+applied twice.
+"""
+
+import asyncio
+import logging
+import math
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import Row, delete, func, insert, select
+from sqlalchemy.orm import Session
+from .config import settings
+from .database import SessionLocal
+from .models.artwork import Artwork
+from .models.comment import Comment
+from .models.spark import Spark
+from .models.trending import ArtworkTrend, queue_for_trending, trending_queue
+from .page_cache import TRENDING_TAG, page_cache
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+HORIZON = 16
+
+
+def _half_lives_since_epoch(moment: datetime) -> float:
+    if moment.tzinfo is None:
+        # SQLite hands back CURRENT_TIMESTAMP values as naive UTC
+        moment = moment.replace(tzinfo=timezone.utc)
+    return (moment - EPOCH).total_seconds() / (settings.trending_half_life_hours * 3600)
+
+
+def trend_score(events: Iterable[Tuple[datetime, float]]) -> float:
+    """Stored score for (time, weight) events; higher is hotter."""
+    points = [(_half_lives_since_epoch(moment), weight) for moment, weight in events]
+    # log2 of a sum of powers of two, shifted so the largest term is 2 ** 0
+    peak = max(exponent for exponent, _ in points)
+    return peak + math.log2(sum(weight * 2 ** (exponent - peak) for exponent, weight in points))
+
+
+def _upsert_scores(db: Session, scores: List[Dict[str, object]]) -> None:
+    table = ArtworkTrend.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table)
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[table.c.artwork_id],
+                set_={"score": stmt.excluded.score, "computed_at": func.now()},
+            ),
+            scores,
+        )
+        return
+    db.execute(delete(table).where(table.c.artwork_id.in_([row["artwork_id"] for row in scores])))
+    db.execute(insert(table), scores)
+
+
+def _claim(db: Session, batch_size: int) -> List[Row]:
+    """Take up to `batch_size` events off the queue (caller commits).
+
+    Every app process runs the updater, so the claim is one DELETE: on
+    SQLite it waits for the write lock and then only sees rows nobody
+    else took, and on PostgreSQL rows locked by another claim are skipped.
+    """
+    table = trending_queue
+    head = select(table.c.id).order_by(table.c.id).limit(batch_size).with_for_update(skip_locked=True)
+    columns = (table.c.artwork_id, table.c.weight, table.c.occurred_at)
+    if db.get_bind().dialect.delete_returning:
+        return list(db.execute(delete(table).where(table.c.id.in_(head)).returning(*columns)))
+    rows = list(db.execute(select(table.c.id, *columns).where(table.c.id.in_(head))))
+    db.execute(delete(table).where(table.c.id.in_([row.id for row in rows])))
+    return rows
+
+
+def _fold(score: Optional[float], changes: List[Tuple[float, float]]) -> Optional[float]:
+    """Add (exponent, weight) terms to a stored score; None if they cancel it out."""
+    terms = changes if score is None else [(score, 1.0)] + changes
+    peak = max(exponent for exponent, _ in terms)
+    total = sum(weight * 2 ** (exponent - peak) for exponent, weight in terms)
+    # Removals took away (nearly) everything; rounding would dominate what is left
+    if total <= 2 ** -20:
+        return None
+    return peak + math.log2(total)
+
+
+def _rescore(db: Session, ids: Iterable[int], now: datetime) -> Dict[int, float]:
+    """Scores recomputed from the artworks' sparks and comments."""
+    events: Dict[int, List[Tuple[datetime, float]]] = {
+        artwork_id: [(created_at or now, settings.trending_spark_weight)]
+        for artwork_id, created_at in db.execute(select(Artwork.id, Artwork.created_at).where(Artwork.id.in_(ids)))
+    }
+    if not events:
+        return {}
+    cutoff = now - timedelta(hours=settings.trending_half_life_hours * HORIZON)
+    for model, weight in ((Spark, settings.trending_spark_weight), (Comment, settings.trending_comment_weight)):
+        for artwork_id, created_at in db.execute(
+            select(model.artwork_id, model.created_at)
+            .where(model.artwork_id.in_(events), model.created_at >= cutoff)
+        ):
+            events[artwork_id].append((created_at or now, weight))
+    return {artwork_id: trend_score(artwork_events) for artwork_id, artwork_events in events.items()}
+
+
+def rescore_queued(db: Session, batch_size: int, now: Optional[datetime] = None) -> Tuple[int, int]:
+    """Apply up to `batch_size` queued events to the stored scores (caller commits).
+
+    Returns (events taken off the queue, artworks rescored).
+    """
+    claimed = _claim(db, batch_size)
+    if not claimed:
+        return 0, 0
+    now = now or datetime.now(timezone.utc)
+    changes: Dict[int, List[Tuple[float, float]]] = {}
+    from_scratch = set()
+    for artwork_id, weight, occurred_at in claimed:
+        if weight is None:
+            from_scratch.add(artwork_id)
+        else:
+            changes.setdefault(artwork_id, []).append((_half_lives_since_epoch(occurred_at or now), weight))
+
+    scores: Dict[int, float] = {}
+    folding = set(changes) - from_scratch
+    if folding:
+        # Outer join: deleted artworks drop out, unscored ones fold from nothing
+        for artwork_id, score in db.execute(
+            select(Artwork.id, ArtworkTrend.score)
+            .outerjoin(ArtworkTrend, ArtworkTrend.artwork_id == Artwork.id)
+            .where(Artwork.id.in_(folding))
+        ):
+            folded = _fold(score, changes[artwork_id])
+            if folded is None:
+                from_scratch.add(artwork_id)
+            else:
+                scores[artwork_id] = folded
+    if from_scratch:
+        scores.update(_rescore(db, from_scratch, now))
+    if scores:
+        _upsert_scores(db, [{"artwork_id": artwork_id, "score": score} for artwork_id, score in scores.items()])
+    return len(claimed), len(scores)
+
+
+def drain_queue(batch_size: int) -> int:
+    """Apply every queued event, one committed batch at a time; returns artworks rescored.
+
+    Runs on the sync engine, so the app calls it from a thread.
+    """
+    rescored = 0
+    while True:
+        db = SessionLocal()
+        try:
+            claimed, done = rescore_queued(db, batch_size)
+            # Commit per batch so an interrupted run keeps its progress
+            db.commit()
+        finally:
+            db.close()
+        rescored += done
+        if claimed < batch_size:
+            return rescored
+
+
+def queue_all(db: Session) -> int:
+    """Queue every artwork for rescoring from scratch (caller commits); returns how many."""
+    ids = list(db.scalars(select(Artwork.id)))
+    queue_for_trending(db.connection(), ids)
+    return len(ids)
+
+
+class TrendingUpdater:
+    """Periodically applies queued events, in a worker thread."""
+
+    def __init__(self, interval: float, batch_size: int):
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._counters = {"runs": 0, "rescored": 0, "errors": 0}
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def run_once(self) -> int:
+        """Drain the queue in batches; returns how many artworks were rescored."""
+        loop = asyncio.get_running_loop()
+        total = await loop.run_in_executor(None, drain_queue, self.batch_size)
+        self._counters["runs"] += 1
+        self._counters["rescored"] += total
+        if total:
+            page_cache.invalidate(TRENDING_TAG)
+        return total
+
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                await self.run_once()
+            except Exception:
+                # Queued artworks stay queued for the next run
+                logger.exception("Trending update failed")
+                self._counters["errors"] += 1
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def start(self) -> None:
+        """Start the periodic updater (no-op when `interval` is 0)."""
+        if self.interval <= 0 or self.running:
+            return
+        self._stopping = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop after the current run; anything still queued waits for the next start."""
+        if self._task is not None:
+            self._stopping.set()
+            await self._task
+            self._task = None
+
+    def stats(self) -> dict:
+        """Run counters for /health."""
+        return dict(self._counters)
+
+
+trending_updater = TrendingUpdater(
+    interval=settings.trending_interval,
+    batch_size=settings.trending_batch_size,
+)
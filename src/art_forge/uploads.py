@@ -0,0 +1,105 @@
+"""Streaming ingestion of uploaded image files."""
+
+import hashlib
+from typing import NamedTuple, Optional, Set
+import aiofiles
+import aiofiles.os
+from fastapi import HTTPException, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+from .config import settings
+from .metrics import UPLOAD_BYTES
+from .storage import ContentStore
+
+# Canonical stored extension for each sniffed image type
+IMAGE_TYPE_EXTENSIONS = {
+    "jpeg": "jpg",
+    "png": "png",
+    "gif": "gif",
+    "webp": "webp",
+}
+
+
+class IngestedUpload(NamedTuple):
+    """An upload that has been written to disk."""
+
+    filename: str  # Content-addressed storage key
+    file_size: int
+    content_hash: str  # Hex SHA-256 of the file contents
+    created: bool  # False when identical content was already stored
+
+
+def allowed_extensions() -> Set[str]:
+    """Extensions accepted for uploads, from settings."""
+    return {ext.strip().lower() for ext in settings.allowed_extensions.split(",") if ext.strip()}
+
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    """Identify an image type from its leading magic bytes."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "webp"
+    return None
+
+
+def _reject(status_code: int, detail: str, upload: UploadFile):
+    raise HTTPException(status_code=status_code, detail=f"{upload.filename}: {detail}")
+
+
+async def ingest_upload(upload: UploadFile, store: ContentStore, db: AsyncSession) -> IngestedUpload:
+    """Stream an upload into the content store in fixed-size chunks.
+
+    The file type is checked against its magic bytes on the first chunk,
+    the write is abandoned as soon as it exceeds `settings.max_file_size`,
+    and the SHA-256 is computed on the way through, then used as the
+    storage key. Nothing is left on disk when the upload is rejected.
+
+    The stored blob keeps a reference from `db` until the caller calls
+    `store.release` (see ContentStore.adopt).
+    """
+    ext = upload.filename.rsplit(".", 1)[-1].lower() if upload.filename and "." in upload.filename else ""
+    if ext not in allowed_extensions():
+        _reject(415, "unsupported file type", upload)
+
+    # Starlette knows the size of spooled uploads; reject before reading
+    if upload.size is not None and upload.size > settings.max_file_size:
+        _reject(413, "file too large", upload)
+
+    partial = store.incoming_path()
+    digest = hashlib.sha256()
+    size = 0
+    image_type = None
+
+    try:
+        async with aiofiles.open(partial, "wb") as out:
+            while True:
+                chunk = await upload.read(settings.upload_chunk_size)
+                if not chunk:
+                    break
+                if image_type is None:
+                    image_type = sniff_image_type(chunk)
+                    if image_type is None or IMAGE_TYPE_EXTENSIONS[image_type] not in allowed_extensions():
+                        _reject(415, "not a supported image", upload)
+                size += len(chunk)
+                if size > settings.max_file_size:
+                    _reject(413, "file too large", upload)
+                digest.update(chunk)
+                await out.write(chunk)
+
+        if size == 0:
+            _reject(400, "empty file", upload)
+
+        content_hash = digest.hexdigest()
+        # Name by detected type, not by whatever extension the client sent
+        key, created = await store.adopt(db, partial, content_hash, IMAGE_TYPE_EXTENSIONS[image_type])
+    except BaseException:
+        if partial.exists():
+            await aiofiles.os.remove(partial)
+        raise
+
+    UPLOAD_BYTES.observe(size)
+    return IngestedUpload(filename=key, file_size=size, content_hash=content_hash, created=created)
@@ -0,0 +1,226 @@
+"""Background image-processing worker.
+
+Uploads only store the original file and enqueue an `ImageJob`. A
+dispatcher thread in each app process claims pending jobs and runs
+`images.process_image` in a process pool, so probing and resizing never
+block the event loop. The queue lives in the database: claims are atomic
+UPDATEs (safe with several app processes) and jobs whose worker died are
+re-queued once they go stale.
+"""
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import update
+from .config import settings
+from .database import SessionLocal
+from .images import apply_processing_result, process_image
+from .metrics import IMAGE_JOBS, IMAGE_PROCESSING_SECONDS
+from .models.artwork import ArtworkImage
+from .models.blob import Blob
+from .models.image_job import ImageJob
+from .page_cache import artwork_tags, page_cache
+from .storage import get_content_store
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_image(db, image: ArtworkImage) -> ImageJob:
+    """Mark an image as processing and queue a job for it (caller commits)."""
+    image.status = "processing"
+    job = ImageJob(image=image)
+    db.add(job)
+    return job
+
+
+class ImageWorker:
+    """Dispatches queued ImageJobs to a process pool from a background thread."""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._inflight: Dict[Future, tuple] = {}  # future -> (job_id, filename)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self) -> None:
+        """Start the process pool and dispatcher thread."""
+        if self.running or self.max_workers < 1:
+            return
+        self._stopping.clear()
+        self._pool = self._new_pool()
+        self._thread = threading.Thread(target=self._run, name="image-worker", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Finish in-flight jobs and shut down. Unstarted jobs stay queued."""
+        if not self.running:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join()
+        self._pool.shutdown(wait=True)
+        self._finish_completed()
+        self._thread = None
+        self._pool = None
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # spawn, not fork: the parent holds DB connections and threads
+        return ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def notify(self) -> None:
+        """Wake the dispatcher after new jobs were committed."""
+        self._wakeup.set()
+
+    def run_inline(self, job_ids: List[int]) -> None:
+        """Process jobs in the calling thread (used when the pool is disabled)."""
+        db = SessionLocal()
+        try:
+            jobs = db.query(ImageJob.id, ArtworkImage.filename).join(ImageJob.image).filter(
+                ImageJob.id.in_(job_ids)
+            ).all()
+        finally:
+            db.close()
+        for job_id, filename in jobs:
+            self._mark_running(job_id)
+            try:
+                result = process_image(filename)
+            except Exception as exc:
+                self._record(job_id, filename, error=exc)
+            else:
+                self._record(job_id, filename, result=result)
+
+    def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                self._finish_completed()
+                self._requeue_stale()
+                self._dispatch()
+            except Exception:
+                logger.exception("Image worker loop failed")
+            self._wakeup.wait(settings.image_job_poll_interval)
+            self._wakeup.clear()
+
+    def _dispatch(self) -> None:
+        free_slots = self.max_workers - len(self._inflight)
+        if free_slots <= 0:
+            return
+        for job_id, filename in self._claim(free_slots):
+            try:
+                future = self._pool.submit(process_image, filename)
+            except BrokenProcessPool:
+                # A child died (e.g. OOM-killed); replace the pool and carry on
+                logger.warning("Image worker pool broken; restarting it")
+                self._pool.shutdown(wait=False)
+                self._pool = self._new_pool()
+                future = self._pool.submit(process_image, filename)
+            self._inflight[future] = (job_id, filename)
+            future.add_done_callback(lambda _: self._wakeup.set())
+
+    def _claim(self, limit: int) -> List[tuple]:
+        """Atomically move up to `limit` pending jobs to running."""
+        claimed = []
+        db = SessionLocal()
+        try:
+            candidates = db.query(ImageJob.id, ArtworkImage.filename).join(ImageJob.image).filter(
+                ImageJob.status == "pending"
+            ).order_by(ImageJob.id).limit(limit).all()
+        finally:
+            db.close()
+        for job_id, filename in candidates:
+            # Another app process may have claimed it first
+            if self._mark_running(job_id):
+                claimed.append((job_id, filename))
+        return claimed
+
+    def _mark_running(self, job_id: int) -> bool:
+        """Claim a single pending job; False if someone else got it."""
+        db = SessionLocal()
+        try:
+            result = db.execute(
+                update(ImageJob)
+                .where(ImageJob.id == job_id, ImageJob.status == "pending")
+                .values(status="running", attempts=ImageJob.attempts + 1, claimed_at=datetime.utcnow())
+            )
+            db.commit()
+            return result.rowcount == 1
+        finally:
+            db.close()
+
+    def _requeue_stale(self) -> None:
+        """Return jobs whose worker vanished (crash, kill -9) to the queue."""
+        cutoff = datetime.utcnow() - timedelta(seconds=settings.image_job_stale_after)
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(ImageJob)
+                .where(ImageJob.status == "running", ImageJob.claimed_at < cutoff)
+                .values(status="pending")
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def _finish_completed(self) -> None:
+        for future in [f for f in self._inflight if f.done()]:
+            job_id, filename = self._inflight.pop(future)
+            error = future.exception()
+            self._record(job_id, filename, result=None if error else future.result(), error=error)
+
+    def _record(
+        self,
+        job_id: int,
+        filename: str,
+        result: Optional[dict] = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        """Write a finished job's outcome back to the database."""
+        db = SessionLocal()
+        try:
+            job = db.get(ImageJob, job_id)
+            if job is None:
+                # Image (and its jobs) were deleted while processing; drop the
+                # derivatives we just wrote unless another image shares them
+                if result and not db.query(Blob.id).filter(Blob.key == filename).first():
+                    for spec in result["derivatives"]:
+                        get_content_store().backend.delete(spec["filename"])
+                return
+            image = job.image
+            # Pages showing this image change once it is ready (or failed)
+            tags = artwork_tags(image.artwork.artist.username, image.artwork.slug)
+            if error is None:
+                apply_processing_result(image, result)
+                job.status = "done"
+                job.error = None
+                IMAGE_PROCESSING_SECONDS.observe(result["seconds"])
+            else:
+                logger.warning("Image job %s failed: %r", job_id, error)
+                job.error = repr(error)
+                if job.attempts < settings.image_job_max_attempts and not isinstance(error, OSError):
+                    job.status = "pending"
+                else:
+                    # Undecodable files (OSError) will never succeed
+                    job.status = "failed"
+                    image.status = "failed"
+            IMAGE_JOBS.labels("retried" if job.status == "pending" else job.status).inc()
+            job.finished_at = datetime.utcnow()
+            db.commit()
+            if image.status != "processing":
+                page_cache.invalidate(*tags)
+        finally:
+            db.close()
+
+
+image_worker = ImageWorker(settings.image_workers)
@@ -0,0 +1,132 @@
+"""Shared fixtures: the app on a migrated scratch SQLite database.
+
+Settings are read when art_forge.config is first imported, so the
+environment is set here, before any test imports the app. Image jobs run
+inline, and the page and auth caches are off, so every page view runs
+its full set of queries against the budgets in pyproject.toml.
+"""
+
+import io
+import os
+import shutil
+import tempfile
+from pathlib import Path
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+SCRATCH = Path(tempfile.mkdtemp(prefix="artforge-tests-"))
+DB_PATH = SCRATCH / "test.db"
+
+os.environ.update({
+    "DATABASE_URL": f"sqlite:///{DB_PATH}",
+    "UPLOAD_DIR": str(SCRATCH / "uploads"),
+    "TEMPLATE_CACHE_DIR": "",
+    "IMAGE_WORKERS": "0",
+    "PAGE_CACHE_MAX_ENTRIES": "0",
+    "AUTH_CACHE_MAX_ENTRIES": "0",
+    "SPARK_FLUSH_INTERVAL": "0",
+    "LOGIN_IP_BURST": "0",
+    "LOGIN_USER_BURST": "0",
+})
+
+
+def pytest_sessionfinish(session, exitstatus):
+    shutil.rmtree(SCRATCH, ignore_errors=True)
+
+
+def _png(color: str) -> bytes:
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.new("RGB", (40, 30), color).save(buf, "PNG")
+    return buf.getvalue()
+
+
+def _upload(client, username: str, title: str, colors, tags: str = ""):
+    response = client.post(
+        f"/art/{username}/upload",
+        data={"title": title, "tags": tags},
+        files=[("images", (f"{color}.png", _png(color), "image/png")) for color in colors],
+        follow_redirects=False,
+    )
+    assert response.status_code == 302, response.text
+    return response
+
+
+def _login(app, username: str):
+    from fastapi.testclient import TestClient
+
+    client = TestClient(app)
+    client.post("/art/register", data={"username": username, "password": "pw"})
+    return client
+
+
+@pytest.fixture(scope="session")
+def app():
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(str(REPO_ROOT / "alembic.ini"))
+    config.set_main_option("script_location", str(REPO_ROOT / "alembic"))
+    command.upgrade(config, "head")
+
+    from art_forge.main import app
+
+    return app
+
+
+@pytest.fixture
+def png():
+    """png(color): a small PNG of one colour; different colours hash differently."""
+    return _png
+
+
+@pytest.fixture
+def upload():
+    """upload(client, username, title, colors, tags=""): an artwork with one image per colour."""
+    return _upload
+
+
+@pytest.fixture
+def login(app):
+    """login(username): a client registered and logged in as `username`."""
+    return lambda username: _login(app, username)
+
+
+@pytest.fixture(scope="session")
+def site(app):
+    """A painter with a bare artwork and a busy one (several images, tags,
+    comments by different authors and sparks), both in the "seascapes"
+    series, plus trending scores.
+
+    Tests that change data should make their own artworks.
+    """
+    from fastapi.testclient import TestClient
+    from art_forge.cli import main as cli
+    from art_forge.database import SessionLocal
+    from art_forge.models.artwork import Artwork
+    from art_forge.models.series import ArtworkSeries, Series
+
+    owner = _login(app, "painter")
+    _upload(owner, "painter", "Bare", ["red"])
+    _upload(owner, "painter", "Busy", ["green", "blue", "white", "black"], tags="sky, sea, storm")
+    # Series have no editing UI yet; add one directly
+    db = SessionLocal()
+    try:
+        series = Series(name="Seascapes", slug="seascapes")
+        for position, slug in enumerate(["bare", "busy"]):
+            artwork = db.query(Artwork).filter(Artwork.slug == slug).one()
+            series.artwork_associations.append(ArtworkSeries(artwork=artwork, position=position))
+        db.add(series)
+        db.commit()
+    finally:
+        db.close()
+    for i in range(5):
+        fan = _login(app, f"fan{i}")
+        fan.post("/art/painter/busy/comment", data={"content": f"Comment {i}"})
+        fan.post("/art/painter/busy/spark")
+    sparker = TestClient(app)
+    sparker.post("/art/painter/busy/comment", data={"content": "Lovely", "author_name": "Guest"})
+    sparker.post("/art/painter/busy/spark")
+    cli(["update-trending"])
+    return {"owner": owner, "sparker": sparker, "anonymous": TestClient(app)}
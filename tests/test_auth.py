@@ -0,0 +1,125 @@
+"""Registration, login throttling and password rehashing."""
+
+import pytest
+from art_forge.routes.auth import RESERVED_USERNAMES
+
+
+def test_top_level_pages_are_reserved_usernames(app):
+    # A gallery at /art/<username> must not shadow, or be shadowed by, a page
+    segments = set()
+    for route in app.routes:
+        parts = route.path.split("/")
+        if len(parts) > 2 and parts[1] == "art" and parts[2] and not parts[2].startswith("{"):
+            segments.add(parts[2])
+    assert {"browse", "media", "static"} <= segments
+    assert segments <= RESERVED_USERNAMES, f"not reserved: {sorted(segments - RESERVED_USERNAMES)}"
+
+
+def test_register_rejects_reserved_username(app):
+    from fastapi.testclient import TestClient
+
+    response = TestClient(app).post(
+        "/art/register", data={"username": "Tags", "password": "pw"}, follow_redirects=False
+    )
+    assert response.headers["location"] == "/art/register?error=username_exists"
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_token_bucket_refills(monkeypatch):
+    from art_forge import rate_limit
+
+    clock = _Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    limiter = rate_limit.TokenBucketLimiter(burst=2, per_minute=60)
+
+    assert limiter.consume("a") == 0 and limiter.consume("a") == 0
+    assert limiter.consume("a") == pytest.approx(1.0)
+    assert limiter.consume("b") == 0  # buckets are per key
+    clock.now += 0.5
+    assert limiter.retry_after("a") == pytest.approx(0.5)
+    clock.now += 0.5
+    assert limiter.retry_after("a") == 0 and limiter.consume("a") == 0
+    # Refills up to the burst, no further
+    clock.now += 60
+    assert [limiter.consume("a") for _ in range(3)] == [0, 0, pytest.approx(1.0)]
+    limiter.reset("a")
+    assert limiter.consume("a") == 0
+
+
+def _post_login(client, username, password, forwarded_for=None):
+    headers = {"X-Forwarded-For": forwarded_for} if forwarded_for else {}
+    return client.post(
+        "/art/login", data={"username": username, "password": password}, headers=headers, follow_redirects=False
+    )
+
+
+def test_failed_logins_per_username_are_throttled(app, monkeypatch):
+    from fastapi.testclient import TestClient
+    from art_forge.rate_limit import TokenBucketLimiter
+    from art_forge.routes import auth
+
+    TestClient(app).post("/art/register", data={"username": "guarded", "password": "right"})
+    monkeypatch.setattr(auth, "login_user_limiter", TokenBucketLimiter(burst=2, per_minute=1))
+    client = TestClient(app)
+
+    assert [_post_login(client, "guarded", "wrong").status_code for _ in range(2)] == [302, 302]
+    throttled = _post_login(client, "Guarded", "right")
+    assert throttled.status_code == 429
+    assert int(throttled.headers["Retry-After"]) > 0
+    assert "Too many login attempts" in throttled.text
+    # Another account is unaffected
+    assert _post_login(client, "someone-else", "wrong").status_code == 302
+
+
+def test_login_ip_bucket_uses_forwarded_client(app, monkeypatch):
+    from fastapi.testclient import TestClient
+    from art_forge.config import settings
+    from art_forge.rate_limit import TokenBucketLimiter
+    from art_forge.routes import auth
+
+    # TestClient's peer address is "testclient"; trust it as the proxy
+    monkeypatch.setattr(settings, "server_forwarded_allow_ips", "testclient")
+    monkeypatch.setattr(auth, "login_ip_limiter", TokenBucketLimiter(burst=1, per_minute=1))
+    client = TestClient(app)
+
+    assert _post_login(client, "nobody", "pw", "203.0.113.5").status_code == 302
+    assert _post_login(client, "nobody", "pw", "203.0.113.5").status_code == 429
+    assert _post_login(client, "nobody", "pw", "198.51.100.7, testclient").status_code == 302
+    # From an untrusted peer the header is ignored and the peer's own bucket applies
+    monkeypatch.setattr(settings, "server_forwarded_allow_ips", "127.0.0.1")
+    assert _post_login(client, "nobody", "pw", "192.0.2.1").status_code == 302
+    assert _post_login(client, "nobody", "pw", "192.0.2.2").status_code == 429
+
+
+def test_login_rehashes_outdated_password_hash(app, monkeypatch):
+    from fastapi.testclient import TestClient
+    from art_forge.config import settings
+    from art_forge.database import SessionLocal
+    from art_forge.models.user import User
+
+    def stored_hash():
+        db = SessionLocal()
+        try:
+            return db.query(User.hashed_password).filter(User.username == "rehashed").scalar()
+        finally:
+            db.close()
+
+    monkeypatch.setattr(settings, "bcrypt_rounds", 4)
+    TestClient(app).post("/art/register", data={"username": "rehashed", "password": "pw"})
+    assert stored_hash().startswith("$2b$04$")
+
+    monkeypatch.setattr(settings, "bcrypt_rounds", 5)
+    client = TestClient(app)
+    assert _post_login(client, "rehashed", "wrong").status_code == 302
+    assert stored_hash().startswith("$2b$04$")
+    assert _post_login(client, "rehashed", "pw").headers["location"] == "/art/rehashed"
+    assert stored_hash().startswith("$2b$05$")
+    # The new hash still logs in
+    assert _post_login(TestClient(app), "rehashed", "pw").headers["location"] == "/art/rehashed"
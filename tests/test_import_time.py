@@ -0,0 +1,96 @@
+"""Importing the app stays cheap.
+
+Every worker the launcher starts or reloads imports `art_forge.main`
+before it can serve, and so does every `artforge` command. These import
+it in fresh interpreters under `python -X importtime`, with a scratch
+configuration, and fail if the fastest of RUNS imports takes longer
+than MAX_IMPORT_MS (other load on the machine only ever adds time), if
+it loads more than MAX_MODULES modules or one of LAZY_MODULES, or if it
+creates directories (that belongs in the app's lifespan).
+
+Time depends on the machine; set ART_FORGE_MAX_IMPORT_MS to rebase it.
+The module count and the rest do not.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Tuple
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+MAX_IMPORT_MS = float(os.environ.get("ART_FORGE_MAX_IMPORT_MS", 1000.0))
+MAX_MODULES = 560
+# Top-level packages that must not be imported until they are needed
+LAZY_MODULES = ("PIL", "jose", "boto3", "botocore", "redis")
+RUNS = 5
+
+# Prints the modules the import added, one per line, after the importtime report
+_PROBE = (
+    "import sys\n"
+    "before = set(sys.modules)\n"
+    "import art_forge.main\n"
+    "print('\\n'.join(sorted(set(sys.modules) - before)))\n"
+)
+
+
+def measure(scratch: Path) -> Tuple[float, List[str]]:
+    """Import art_forge.main once: (milliseconds, modules loaded)."""
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": os.pathsep.join(filter(None, [str(REPO_ROOT / "src"), env.get("PYTHONPATH")])),
+        "DATABASE_URL": f"sqlite:///{scratch / 'import.db'}",
+        "UPLOAD_DIR": str(scratch / "uploads"),
+        "TEMPLATE_CACHE_DIR": str(scratch / "template_cache"),
+    })
+    # Run from the scratch directory so a local .env doesn't change what is measured
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _PROBE],
+        cwd=scratch, env=env, capture_output=True, text=True, check=True,
+    )
+    microseconds = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        # Top-level entries only (nested ones are indented): the package, then main
+        if name[1:] in ("art_forge", "art_forge.main"):
+            microseconds += int(cumulative)
+    return microseconds / 1000, result.stdout.split()
+
+
+@pytest.fixture(scope="module")
+def imports(tmp_path_factory):
+    """(import timings in ms, modules loaded, scratch directory) over RUNS fresh imports."""
+    scratch = tmp_path_factory.mktemp("import")
+    # The first run also warms the filesystem cache and writes .pyc files
+    measure(scratch)
+    timings = []
+    for _ in range(RUNS):
+        milliseconds, modules = measure(scratch)
+        timings.append(milliseconds)
+    return timings, modules, scratch
+
+
+def test_import_time(imports):
+    timings, _, _ = imports
+    assert min(timings) <= MAX_IMPORT_MS, f"import took {timings} ms"
+
+
+def test_module_count(imports):
+    _, modules, _ = imports
+    assert len(modules) <= MAX_MODULES
+
+
+def test_lazy_modules_not_imported(imports):
+    _, modules, _ = imports
+    eager = sorted({module.split(".")[0] for module in modules} & set(LAZY_MODULES))
+    assert not eager, f"imported eagerly: {', '.join(eager)}"
+
+
+def test_no_directories_created(imports):
+    _, _, scratch = imports
+    created = sorted(entry.name for entry in scratch.iterdir() if entry.is_dir())
+    assert not created, f"created on import: {', '.join(created)}"
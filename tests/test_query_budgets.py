@@ -0,0 +1,67 @@
+"""Per-route query budgets, enforced by art_forge's pytest plugin.
+
+The budgets are under `query_budgets` in pyproject.toml. The plugin
+fails a test whose requests go over them or repeat a SELECT per row;
+these tests make the requests and check the plugin saw them.
+
+Each page's URLs show different amounts of content: the bare and busy
+artworks differ in images, tags, comments and sparks, and the listings
+differ in page size. They must all run the same number of queries; a
+count that grows with the content is an N+1.
+"""
+
+import pytest
+from art_forge.query_audit import AuditedQuery, RequestQueries
+
+# page -> (route template, URLs that must cost the same)
+PAGES = {
+    "artwork": ("GET /art/{username}/{slug}", ["/art/painter/bare", "/art/painter/busy"]),
+    "gallery": ("GET /art/{username}", ["/art/painter"]),
+    "browse": ("GET /art/browse", ["/art/browse", "/art/browse?limit=1"]),
+    "trending": ("GET /art/browse", ["/art/browse?sort=trending", "/art/browse?sort=trending&limit=1"]),
+    "tag": ("GET /art/tags/{slug}", ["/art/tags/sky", "/art/tags/sky?limit=1"]),
+    "series": ("GET /art/series/{slug}", ["/art/series/seascapes", "/art/series/seascapes?limit=1"]),
+}
+
+
+@pytest.mark.parametrize("visitor", ["anonymous", "sparker", "owner"])
+@pytest.mark.parametrize("page", list(PAGES))
+def test_page_within_budget(site, query_budget, pytestconfig, page, visitor):
+    route, urls = PAGES[page]
+    assert route in pytestconfig._query_budgets
+    client = site[visitor]
+    for url in urls:
+        # Twice: a page cache hit would run no queries and pass any budget
+        for _ in range(2):
+            assert client.get(url).status_code == 200, url
+
+    counts = [report.count for report in query_budget if report.endpoint == route]
+    assert len(counts) == 2 * len(urls)
+    assert min(counts) > 0
+    assert len(set(counts)) == 1, f"query count varies with the content shown: {counts}"
+
+
+def test_inline_upload_is_within_budget(login, upload, query_budget):
+    # Image jobs run inline here; their per-image queries are not the request's
+    client = login("uploader")
+    upload(client, "uploader", "Many", ["red", "green", "blue", "white"], tags="a, b, c, d")
+    assert "POST /art/{username}/upload" in [report.endpoint for report in query_budget]
+
+
+def _report(*statements):
+    report = RequestQueries("GET", "/art/browse")
+    report.queries = [AuditedQuery(statement, parameters, 0.001) for statement, parameters in statements]
+    return report
+
+
+def test_repeated_flags_selects_per_row():
+    report = _report(*[("SELECT * FROM users WHERE id = ?", f"({i},)") for i in range(3)])
+    assert report.repeated(3) == [("SELECT * FROM users WHERE id = ?", 3)]
+
+
+def test_repeated_ignores_writes_and_identical_selects():
+    report = _report(
+        *[("INSERT INTO tags (name) VALUES (?)", f"('t{i}',)") for i in range(5)],
+        *[("SELECT * FROM users WHERE id = ?", "(1,)") for _ in range(5)],
+    )
+    assert report.repeated(3) == []
@@ -0,0 +1,104 @@
+"""No full table scans on the main pages and actions.
+
+Drives registration, uploads, the listing, artwork and search pages,
+sparks, comments and deletes while recording every SELECT issued, then
+runs each one through EXPLAIN QUERY PLAN. A plain `SCAN <table>` step
+(one not using an index) grows with the table and fails the test.
+"""
+
+import re
+import sqlite3
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# FTS5 lookups show up as "SCAN <table> VIRTUAL TABLE INDEX ..."; those use the
+# index. "SCAN CONSTANT ROW" is an empty IN () list, not a table.
+FULL_SCAN = re.compile(r"^SCAN (?!CONSTANT ROW)(\w+)\b(?! USING| VIRTUAL TABLE)")
+# Work queues are read a batch at a time from the head; scanning them is the point
+QUEUE_TABLES = {"trending_queue"}
+
+
+@pytest.fixture
+def selects(app):
+    """Every distinct SELECT run while the test drives the app, with its parameters."""
+    from art_forge.database import async_engine, async_read_engine, engine
+
+    statements = {}
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.setdefault(statement, parameters)
+
+    engines = {engine, async_engine.sync_engine, async_read_engine.sync_engine}
+    for sync_engine in engines:
+        event.listen(sync_engine, "before_cursor_execute", record)
+    yield statements
+    for sync_engine in engines:
+        event.remove(sync_engine, "before_cursor_execute", record)
+
+
+def test_no_full_table_scans(app, selects, login, upload):
+    from fastapi.testclient import TestClient
+    from art_forge.cli import main as cli
+    from art_forge.config import settings
+
+    client = login("planner")
+    # Colours no other test uploads, so the image jobs really run
+    for i, color in enumerate(["navy", "olive", "teal", "maroon"]):
+        upload(client, "planner", f"Study {i}", [color, "silver"], tags="study, colour" if i % 2 else "study")
+
+    # Series have no editing UI yet; add one directly
+    db = sqlite3.connect(make_url(settings.database_url).database)
+    with db:
+        db.execute("INSERT INTO series (name, slug) VALUES ('Studies', 'studies')")
+        db.execute(
+            "INSERT INTO artwork_series (artwork_id, series_id, position)"
+            " SELECT artworks.id, series.id, 10 - artworks.id FROM artworks, series"
+            " WHERE artworks.slug LIKE 'study-%' AND series.slug = 'studies'"
+        )
+    cli(["update-trending"])
+
+    visitor = TestClient(app)
+    pages = [
+        "/art/browse?limit=2",
+        "/art/planner",
+        "/art/planner/study-1",
+        "/art/planner/study-1/status",
+        "/art/planner/study-1/comments?limit=1",
+        "/art/search?q=stud&limit=2",
+        "/art/browse?sort=trending&limit=2",
+        "/art/tags",
+        "/art/tags/study?limit=2",
+        "/art/series/studies?limit=2",
+    ]
+    for page in pages:
+        for current in (client, visitor):
+            assert current.get(page).status_code == 200, page
+    # Follow each listing's "Load More" link to cover its keyset clause
+    for first_page in [page for page in pages if "limit=2" in page and "search" not in page]:
+        next_page = re.search(r'href="(/art/[^"?]+\?cursor=[^"]+)"', client.get(first_page).text)
+        if next_page:
+            client.get(next_page.group(1).replace("&amp;", "&"))
+    visitor.post("/art/planner/study-1/spark")
+    visitor.post("/art/planner/study-1/comment", data={"content": "Nice", "author_name": "Guest"})
+    client.post("/art/planner/study-1/spark")
+
+    (image_id,) = db.execute(
+        "SELECT artwork_images.id FROM artwork_images JOIN artworks ON artworks.id = artwork_images.artwork_id"
+        " WHERE artworks.slug = 'study-2' AND artwork_images.is_primary = 0"
+    ).fetchone()
+    client.post(f"/art/planner/study-2/delete-image/{image_id}")
+    client.post("/art/planner/study-3/delete")
+
+    scans = []
+    for statement, parameters in selects.items():
+        plan = [row[3] for row in db.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)]
+        for step in plan:
+            match = FULL_SCAN.match(step)
+            if match and match.group(1) not in QUEUE_TABLES:
+                scans.append(f"{step}: {' '.join(statement.split())[:160]}")
+    db.close()
+
+    assert len(selects) > 40
+    assert not scans, "Full table scans:\n  " + "\n  ".join(scans)
@@ -0,0 +1,165 @@
+"""Spark buffer bookkeeping: coalescing, in-flight counts, requeues.
+
+Each test runs its own buffer with a flush interval long enough that
+nothing is written until the test calls flush().
+"""
+
+import asyncio
+import itertools
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+import pytest
+import pytest_asyncio
+from art_forge import spark_buffer as spark_buffer_module
+from art_forge.spark_buffer import SparkBuffer
+
+
+_numbers = itertools.count()
+
+
+@pytest.fixture
+def artworks(login, upload):
+    """Two new, unsparked artworks, as (id, spark_count) stand-ins for toggle()."""
+    from art_forge.database import SessionLocal
+    from art_forge.models.artwork import Artwork
+
+    username = f"buffered{next(_numbers)}"
+    owner = login(username)
+    titles = [f"{username} first", f"{username} second"]
+    for title, color in zip(titles, ["gold", "indigo"]):
+        upload(owner, username, title, [color])
+    db = SessionLocal()
+    try:
+        ids = [db.query(Artwork.id).filter(Artwork.title == title).scalar() for title in titles]
+    finally:
+        db.close()
+    return [SimpleNamespace(id=artwork_id, spark_count=0) for artwork_id in ids]
+
+
+@pytest_asyncio.fixture
+async def buffer():
+    buffer = SparkBuffer(interval=3600, max_pending=1000)
+    buffer.start()
+    yield buffer
+    await buffer.stop()
+
+
+def _stored_sparks(artwork_id):
+    from art_forge.database import SessionLocal
+    from art_forge.models.spark import Spark
+
+    db = SessionLocal()
+    try:
+        return {session_id for (session_id,) in db.query(Spark.session_id).filter(Spark.artwork_id == artwork_id)}
+    finally:
+        db.close()
+
+
+async def _toggle(buffer, artwork, session_id):
+    from art_forge.database import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        return await buffer.toggle(db, artwork, None, session_id)
+
+
+def _gate_flushes(monkeypatch, fail=False):
+    """Hold every flush's write until the returned event is set; optionally fail it."""
+    sessions = spark_buffer_module.AsyncSessionLocal
+    gate = asyncio.Event()
+
+    @asynccontextmanager
+    async def gated_session():
+        async with sessions() as session:
+            run_sync = session.run_sync
+
+            async def held(fn, *args):
+                await gate.wait()
+                if fail:
+                    raise RuntimeError("database unavailable")
+                return await run_sync(fn, *args)
+
+            session.run_sync = held
+            yield session
+
+    monkeypatch.setattr(spark_buffer_module, "AsyncSessionLocal", gated_session)
+    return gate
+
+
+async def _inflight(buffer):
+    while not buffer._inflight:
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_toggle_back_cancels_out(buffer, artworks):
+    artwork = artworks[0]
+    assert await _toggle(buffer, artwork, "undecided") == (True, 1)
+    assert await _toggle(buffer, artwork, "undecided") == (False, 0)
+
+    assert buffer.stats()["pending"] == 0
+    assert buffer.sparked(artwork.id, None, "undecided") is None
+    assert await buffer.flush() == 0
+    assert "undecided" not in _stored_sparks(artwork.id)
+
+
+@pytest.mark.asyncio
+async def test_count_holds_while_batch_in_flight(buffer, artworks, monkeypatch):
+    artwork = artworks[0]
+    gate = _gate_flushes(monkeypatch)
+    await _toggle(buffer, artwork, "steady")
+
+    flushing = asyncio.ensure_future(buffer.flush())
+    await _inflight(buffer)
+    # Written but not committed: neither lost nor counted twice
+    assert buffer.count(artwork.id, artwork.spark_count) == artwork.spark_count + 1
+    assert buffer.sparked(artwork.id, None, "steady") is True
+    # A toggle during the flush builds on the in-flight state
+    assert await _toggle(buffer, artwork, "late") == (True, artwork.spark_count + 2)
+
+    gate.set()
+    assert await flushing == 1
+    artwork.spark_count += 1
+    assert buffer.count(artwork.id, artwork.spark_count) == artwork.spark_count + 1
+    assert "steady" in _stored_sparks(artwork.id)
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_requeues_newest_state(buffer, artworks, monkeypatch):
+    first, second = artworks
+    gate = _gate_flushes(monkeypatch, fail=True)
+    await _toggle(buffer, first, "fickle")
+    await _toggle(buffer, second, "loyal")
+
+    flushing = asyncio.ensure_future(buffer.flush())
+    await _inflight(buffer)
+    # Changes their mind while the failing write is in flight
+    assert await _toggle(buffer, first, "fickle") == (False, first.spark_count)
+    gate.set()
+    assert await flushing == 0
+    assert buffer.stats()["errors"] == 1
+
+    # The newer toggle wins: nothing left to write for "fickle", "loyal" still pending
+    assert buffer.stats()["pending"] == 1
+    assert buffer.sparked(first.id, None, "fickle") is None
+    assert buffer.count(first.id, first.spark_count) == first.spark_count
+    assert buffer.sparked(second.id, None, "loyal") is True
+    assert buffer.count(second.id, second.spark_count) == second.spark_count + 1
+
+    monkeypatch.undo()
+    assert await buffer.flush() == 1
+    assert "fickle" not in _stored_sparks(first.id)
+    assert "loyal" in _stored_sparks(second.id)
+
+
+@pytest.mark.asyncio
+async def test_discard_artwork_drops_pending_toggles(buffer, artworks):
+    first, second = artworks
+    await _toggle(buffer, first, "dropped")
+    await _toggle(buffer, second, "kept")
+
+    buffer.discard_artwork(first.id)
+    assert buffer.count(first.id, first.spark_count) == first.spark_count
+    assert buffer.sparked(first.id, None, "dropped") is None
+    assert await buffer.flush() == 1
+    assert "dropped" not in _stored_sparks(first.id)
+    assert "kept" in _stored_sparks(second.id)
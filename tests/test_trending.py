@@ -0,0 +1,68 @@
+"""Trending scores folded from queued changes match a rescore from scratch."""
+
+import pytest
+
+
+def _scores(ids):
+    from art_forge.database import SessionLocal
+    from art_forge.models.trending import ArtworkTrend
+
+    db = SessionLocal()
+    try:
+        return {trend.artwork_id: trend.score for trend in db.query(ArtworkTrend).filter(ArtworkTrend.artwork_id.in_(ids))}
+    finally:
+        db.close()
+
+
+def test_folded_scores_match_rescore(app, login, upload):
+    from fastapi.testclient import TestClient
+    from art_forge.cli import main as cli
+    from art_forge.database import SessionLocal
+    from art_forge.models.artwork import Artwork
+    from art_forge.models.comment import Comment
+
+    owner = login("trender")
+    upload(owner, "trender", "Calm", ["khaki"])
+    upload(owner, "trender", "Lively", ["coral"])
+    cli(["update-trending"])
+
+    fans = [TestClient(app) for _ in range(4)]
+    for fan in fans:
+        fan.post("/art/trender/lively/spark")
+    fans[0].post("/art/trender/lively/spark")  # and back again
+    owner.post("/art/trender/lively/comment", data={"content": "Thanks"})
+    owner.post("/art/trender/calm/comment", data={"content": "Gone soon"})
+    db = SessionLocal()
+    comment_id = db.query(Comment.id).join(Artwork).filter(Artwork.slug == "calm").scalar()
+    db.close()
+    owner.post(f"/art/trender/calm/comment/{comment_id}/delete")
+    cli(["update-trending"])
+
+    db = SessionLocal()
+    ids = [artwork_id for (artwork_id,) in db.query(Artwork.id).filter(Artwork.title.in_(["Calm", "Lively"]))]
+    db.close()
+    folded = _scores(ids)
+    cli(["update-trending", "--all"])
+    assert folded == pytest.approx(_scores(ids), abs=1e-4)
+    assert len(folded) == 2
+
+
+def test_claimed_events_are_applied_once(app, login, upload):
+    from art_forge.database import SessionLocal
+    from art_forge.models.trending import trending_queue
+    from art_forge.trending import drain_queue, rescore_queued
+
+    drain_queue(100)
+    owner = login("claimer")
+    upload(owner, "claimer", "Once", ["plum"])
+
+    first, second = SessionLocal(), SessionLocal()
+    try:
+        assert rescore_queued(first, 100) == (1, 1)
+        first.commit()
+        assert rescore_queued(second, 100) == (0, 0)
+        second.commit()
+        assert first.query(trending_queue).count() == 0
+    finally:
+        first.close()
+        second.close()
@@ -0,0 +1,92 @@
+"""Streamed uploads: rejected files leave nothing behind, shared files are
+stored once and removed with their last reference.
+"""
+
+import hashlib
+import itertools
+from pathlib import Path
+import pytest
+from art_forge.config import settings
+
+_numbers = itertools.count()
+
+
+def _stored_files():
+    """Every file under the upload directory, relative to it."""
+    root = Path(settings.upload_dir)
+    return {str(path.relative_to(root)) for path in root.rglob("*") if path.is_file()}
+
+
+def _blobs(content_hash_prefix=""):
+    from art_forge.database import SessionLocal
+    from art_forge.models.blob import Blob
+
+    db = SessionLocal()
+    try:
+        return {
+            blob.content_hash: (blob.key, blob.ref_count)
+            for blob in db.query(Blob).filter(Blob.content_hash.startswith(content_hash_prefix))
+        }
+    finally:
+        db.close()
+
+
+def _post(uploader, files):
+    client, username = uploader
+    response = client.post(f"/art/{username}/upload", data={"title": "Rejected"}, files=files, follow_redirects=False)
+    # No artwork is created for a rejected upload
+    assert client.get(f"/art/{username}/rejected").status_code == 404
+    return response
+
+
+@pytest.fixture
+def uploader(login):
+    """(client, username) for a new user; checks the test leaves storage as it found it."""
+    username = f"streamer{next(_numbers)}"
+    client = login(username)
+    files, blobs = _stored_files(), _blobs()
+    yield client, username
+    # Whatever a test uploads it deletes again; rejected ones never stay
+    assert _stored_files() == files
+    assert _blobs() == blobs
+
+
+def test_oversize_upload_is_rejected(uploader, png, monkeypatch):
+    monkeypatch.setattr(settings, "max_file_size", 64)
+    response = _post(uploader, [("images", ("big.png", png("tan") + b"\0" * 64, "image/png"))])
+    assert response.status_code == 413
+
+
+def test_file_that_is_not_an_image_is_rejected(uploader):
+    response = _post(uploader, [("images", ("fake.png", b"MZ\x90\x00 not a png", "image/png"))])
+    assert response.status_code == 415
+    assert "not a supported image" in response.text
+
+
+def test_bad_file_rejects_the_whole_upload(uploader, png):
+    # The first file is stored before the second is read; it must go too
+    response = _post(uploader, [
+        ("images", ("good.png", png("orchid"), "image/png")),
+        ("images", ("bad.png", b"GIF? no", "image/png")),
+    ])
+    assert response.status_code == 415
+
+
+def test_shared_file_is_stored_once_and_released_on_delete(uploader, upload, png):
+    client, username = uploader
+    content_hash = hashlib.sha256(png("sienna")).hexdigest()
+    upload(client, username, "Original", ["sienna"])
+    upload(client, username, "Copy", ["sienna"])
+
+    (key, ref_count), = _blobs(content_hash).values()
+    assert ref_count == 2
+    assert len([name for name in _stored_files() if content_hash in name]) > 1  # original plus derivatives
+
+    client.post(f"/art/{username}/original/delete")
+    assert _blobs(content_hash) == {content_hash: (key, 1)}
+    assert key in _stored_files()
+    assert client.get(f"/art/{username}/copy").status_code == 200
+
+    client.post(f"/art/{username}/copy/delete")
+    assert _blobs(content_hash) == {}
+    assert not [name for name in _stored_files() if content_hash in name]